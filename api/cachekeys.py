@@ -0,0 +1,25 @@
+# HTK Imports
+from htk.cache import CustomCacheScheme
+from htk.utils import htk_setting
+
+
+class DataTablesCountCache(CustomCacheScheme):
+    """Cache management object for DataTables record counts
+
+    prekey = query signature
+    """
+    def get_cache_duration(self):
+        duration = htk_setting('HTK_DATATABLES_COUNT_CACHE_DURATION')
+        return duration
+
+
+class DataTablesCursorCache(CustomCacheScheme):
+    """Cache management object for DataTables keyset pagination cursors
+
+    Payload is the ordering values of the last row before `start`
+
+    prekey = [query signature, start,]
+    """
+    def get_cache_duration(self):
+        duration = htk_setting('HTK_DATATABLES_CURSOR_CACHE_DURATION')
+        return duration
@@ -1,21 +1,33 @@
 # Python Standard Library Imports
+import hashlib
 import operator
 import typing as T
 from dataclasses import dataclass
 from functools import reduce
 
 # Django Imports
-from django.core.paginator import Paginator
 from django.db import models
 from django.db.models import Q
 from django.http import (
     HttpRequest,
     HttpResponse,
+    StreamingHttpResponse,
 )
 
 # HTK Imports
-from htk.api.utils import json_response
-from htk.utils import strtobool_safe
+from htk.api.cachekeys import (
+    DataTablesCountCache,
+    DataTablesCursorCache,
+)
+from htk.api.utils import (
+    json_response,
+    to_json,
+)
+from htk.utils import (
+    htk_setting,
+    strtobool_safe,
+)
+from htk.utils.query import get_estimated_count
 
 # isort: off
 
@@ -236,6 +248,98 @@ class DataTablesQueryParams:
         return order_by
 
 
+class DataTablesCountMode:
+    """How `model_datatables_api_get_view()` computes `recordsTotal` and `recordsFiltered`"""
+
+    # `COUNT(*)` on every draw
+    EXACT = 'exact'
+    # `COUNT(*)`, cached per query for `HTK_DATATABLES_COUNT_CACHE_DURATION` seconds
+    CACHED = 'cached'
+    # query planner estimate (PostgreSQL), exact below `HTK_DATATABLES_ESTIMATED_COUNT_THRESHOLD`, cached like CACHED
+    ESTIMATED = 'estimated'
+
+
+class DataTablesPaginationMode:
+    """How `model_datatables_api_get_view()` fetches a page"""
+
+    # `OFFSET start`, which scans and discards all of the preceding rows
+    OFFSET = 'offset'
+    # seeks past the last row of the previous page on the ordering columns, when its cursor is cached
+    KEYSET = 'keyset'
+
+
+def _get_query_signature(q: models.QuerySet) -> str:
+    """Identifies the SQL of `q`, for caching counts and cursors per filter"""
+    signature = hashlib.sha1(
+        f'{q.model._meta.label}:{q.query}'.encode()
+    ).hexdigest()
+    return signature
+
+
+def _get_datatables_count(q: models.QuerySet, count_mode: str) -> int:
+    if count_mode == DataTablesCountMode.EXACT:
+        count = q.count()
+    else:
+        # ordering does not change the count
+        q = q.order_by()
+        if count_mode == DataTablesCountMode.CACHED:
+            fn = q.count
+        elif count_mode == DataTablesCountMode.ESTIMATED:
+            fn = lambda: get_estimated_count(
+                q,
+                exact_threshold=htk_setting(
+                    'HTK_DATATABLES_ESTIMATED_COUNT_THRESHOLD'
+                ),
+            )
+        else:
+            raise Exception(f'Unknown DataTables count mode: {count_mode}')
+
+        c = DataTablesCountCache(prekey=_get_query_signature(q))
+        count = c.get_or_compute(fn)
+    return count
+
+
+def _get_keyset_ordering(ordering: list[str]) -> list[str]:
+    """Appends the primary key to `ordering`, so that rows are totally ordered"""
+    names = {field.lstrip('-') for field in ordering}
+    if 'pk' in names or 'id' in names:
+        keyset_ordering = list(ordering)
+    else:
+        keyset_ordering = list(ordering) + ['pk']
+    return keyset_ordering
+
+
+def _get_keyset_filter(ordering: list[str], cursor: list) -> Q:
+    """Builds the filter for rows after `cursor` in `ordering`
+
+    For `ordering = ['a', '-b', 'pk']`, this is:
+    `a > va OR (a = va AND b < vb) OR (a = va AND b = vb AND pk > vpk)`
+    """
+    clauses = []
+    for i, field in enumerate(ordering):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        equals = {
+            previous_field.lstrip('-'): value
+            for previous_field, value in zip(ordering[:i], cursor[:i])
+        }
+        clauses.append(Q(**equals, **{f'{name}__{lookup}': cursor[i]}))
+
+    keyset_filter = reduce(operator.or_, clauses)
+    return keyset_filter
+
+
+def _get_row_value(row: T.Union[dict, models.Model], field_name: str):
+    """Gets the value of `field_name` (which may span relations) from a `values()` dict or a model instance"""
+    if isinstance(row, dict):
+        value = row[field_name]
+    else:
+        value = row
+        for attr in field_name.split('__'):
+            value = getattr(value, attr) if value is not None else None
+    return value
+
+
 def model_datatables_api_get_view(
     request: HttpRequest,
     model_class: T.Union[models.Model, models.QuerySet],
@@ -243,6 +347,10 @@ def model_datatables_api_get_view(
     base_filter: T.Optional[Q] = None,
     search_fields: T.Optional[list[str]] = None,
     default_ordering: T.Optional[list[str]] = None,
+    fields: T.Optional[list[str]] = None,
+    count_mode: str = DataTablesCountMode.EXACT,
+    pagination_mode: str = DataTablesPaginationMode.OFFSET,
+    stream: bool = False,
 ) -> HttpResponse:
     """Generic API view for handling a server-side processed
     Datatables request.
@@ -250,6 +358,14 @@ def model_datatables_api_get_view(
     `model_class` can be either a Django Model or a QuerySet. Allowing queryset
     is for special circumstances where some aggregation or other operations
     is needed before.
+
+    For large tables:
+    - `fields`: fetch only these with `values()`, instead of full instances serialized with `as_dict()`
+    - `count_mode`: one of `DataTablesCountMode`; cache or estimate the totals instead of counting on every draw
+    - `pagination_mode`: one of `DataTablesPaginationMode`. With KEYSET, the ordering values of the last row of each page are cached,
+      and the next page seeks past them instead of using OFFSET. Pages without a cached cursor (e.g. jumping ahead) fall back to OFFSET.
+      Ordering columns must be non-null, and the primary key is appended as a tie-breaker.
+    - `stream`: stream the rows into the JSON response as they are fetched
     """
 
     ##
@@ -272,7 +388,7 @@ def model_datatables_api_get_view(
     if base_filter:
         q = q.filter(base_filter)
 
-    base_q = q
+    base_q = q.all()
 
     if search_fields and dtqp.search_value:
         # chain search fields with an OR search
@@ -282,33 +398,115 @@ def model_datatables_api_get_view(
         ]
         filter_param = reduce(operator.or_, search_criteria)
         q = q.filter(filter_param)
+        is_filtered = True
     else:
         q = q.all()
+        is_filtered = False
+
+    ordering = dtqp.order_by or default_ordering or []
 
-    ordering = dtqp.order_by or default_ordering
+    if pagination_mode == DataTablesPaginationMode.KEYSET:
+        ordering = _get_keyset_ordering(ordering)
+    elif pagination_mode != DataTablesPaginationMode.OFFSET:
+        raise Exception(f'Unknown DataTables pagination mode: {pagination_mode}')
 
     if ordering:
         q = q.order_by(*ordering)
 
     ##
-    # Compute the paginated results and pagination details
-
-    p = Paginator(q, dtqp.length)
+    # Compute the pagination details
 
-    records_total = base_q.count()
-    records_filtered = q.count()
+    records_total = _get_datatables_count(base_q, count_mode)
+    records_filtered = (
+        _get_datatables_count(q, count_mode) if is_filtered else records_total
+    )
 
-    page_num = dtqp.start // dtqp.length + 1
+    ##
+    # Fetch the page
+
+    if fields is not None:
+        # the ordering values are needed for the next cursor, but are not returned unless asked for
+        extra_fields = [
+            field_name
+            for field in ordering
+            if (field_name := field.lstrip('-')) not in fields
+        ] if pagination_mode == DataTablesPaginationMode.KEYSET else []
+        page_q = q.values(*fields, *extra_fields)
+    else:
+        extra_fields = []
+        page_q = q
+
+    cursor_signature = None
+    if pagination_mode == DataTablesPaginationMode.KEYSET:
+        cursor_signature = _get_query_signature(q)
+        cursor = (
+            DataTablesCursorCache(prekey=[cursor_signature, dtqp.start]).get()
+            if dtqp.start > 0
+            else None
+        )
+        if cursor is not None:
+            page_q = page_q.filter(_get_keyset_filter(ordering, cursor))
+            offset = 0
+        else:
+            offset = dtqp.start
+    else:
+        offset = dtqp.start
+
+    if dtqp.length > 0:
+        page_q = page_q[offset : offset + dtqp.length]
+    elif offset > 0:
+        page_q = page_q[offset:]
+
+    def _iter_data():
+        last_row = None
+        for row in page_q.iterator() if stream else page_q:
+            last_row = row
+            if fields is None:
+                value = row.as_dict()
+            else:
+                value = row
+                if extra_fields:
+                    value = {
+                        k: v for k, v in row.items() if k not in extra_fields
+                    }
+            yield value
+
+        if cursor_signature is not None and last_row is not None and dtqp.length > 0:
+            next_cursor = [
+                _get_row_value(last_row, field.lstrip('-'))
+                for field in ordering
+            ]
+            if None not in next_cursor:
+                c = DataTablesCursorCache(
+                    prekey=[cursor_signature, dtqp.start + dtqp.length]
+                )
+                c.cache_store(next_cursor)
 
     ##
     # Build the response
 
-    response = json_response(
-        {
-            'draw': dtqp.draw,
-            'data': [obj.as_dict() for obj in p.page(page_num)],
-            'recordsTotal': records_total,
-            'recordsFiltered': records_filtered,
-        },
-    )
+    if stream:
+
+        def _iter_content():
+            yield '{"draw": %s, "recordsTotal": %s, "recordsFiltered": %s, "data": [' % (
+                to_json(dtqp.draw),
+                to_json(records_total),
+                to_json(records_filtered),
+            )
+            for i, value in enumerate(_iter_data()):
+                yield (', ' if i else '') + to_json(value)
+            yield ']}'
+
+        response = StreamingHttpResponse(
+            _iter_content(), content_type='application/json'
+        )
+    else:
+        response = json_response(
+            {
+                'draw': dtqp.draw,
+                'data': list(_iter_data()),
+                'recordsTotal': records_total,
+                'recordsFiltered': records_filtered,
+            },
+        )
     return response
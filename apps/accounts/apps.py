@@ -117,6 +117,27 @@ def process_user_email_association(sender, instance, created, **kwargs):
             invitations_service.process_user_email_confirmation(user_email)
 
 
+@disable_for_loaddata
+def update_user_search_index(sender, instance, **kwargs):
+    """signal handler for User, UserProfile and UserEmail post-save, and UserEmail post-delete
+
+    Reindexes the User after commit, so that a User being deleted is not indexed again
+    """
+    from htk.apps.accounts.utils.search_index import schedule_index_user
+
+    user_id = instance.id if sender == get_user_model() else instance.user_id
+    schedule_index_user(user_id)
+
+
+@disable_for_loaddata
+def invalidate_cached_user(sender, instance, **kwargs):
+    """signal handler for User and UserProfile post-save and post-delete"""
+    from htk.apps.accounts.utils.general import invalidate_user_cache
+
+    user_id = instance.id if sender == get_user_model() else instance.user_id
+    invalidate_user_cache(user_id)
+
+
 class HtkAccountsAppConfig(HtkAppConfig):
     name = 'htk.apps.accounts'
     verbose_name = 'Accounts'
@@ -146,3 +167,44 @@ class HtkAccountsAppConfig(HtkAppConfig):
             sender=UserEmail,
             dispatch_uid='htk_process_user_email_association',
         )
+
+        if htk_setting('HTK_ACCOUNTS_USER_CACHE_ENABLED'):
+            from htk.apps.accounts.utils.general import get_user_profile_model
+
+            # drop cached Users when they or their profiles change
+            for sender in (UserModel, get_user_profile_model()):
+                for signal in (signals.post_save, signals.post_delete):
+                    signal.connect(
+                        invalidate_cached_user,
+                        sender=sender,
+                        dispatch_uid='htk_invalidate_cached_user_%s_%s'
+                        % (
+                            sender._meta.label_lower,
+                            'save' if signal == signals.post_save else 'delete',
+                        ),
+                    )
+
+        if htk_setting('HTK_ACCOUNTS_SEARCH_INDEX_ENABLED'):
+            from htk.apps.accounts.utils.general import get_user_profile_model
+
+            # keep the User search index up to date
+            signals.post_save.connect(
+                update_user_search_index,
+                sender=UserModel,
+                dispatch_uid='htk_update_user_search_index',
+            )
+            signals.post_save.connect(
+                update_user_search_index,
+                sender=get_user_profile_model(),
+                dispatch_uid='htk_update_user_search_index_profile',
+            )
+            signals.post_save.connect(
+                update_user_search_index,
+                sender=UserEmail,
+                dispatch_uid='htk_update_user_search_index_email',
+            )
+            signals.post_delete.connect(
+                update_user_search_index,
+                sender=UserEmail,
+                dispatch_uid='htk_update_user_search_index_email_delete',
+            )
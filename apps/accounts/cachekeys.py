@@ -1,24 +1,84 @@
+# Python Standard Library Imports
+import time
+
+# Django Imports
+from django.core.cache import cache
+
 # HTK Imports
 from htk.cache import CustomCacheScheme
 from htk.cachekeys import BatchRelationshipEmailCooldown
 from htk.constants.time import *
 
 
-class UserFollowingCache(CustomCacheScheme):
-    """Cache management object for user following,
-    e.g. user.profile.get_following()
+class UserCache(CustomCacheScheme):
+    """Cache management object for a User, with its profile,
+    e.g. get_users_by_id()
+
+    Invalidated after User and UserProfile saves and deletes
+
+    Holds the whole User, including the password hash; opt-in with `HTK_ACCOUNTS_USER_CACHE_ENABLED`
 
     prekey = user.id
     """
+    def get_cache_duration(self):
+        from htk.utils import htk_setting
+        duration = htk_setting('HTK_ACCOUNTS_USER_CACHE_DURATION')
+        return duration
+
+
+class UserFollowGraphGeneration(CustomCacheScheme):
+    """Cache management object for the generation of a user's cached follow graph set, which is part of the set's prekey
+
+    Bumped on follow/unfollow instead of deleting the set, so that a set loaded before the change committed is stored under a generation that is no longer read
+
+    prekey = [user.id, ids cache class name]
+    """
+    def get_cache_duration(self):
+        # never expires on its own; if evicted, it is reseeded with a time-based value
+        duration = None
+        return duration
+
+    def _get_seed(self):
+        # time-based rather than 1, so that an evicted generation never restarts at a value that was already used
+        seed = int(time.time() * 1000)
+        return seed
+
+    def get_generation(self):
+        cache_key = self.get_cache_key()
+        generation = cache.get(cache_key)
+        if generation is None:
+            cache.add(cache_key, self._get_seed(), self.get_cache_duration())
+            generation = cache.get(cache_key)
+        return generation
+
+    def bump(self):
+        cache_key = self.get_cache_key()
+        try:
+            cache.incr(cache_key)
+        except ValueError:
+            cache.set(cache_key, self._get_seed(), self.get_cache_duration())
+
+
+class UserFollowingIdsCache(CustomCacheScheme):
+    """Cache management object for the set of user ids that a user follows,
+    e.g. user.profile.get_following_ids()
+
+    Invalidated on follow/unfollow, by bumping the user's `UserFollowGraphGeneration`; see `htk.apps.accounts.utils.follow_graph`
+
+    prekey = [user.id, generation]
+    """
     def get_cache_duration(self):
         duration = TIMEOUT_1_HOUR
         return duration
 
-class UserFollowersCache(CustomCacheScheme):
-    """Cache management object for user followers,
-    e.g. user.profile.get_followers()
 
-    prekey = user.id
+class UserFollowersIdsCache(CustomCacheScheme):
+    """Cache management object for the set of user ids following a user,
+    e.g. user.profile.get_followers_ids()
+
+    Invalidated on follow/unfollow, by bumping the user's `UserFollowGraphGeneration`; see `htk.apps.accounts.utils.follow_graph`
+
+    prekey = [user.id, generation]
     """
     def get_cache_duration(self):
         duration = TIMEOUT_1_HOUR
@@ -53,6 +53,20 @@ HTK_ACCOUNT_EMAIL_SUBJECT_WELCOME = 'Welcome to %(site_name)s, %(email)s'
 HTK_ACCOUNT_EMAIL_BCC_ACTIVATION = True
 HTK_ACCOUNT_EMAIL_BCC_WELCOME = True
 
+##
+# User Cache
+# cache Users for `get_users_by_id()`; invalidated on User and UserProfile saves, but not `QuerySet.update()`
+# opt-in: whole User instances are cached, including password hashes
+HTK_ACCOUNTS_USER_CACHE_ENABLED = False
+HTK_ACCOUNTS_USER_CACHE_DURATION = 900
+
+##
+# User Search
+# maintain `UserSearchToken` rows on User, UserProfile and UserEmail saves
+HTK_ACCOUNTS_SEARCH_INDEX_ENABLED = False
+# tokens matched for the most selective query word, before ranking
+HTK_ACCOUNTS_SEARCH_INDEX_MAX_CANDIDATES = 1000
+
 ##
 # User Attributes
 HTK_USER_ATTRIBUTE_DEFAULTS = {}
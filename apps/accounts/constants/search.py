@@ -1 +1,25 @@
+# HTK Imports
+from htk.apps.accounts.enums import UserSearchTokenField
+
+
 DEFAULT_NUM_SEARCH_RESULTS = 20
+
+# fields searched by default; emails are excluded, since suggesting them exposes others' email addresses
+DEFAULT_USER_SEARCH_FIELDS = (
+    UserSearchTokenField.USERNAME,
+    UserSearchTokenField.FIRST_NAME,
+    UserSearchTokenField.LAST_NAME,
+)
+
+# relevance of a match in each field; a full token match scores up to twice as much as a short prefix
+USER_SEARCH_FIELD_WEIGHTS = {
+    UserSearchTokenField.USERNAME: 3,
+    UserSearchTokenField.FIRST_NAME: 2,
+    UserSearchTokenField.LAST_NAME: 2,
+    UserSearchTokenField.EMAIL: 1,
+}
+
+# tokens are truncated to this length
+USER_SEARCH_TOKEN_MAX_LENGTH = 150
+# only the first few words of a query are used
+USER_SEARCH_MAX_QUERY_TERMS = 4
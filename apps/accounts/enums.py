@@ -7,3 +7,12 @@ class ProfileAvatarType(Enum):
     GRAVATAR = 100
     FACEBOOK = 101
     TWITTER = 102
+
+
+class UserSearchTokenField(Enum):
+    """The User field a `UserSearchToken` was extracted from"""
+
+    USERNAME = 1
+    FIRST_NAME = 2
+    LAST_NAME = 3
+    EMAIL = 4
@@ -16,17 +16,24 @@ from django.utils import timezone
 
 # HTK Imports
 from htk.admintools.models import HtkCompanyUserMixin
-from htk.apps.accounts.cachekeys import (
-    UserFollowersCache,
-    UserFollowingCache,
-)
 from htk.apps.accounts.constants import *
 from htk.apps.accounts.emails import (
     activation_email,
     welcome_email,
 )
-from htk.apps.accounts.enums import ProfileAvatarType
+from htk.apps.accounts.enums import (
+    ProfileAvatarType,
+    UserSearchTokenField,
+)
 from htk.apps.accounts.utils import encrypt_uid
+from htk.apps.accounts.utils.follow_graph import (
+    get_followers_ids,
+    get_following_ids,
+    get_mutual_follow_ids,
+    hydrate_users,
+    record_follow,
+    record_unfollow,
+)
 from htk.models import (
     AbstractAttribute,
     AbstractAttributeHolderClassFactory,
@@ -79,7 +86,7 @@ class UserAttribute(AbstractAttribute):
 
 UserAttributeHolder = AbstractAttributeHolderClassFactory(
     UserAttribute,
-    holder_resolver=lambda self: self.user,
+    holder_field='user',
     defaults=htk_setting('HTK_USER_ATTRIBUTE_DEFAULTS'),
 ).get_class()
 
@@ -719,57 +726,61 @@ class AbstractUserProfile(BaseAbstractUserProfile):
     # followers/following
     def follow_user(self, user):
         self.following.add(user)
-        # invalidate caches
-        following_cache = UserFollowingCache(prekey=self.user.id)
-        following_cache.invalidate_cache()
-        followers_cache = UserFollowersCache(prekey=user.id)
-        followers_cache.invalidate_cache()
+        record_follow(self.user.id, user.id)
 
     def unfollow_user(self, user):
         self.following.remove(user)
-        # invalidate caches
-        following_cache = UserFollowingCache(prekey=self.user.id)
-        following_cache.invalidate_cache()
-        followers_cache = UserFollowersCache(prekey=user.id)
-        followers_cache.invalidate_cache()
+        record_unfollow(self.user.id, user.id)
+
+    def get_following_ids(self):
+        """Gets the ids of Users this user follows
+        Returns a frozenset of user ids
+        """
+        user_ids = get_following_ids(self.user.id)
+        return user_ids
+
+    def get_followers_ids(self):
+        """Gets the ids of Users following this user
+        Returns a frozenset of user ids
+        """
+        user_ids = get_followers_ids(self.user.id)
+        return user_ids
+
+    def get_mutual_follow_ids(self):
+        """Gets the ids of Users who both follow and are followed by this user
+        Returns a frozenset of user ids
+        """
+        user_ids = get_mutual_follow_ids(self.user.id)
+        return user_ids
 
     def get_following(self):
         """Gets User following
         Returns a list of User objects
         """
-        c = UserFollowingCache(prekey=self.user.id)
-        following = c.get()
-        if following is None:
-            following = list(self.following.all())
-            c.cache_store(following)
+        following = hydrate_users(self.get_following_ids())
         return following
 
     def get_followers(self):
         """Gets User followers
         Returns a list of User objects
         """
-        prekey = [
-            self.user.id,
-        ]
-        c = UserFollowersCache(prekey=self.user.id)
-        followers = c.get()
-        if followers is None:
-            follower_profiles = self.user.followers.all()
-            followers = [profile.user for profile in follower_profiles]
-            c.cache_store(followers)
+        followers = hydrate_users(self.get_followers_ids())
         return followers
 
+    def is_following(self, user):
+        """Check if self.user is following `user`"""
+        value = user.id in self.get_following_ids()
+        return value
+
     def has_follower(self, user=None):
         """Check if the currently logged-in user is following self.user"""
         if user is None:
             request = get_current_request()
-            user = request.user
+            user = request.user if request else None
         else:
             pass
-        if user:
-            value = (
-                user.profile.get_following().filter(id=self.user.id).exists()
-            )
+        if user and user.is_authenticated:
+            value = user.id in self.get_followers_ids()
         else:
             value = False
         return value
@@ -1026,6 +1037,43 @@ class UserEmail(models.Model):
         return was_activated
 
 
+class UserSearchToken(models.Model):
+    """Lowercased words of a User's username, names and confirmed emails, for indexed prefix search
+
+    Denormalized from User, UserProfile and UserEmail by `htk.apps.accounts.utils.search_index`
+    when `HTK_ACCOUNTS_SEARCH_INDEX_ENABLED`
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='search_tokens',
+    )
+    field = models.PositiveSmallIntegerField(
+        choices=[(field.value, field.name) for field in UserSearchTokenField]
+    )
+    token = models.CharField(max_length=150, db_index=True)
+
+    class Meta:
+        app_label = 'accounts'
+        verbose_name = 'User Search Token'
+        unique_together = (
+            (
+                'user',
+                'field',
+                'token',
+            ),
+        )
+
+    def __str__(self):
+        s = '%s, %s: %s' % (
+            self.user_id,
+            UserSearchTokenField(self.field).name,
+            self.token,
+        )
+        return s
+
+
 ####################
 # Import these last to prevent circular import
 from htk.apps.accounts.utils import get_user_email  # isort:skip
@@ -4,6 +4,9 @@ from django.contrib.auth import get_user_model
 # HTK Imports
 from htk.apps.accounts.constants.search import *
 from htk.apps.accounts.models import UserEmail
+from htk.apps.accounts.utils.general import get_users_by_id
+from htk.apps.accounts.utils.search_index import search_user_ids
+from htk.utils import htk_setting
 
 
 """Various search functions for User objects
@@ -35,8 +38,13 @@ def search_by_username_name(query, num_results=DEFAULT_NUM_SEARCH_RESULTS):
 
     Wrapper combining search_by_username and search_by_name
 
-    Returns a QuerySet of User objects
+    If `HTK_ACCOUNTS_SEARCH_INDEX_ENABLED`, uses `search_users()` instead
+
+    Returns a QuerySet of User objects, or a list of User objects ordered by relevance if `HTK_ACCOUNTS_SEARCH_INDEX_ENABLED`
     """
+    if htk_setting('HTK_ACCOUNTS_SEARCH_INDEX_ENABLED'):
+        return search_users(query, num_results=num_results)
+
     result_qs = combined_user_search(
         query,
         (
@@ -109,9 +117,22 @@ def search_by_email(query, num_results=DEFAULT_NUM_SEARCH_RESULTS):
         is_confirmed=True,
         email__istartswith=query,
         user__profile__has_username_set=True
-    )
+    ).select_related('user')
     if num_results:
         user_emails = user_emails[:num_results]
 
     results_by_email = [user_email.user for user_email in user_emails]
     return results_by_email
+
+def search_users(query, fields=DEFAULT_USER_SEARCH_FIELDS, num_results=DEFAULT_NUM_SEARCH_RESULTS):
+    """Searches for Users with the search index (see `htk.apps.accounts.utils.search_index`)
+
+    Every word of `query` must be a prefix of a word in one of `fields`, a sequence of `UserSearchTokenField`
+
+    NOTE: This function returns a list instead of a QuerySet
+
+    Returns a list of User objects, most relevant first, fetched in a single query
+    """
+    user_ids = search_user_ids(query, fields=fields, num_results=num_results)
+    users = get_users_by_id(user_ids, preserve_ordering=True) if user_ids else []
+    return users
@@ -0,0 +1,44 @@
+# Django Imports
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+# HTK Imports
+from htk.apps.accounts.models import UserEmail
+from htk.apps.accounts.utils.general import (
+    get_user_emails_by_id,
+    get_users_by_id,
+)
+
+
+class GetByIdTestCase(TestCase):
+    def setUp(self):
+        UserModel = get_user_model()
+        self.users = [
+            UserModel.objects.create(username='user%s' % i) for i in range(3)
+        ]
+        self.user_emails = [
+            UserEmail.objects.create(user=user, email='%s@example.com' % user.username)
+            for user in self.users
+        ]
+
+    def test_get_users_by_id_with_string_ids(self):
+        user_ids = [str(user.id) for user in reversed(self.users)]
+        self.assertEqual(list(reversed(self.users)), get_users_by_id(user_ids, use_cache=False))
+        self.assertEqual(list(reversed(self.users)), get_users_by_id(user_ids, strict=True, use_cache=False))
+
+    def test_get_users_by_id_strict(self):
+        missing_id = max(user.id for user in self.users) + 1
+        user_ids = [str(self.users[0].id), str(missing_id)]
+        self.assertEqual([self.users[0]], get_users_by_id(user_ids, use_cache=False))
+        self.assertIsNone(get_users_by_id(user_ids, strict=True, use_cache=False))
+
+    def test_get_user_emails_by_id_with_string_ids(self):
+        user_email_ids = [str(user_email.id) for user_email in self.user_emails]
+        self.assertEqual(self.user_emails, get_user_emails_by_id(user_email_ids))
+        self.assertEqual(self.user_emails, get_user_emails_by_id(user_email_ids, strict=True))
+
+    def test_get_user_emails_by_id_strict(self):
+        missing_id = max(user_email.id for user_email in self.user_emails) + 1
+        user_email_ids = [str(self.user_emails[0].id), str(missing_id)]
+        self.assertEqual([self.user_emails[0]], get_user_emails_by_id(user_email_ids))
+        self.assertIsNone(get_user_emails_by_id(user_email_ids, strict=True))
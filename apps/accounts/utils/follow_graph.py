@@ -0,0 +1,131 @@
+"""Follower/following graph, cached as sets of user ids
+
+Each user has two cached id sets: the users they follow, and the users following them.
+Sets are loaded from the database with one `values_list()` query on a cache miss, so membership and set operations (mutual follows, intersections) never query the database or instantiate User objects.
+
+Follow/unfollow invalidates the two affected sets once the transaction commits, rather than updating them in place:
+a read-modify-write of a cached set could write back a copy that misses a concurrent change.
+Sets are keyed by a per-user generation (`UserFollowGraphGeneration`), which the invalidation bumps instead of deleting the set,
+so that a set loaded from the database before the change committed is stored under the previous generation, which is no longer read.
+A set loaded from the database is only stored with `cache.add()`, so it never overwrites a set that was stored in the meantime.
+
+Use `hydrate_users()` to turn ids into User objects when they are actually needed.
+"""
+
+# Django Imports
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+# HTK Imports
+from htk.apps.accounts.cachekeys import (
+    UserFollowersIdsCache,
+    UserFollowGraphGeneration,
+    UserFollowingIdsCache,
+)
+from htk.apps.accounts.utils.general import (
+    get_user_profile_model,
+    get_users_by_id,
+)
+
+
+def _get_following_ids_from_db(user_id):
+    user_ids = (
+        get_user_model()
+        .objects.filter(followers__user_id=user_id)
+        .values_list('id', flat=True)
+    )
+    return frozenset(user_ids)
+
+
+def _get_followers_ids_from_db(user_id):
+    user_ids = (
+        get_user_profile_model()
+        .objects.filter(following__id=user_id)
+        .values_list('user_id', flat=True)
+    )
+    return frozenset(user_ids)
+
+
+def _get_generation_cache(cache_class, user_id):
+    c = UserFollowGraphGeneration(prekey=[user_id, cache_class.__name__])
+    return c
+
+
+def _get_ids(cache_class, loader, user_id):
+    # read before the database, so that a set loaded before a concurrent change commits gets the generation that the change bumps
+    generation = _get_generation_cache(cache_class, user_id).get_generation()
+    c = cache_class(prekey=[user_id, generation])
+    user_ids = c.get()
+    if user_ids is None:
+        user_ids = loader(user_id)
+        c.cache_add(user_ids)
+    return user_ids
+
+
+def get_following_ids(user_id):
+    """Returns the frozenset of ids of users that `user_id` follows"""
+    user_ids = _get_ids(
+        UserFollowingIdsCache, _get_following_ids_from_db, user_id
+    )
+    return user_ids
+
+
+def get_followers_ids(user_id):
+    """Returns the frozenset of ids of users following `user_id`"""
+    user_ids = _get_ids(
+        UserFollowersIdsCache, _get_followers_ids_from_db, user_id
+    )
+    return user_ids
+
+
+def is_following(follower_id, followee_id):
+    """Determines whether `follower_id` follows `followee_id`"""
+    value = followee_id in get_following_ids(follower_id)
+    return value
+
+
+def get_mutual_follow_ids(user_id):
+    """Returns the ids of users who both follow and are followed by `user_id`"""
+    user_ids = get_following_ids(user_id) & get_followers_ids(user_id)
+    return user_ids
+
+
+def get_common_following_ids(user_id, other_user_id):
+    """Returns the ids of users followed by both `user_id` and `other_user_id`"""
+    user_ids = get_following_ids(user_id) & get_following_ids(other_user_id)
+    return user_ids
+
+
+def get_common_followers_ids(user_id, other_user_id):
+    """Returns the ids of users following both `user_id` and `other_user_id`"""
+    user_ids = get_followers_ids(user_id) & get_followers_ids(other_user_id)
+    return user_ids
+
+
+def hydrate_users(user_ids):
+    """Fetches User objects for `user_ids` in a single query, ordered by id"""
+    users = get_users_by_id(sorted(user_ids), preserve_ordering=True)
+    return users
+
+
+##
+# invalidation
+
+
+def _invalidate_follow_graph(follower_id, followee_id):
+    def invalidate():
+        _get_generation_cache(UserFollowingIdsCache, follower_id).bump()
+        _get_generation_cache(UserFollowersIdsCache, followee_id).bump()
+
+    # only after the follow/unfollow is visible to the next cache miss
+    transaction.on_commit(invalidate)
+
+
+def record_follow(follower_id, followee_id):
+    """Invalidates the cached graph after `follower_id` follows `followee_id`"""
+    _invalidate_follow_graph(follower_id, followee_id)
+
+
+def record_unfollow(follower_id, followee_id):
+    """Invalidates the cached graph after `follower_id` unfollows `followee_id`"""
+    _invalidate_follow_graph(follower_id, followee_id)
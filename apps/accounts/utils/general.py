@@ -11,6 +11,7 @@ from django.contrib.auth import (
     authenticate,
     get_user_model,
 )
+from django.db import transaction
 from django.utils.http import (
     base36_to_int,
     int_to_base36,
@@ -427,43 +428,90 @@ def get_user_by_id(user_id):
     return user
 
 
-def get_users_by_id(user_ids, strict=False, preserve_ordering=False):
+def _get_user_queryset():
+    """Users, with their profiles when the profile model is configured"""
+    UserModel = get_user_model()
+    users_qs = UserModel.objects.all()
+    if htk_setting('HTK_USER_PROFILE_MODEL'):
+        users_qs = users_qs.select_related('profile')
+    return users_qs
+
+
+def get_users_by_id(
+    user_ids, strict=False, preserve_ordering=False, use_cache=None
+):
     """Gets a list of Users by user ids
     If `strict`, all user_ids must exist, or None is returned
     For non `strict`, returns a partial list of Users with matching ids
+
+    Users are returned in the order of `user_ids`, whether or not `preserve_ordering`
+
+    `user_ids` may also be strings, e.g. from request parameters
+
+    If `use_cache` (default: `HTK_ACCOUNTS_USER_CACHE_ENABLED`), Users are first looked up in the per-user cache with one multi-get,
+    so that resolving many ids costs one cache round-trip plus at most one query for the misses.
+    The cache holds whole User instances, including password hashes, so only enable it with a cache backend that is as trusted as the database
     """
-    UserModel = get_user_model()
-    from htk.utils.query import get_objects_by_id
+    from htk.apps.accounts.cachekeys import UserCache
 
-    users = get_objects_by_id(
-        UserModel, user_ids, strict=strict, preserve_ordering=preserve_ordering
-    )
+    if use_cache is None:
+        use_cache = htk_setting('HTK_ACCOUNTS_USER_CACHE_ENABLED')
+
+    # unique, in order, and of the pk type, so that they match the keys of `in_bulk()`
+    to_pk = get_user_model()._meta.pk.to_python
+    user_ids = list(dict.fromkeys(to_pk(user_id) for user_id in user_ids))
+
+    users_by_id = UserCache.get_many(user_ids) if use_cache and user_ids else {}
+
+    missing_user_ids = [
+        user_id for user_id in user_ids if user_id not in users_by_id
+    ]
+    if missing_user_ids:
+        fetched_users_by_id = _get_user_queryset().in_bulk(missing_user_ids)
+        users_by_id.update(fetched_users_by_id)
+        if use_cache and fetched_users_by_id:
+            UserCache.store_many(fetched_users_by_id)
+
+    users = [
+        users_by_id[user_id] for user_id in user_ids if user_id in users_by_id
+    ]
+    if strict and len(users) < len(user_ids):
+        users = None
     return users
 
 
+def invalidate_user_cache(user_id):
+    """Invalidates the cached User with `user_id`, once the current transaction commits"""
+    from htk.apps.accounts.cachekeys import UserCache
+
+    c = UserCache(prekey=user_id)
+    transaction.on_commit(c.invalidate_cache)
+
+
 def get_user_emails_by_id(user_email_ids, strict=False):
-    """Gets a list of UserEmails by ids
+    """Gets a list of UserEmails by ids, with their Users, in a single query
     If `strict`, all user_email_ids must exist, or None is returned
     For non `strict`, returns a partial list of UserEmails with valid ids
     """
     from htk.apps.accounts.models import UserEmail
 
-    if strict:
-        try:
-            user_emails = [
-                UserEmail.objects.get(id=user_email_id)
-                for user_email_id in user_email_ids
-            ]
-        except UserEmail.DoesNotExist:
-            user_emails = None
+    # of the pk type, so that ids passed as strings match the keys of `in_bulk()`
+    to_pk = UserEmail._meta.pk.to_python
+    user_email_ids = [to_pk(user_email_id) for user_email_id in user_email_ids]
+    user_emails_by_id = UserEmail.objects.select_related('user').in_bulk(
+        user_email_ids
+    )
+    if strict and any(
+        user_email_id not in user_emails_by_id
+        for user_email_id in user_email_ids
+    ):
+        user_emails = None
     else:
-        user_emails = []
-        for user_email_id in user_email_ids:
-            try:
-                user_email = UserEmail.objects.get(id=user_email_id)
-                user_emails.append(user_email)
-            except UserEmail.DoesNotExist:
-                pass
+        user_emails = [
+            user_emails_by_id[user_email_id]
+            for user_email_id in user_email_ids
+            if user_email_id in user_emails_by_id
+        ]
     return user_emails
 
 
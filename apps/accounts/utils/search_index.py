@@ -0,0 +1,237 @@
+"""Search index of Users, as denormalized lowercase tokens
+
+Each User has one `UserSearchToken` row per word of their first and last names, plus their username (once set) and each confirmed email address.
+Queries are matched word by word against token prefixes, with index range scans, then ranked by relevance in Python.
+
+Enable `HTK_ACCOUNTS_SEARCH_INDEX_ENABLED` to keep the index up to date on saves, and run `rebuild_search_index()` once to backfill it.
+"""
+
+# Django Imports
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+
+# HTK Imports
+from htk.apps.accounts.constants.search import (
+    DEFAULT_NUM_SEARCH_RESULTS,
+    DEFAULT_USER_SEARCH_FIELDS,
+    USER_SEARCH_FIELD_WEIGHTS,
+    USER_SEARCH_MAX_QUERY_TERMS,
+    USER_SEARCH_TOKEN_MAX_LENGTH,
+)
+from htk.apps.accounts.enums import UserSearchTokenField
+from htk.apps.accounts.utils.general import get_user_profile_model
+from htk.utils import htk_setting
+from htk.utils.queryset_iterators import chunked_iterator
+
+
+def tokenize(value):
+    """Splits `value` into unique lowercase words, in order"""
+    tokens = []
+    for word in (value or '').lower().split():
+        token = word[:USER_SEARCH_TOKEN_MAX_LENGTH]
+        if token not in tokens:
+            tokens.append(token)
+    return tokens
+
+
+def _get_user_search_tokens(user, has_username_set, emails):
+    """Returns the set of `(field, token)` that `user` should be indexed with"""
+    tokens = set()
+    if has_username_set and user.username:
+        tokens.add(
+            (
+                UserSearchTokenField.USERNAME.value,
+                user.username.lower()[:USER_SEARCH_TOKEN_MAX_LENGTH],
+            )
+        )
+    for token in tokenize(user.first_name):
+        tokens.add((UserSearchTokenField.FIRST_NAME.value, token))
+    for token in tokenize(user.last_name):
+        tokens.add((UserSearchTokenField.LAST_NAME.value, token))
+    for email in emails:
+        tokens.add(
+            (
+                UserSearchTokenField.EMAIL.value,
+                email.lower()[:USER_SEARCH_TOKEN_MAX_LENGTH],
+            )
+        )
+    return tokens
+
+
+def index_users(users):
+    """Brings the search tokens of `users` up to date
+
+    Reads profiles, confirmed emails and existing tokens with one query each, then inserts and deletes only the tokens that changed
+    """
+    from htk.apps.accounts.models import (
+        UserEmail,
+        UserSearchToken,
+    )
+
+    users = list(users)
+    user_ids = [user.id for user in users]
+    if not user_ids:
+        return
+
+    has_username_set_by_user_id = dict(
+        get_user_profile_model()
+        .objects.filter(user_id__in=user_ids)
+        .values_list('user_id', 'has_username_set')
+    )
+
+    emails_by_user_id = {}
+    for user_id, email in UserEmail.objects.filter(
+        user_id__in=user_ids,
+        is_confirmed=True,
+    ).values_list('user_id', 'email'):
+        emails_by_user_id.setdefault(user_id, []).append(email)
+
+    existing_tokens = {}
+    for token_id, user_id, field, token in UserSearchToken.objects.filter(
+        user_id__in=user_ids
+    ).values_list('id', 'user_id', 'field', 'token'):
+        existing_tokens[(user_id, field, token)] = token_id
+
+    expected_tokens = set()
+    for user in users:
+        for field, token in _get_user_search_tokens(
+            user,
+            has_username_set_by_user_id.get(user.id, False),
+            emails_by_user_id.get(user.id, []),
+        ):
+            expected_tokens.add((user.id, field, token))
+
+    stale_token_ids = [
+        token_id
+        for key, token_id in existing_tokens.items()
+        if key not in expected_tokens
+    ]
+    if stale_token_ids:
+        UserSearchToken.objects.filter(id__in=stale_token_ids).delete()
+
+    new_tokens = [
+        UserSearchToken(user_id=user_id, field=field, token=token)
+        for (user_id, field, token) in expected_tokens
+        if (user_id, field, token) not in existing_tokens
+    ]
+    if new_tokens:
+        UserSearchToken.objects.bulk_create(new_tokens, ignore_conflicts=True)
+
+
+def index_user_by_id(user_id):
+    """Brings the search tokens of the User with `user_id` up to date, if it still exists"""
+    index_users(get_user_model().objects.filter(id=user_id))
+
+
+def schedule_index_user(user_id):
+    """Reindexes the User with `user_id` once the current transaction commits"""
+    transaction.on_commit(lambda: index_user_by_id(user_id))
+
+
+def rebuild_search_index(batch_size=1000):
+    """Indexes all Users, `batch_size` at a time"""
+    users = []
+    for user in chunked_iterator(get_user_model().objects.all(), size=batch_size):
+        users.append(user)
+        if len(users) >= batch_size:
+            index_users(users)
+            users = []
+    index_users(users)
+
+
+##
+# search
+
+
+def _get_prefix_upper_bound(prefix):
+    """Returns the smallest string greater than every string starting with `prefix`, or `None`"""
+    last_char = ord(prefix[-1])
+    if last_char < 0x10FFFF:
+        upper_bound = prefix[:-1] + chr(last_char + 1)
+    else:
+        upper_bound = None
+    return upper_bound
+
+
+def _get_term_match(term):
+    """Returns a `Q` matching the `UserSearchToken`s that start with `term`"""
+    # the range lets the database seek on the index; `startswith` keeps the match exact under any collation
+    match = Q(token__gte=term, token__startswith=term)
+    upper_bound = _get_prefix_upper_bound(term)
+    if upper_bound is not None:
+        match &= Q(token__lt=upper_bound)
+    return match
+
+
+def search_user_ids(
+    query,
+    fields=DEFAULT_USER_SEARCH_FIELDS,
+    num_results=DEFAULT_NUM_SEARCH_RESULTS,
+):
+    """Searches the index for Users matching every word of `query` as a prefix of one of their `fields`
+
+    Each word is matched with an index range scan on `UserSearchToken.token`.
+    Words are matched most selective first, each narrowed to the Users matched by the previous words,
+    so that a common prefix (e.g. the "j" of "j smith") only has to be looked up among the few Users matching the rest.
+    Only the most selective word is capped, at `HTK_ACCOUNTS_SEARCH_INDEX_MAX_CANDIDATES` tokens, which bounds the work for a query made only of very common prefixes.
+
+    Users are ranked by the sum over words of their best match, weighed by `USER_SEARCH_FIELD_WEIGHTS`,
+    and by how much of the token the word covers (a full match scores twice as much as a short prefix).
+
+    Returns a list of User ids, most relevant first
+    """
+    from htk.apps.accounts.models import UserSearchToken
+
+    terms = tokenize(query)[:USER_SEARCH_MAX_QUERY_TERMS]
+    field_values = [field.value for field in fields]
+    max_candidates = htk_setting('HTK_ACCOUNTS_SEARCH_INDEX_MAX_CANDIDATES')
+
+    tokens_qs_by_term = {
+        term: UserSearchToken.objects.filter(
+            _get_term_match(term), field__in=field_values
+        )
+        for term in terms
+    }
+    if len(terms) > 1:
+        # count at most one more than the cap, which is enough to tell which words are the most selective
+        num_matches_by_term = {
+            term: tokens_qs.order_by()[: max_candidates + 1].count()
+            for term, tokens_qs in tokens_qs_by_term.items()
+        }
+        terms = sorted(terms, key=lambda term: num_matches_by_term[term])
+
+    scores = None
+    for term in terms:
+        tokens_qs = tokens_qs_by_term[term].order_by('token')
+        if scores is None:
+            tokens_qs = tokens_qs[:max_candidates]
+        else:
+            tokens_qs = tokens_qs.filter(user_id__in=list(scores.keys()))
+
+        term_scores = {}
+        for user_id, field, token in tokens_qs.values_list(
+            'user_id', 'field', 'token'
+        ):
+            weight = USER_SEARCH_FIELD_WEIGHTS[UserSearchTokenField(field)]
+            score = weight * (1.0 + len(term) / len(token))
+            if score > term_scores.get(user_id, 0):
+                term_scores[user_id] = score
+
+        if scores is None:
+            scores = term_scores
+        else:
+            scores = {
+                user_id: scores[user_id] + score
+                for user_id, score in term_scores.items()
+            }
+
+        if not scores:
+            break
+
+    ranked = sorted((scores or {}).items(), key=lambda x: (-x[1], x[0]))
+    if num_results:
+        ranked = ranked[:num_results]
+
+    user_ids = [user_id for user_id, score in ranked]
+    return user_ids
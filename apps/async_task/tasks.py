@@ -0,0 +1,27 @@
+# Third Party (PyPI) Imports
+from celery import shared_task
+
+# HTK Imports
+from htk.utils.general import resolve_method_dynamically
+
+
+@shared_task
+def execute_batch_task_chunk(task_class_path, user_ids):
+    """Runs one chunk of a `htk.tasks.BaseTask` dispatched by `execute_batch(mode=BatchExecutionMode.CELERY)`
+
+    Returns the stats for the chunk
+    """
+    task_class = resolve_method_dynamically(task_class_path)
+    task = task_class()
+    stats = task.execute_chunk_by_ids(user_ids)
+    task.report_progress(
+        dict(
+            stats,
+            chunks=1,
+            failed_chunks=0,
+            throughput=stats['users'] / stats['duration'] if stats['duration'] else 0,
+        )
+    )
+    # Decimal is not JSON serializable
+    stats['duration'] = float(stats['duration'])
+    return stats
@@ -3,3 +3,6 @@ HTK_CONVERSATION_PARTICIPANT_MODEL = None
 HTK_CONVERSATION_MESSAGE_MODEL = None
 HTK_CONVERSATION_MESSAGE_REACTION_MODEL = None
 HTK_CONVERSATION_MESSAGE_MAX_LENGTH = 2048
+
+# rows compared per query by `htk.apps.conversations.utils.reconcile_conversations()`
+HTK_CONVERSATION_RECONCILE_BATCH_SIZE = 1000
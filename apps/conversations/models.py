@@ -2,15 +2,23 @@
 import emoji
 
 # Django Imports
-from django.db import models
+from django.db import (
+    models,
+    transaction,
+)
+from django.db.models import F
+from django.db.models.functions import Greatest
 
 # HTK Imports
 from htk.apps.conversations.fk_fields import (
     fk_conversation,
     fk_conversation_message,
 )
+from htk.apps.conversations.utils import get_participants_fingerprint
 from htk.models.fk_fields import fk_user
+from htk.models.utils import get_update_fields_excluding
 from htk.utils import htk_setting
+from htk.utils.query import get_latest_pk_subquery
 from htk.utils.text.unicode import (
     demojize,
     is_emoji_shortcode,
@@ -36,6 +44,21 @@ class BaseConversation(models.Model):
     created_by = fk_user(related_name='created_conversations', required=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # denormalized; maintained by participants and messages, repaired by `reconcile_conversations()`
+    num_participants = models.PositiveIntegerField(default=0)
+    num_messages = models.PositiveIntegerField(default=0)
+    last_message = fk_conversation_message(related_name='+', required=False)
+    # hash of the sorted participant user ids, see `get_participants_fingerprint()`
+    participants_fingerprint = models.CharField(
+        max_length=40, blank=True, default='', db_index=True
+    )
+
+    DENORMALIZED_FIELDS = (
+        'num_participants',
+        'num_messages',
+        'last_message',
+        'participants_fingerprint',
+    )
 
     class Meta:
         abstract = True
@@ -47,6 +70,14 @@ class BaseConversation(models.Model):
         )
         return value
 
+    def save(self, **kwargs):
+        """Saves this conversation, without overwriting the denormalized fields of an existing one"""
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = get_update_fields_excluding(
+                self, self.DENORMALIZED_FIELDS
+            )
+        super().save(**kwargs)
+
     @classmethod
     def find_all_by_user(cls, user):
         """Finds all conversations that a user is a participant in"""
@@ -58,69 +89,108 @@ class BaseConversation(models.Model):
         """Finds a conversation by participants
 
         This is useful for finding an existing conversation between a set of participants
-        """
 
+        Looks up the indexed `participants_fingerprint`, so this is a single equality query.
+        Conversations created before `participants_fingerprint` was added are only found once backfilled, see `backfill_participants_fingerprints()`
+        """
         participant_ids = set([participant.id for participant in participants])
-        num_participants = len(participant_ids)
-
-        conversation = (
-            cls.objects.annotate(
-                n_participants=models.Count('participants'),
-                n_user_matches=models.Count(
-                    'participants',
-                    filter=models.Q(participants__user_id__in=participant_ids),
-                ),
-            )
-            .filter(
-                n_participants=num_participants,
-                n_user_matches=num_participants,
-            )
-            .first()
-        )
+        if participant_ids:
+            fingerprint = get_participants_fingerprint(participant_ids)
+            conversation = cls.objects.filter(
+                participants_fingerprint=fingerprint
+            ).first()
+        else:
+            # conversations without participants all share the empty fingerprint
+            conversation = None
 
         return conversation
 
-    @property
-    def num_participants(self):
-        num = self.participants.count()
-        return num
+    def update_participant_stats(self, num_added=0, num_removed=0):
+        """Updates `num_participants` by `num_added` and `num_removed`, and recomputes `participants_fingerprint`
 
-    @property
-    def num_messages(self):
-        num = self.messages.count()
-        return num
+        Called whenever participants are added or removed.
+        The conversation row is locked while the participants are read, so that concurrent updates are serialized and the last one to write sees every participant
+        """
+        conversations_qs = type(self).objects.filter(pk=self.pk)
+        with transaction.atomic():
+            list(conversations_qs.select_for_update().values_list('pk'))
+            user_ids = self.participants.values_list('user_id', flat=True)
+            fingerprint = get_participants_fingerprint(user_ids)
+            conversations_qs.update(
+                num_participants=Greatest(
+                    F('num_participants') + num_added - num_removed, 0
+                ),
+                participants_fingerprint=fingerprint,
+            )
+        self.participants_fingerprint = fingerprint
 
     def add_participant(self, user):
         """Adds a participant to this conversation"""
         self.participants.get_or_create(user=user)
 
     def add_participants(self, users):
-        """Adds several participants to this conversation"""
-        for user in users:
-            self.add_participant(user)
+        """Adds several participants to this conversation
 
-    def remove_participant(self, user, return_deleted_id=True, id_field='id'):
-        """Removes a participant from this conversation"""
-        participant = self.participants.filter(user=user).first()
-        result = getattr(participant, id_field) if return_deleted_id else None
+        Users who are already participants are skipped. New participants are inserted with a single `bulk_create()`
+        """
+        users_by_id = {user.id: user for user in users}
+        existing_user_ids = set(
+            self.participants.filter(user_id__in=list(users_by_id)).values_list(
+                'user_id', flat=True
+            )
+        )
+        ConversationParticipant = self.participants.model
+        new_participants = [
+            ConversationParticipant(conversation=self, user=user)
+            for user_id, user in users_by_id.items()
+            if user_id not in existing_user_ids
+        ]
+        if new_participants:
+            ConversationParticipant.objects.bulk_create(new_participants)
+            self.update_participant_stats(num_added=len(new_participants))
 
-        participant.delete()
-        self.save()
+    def remove_participant(self, user, return_deleted_id=True, id_field='id'):
+        """Removes a participant from this conversation
 
+        Returns the `id_field` of the deleted participant, or `None` if `user` was not a participant
+        """
+        results = self.remove_participants(
+            [user],
+            return_deleted_ids=return_deleted_id,
+            id_field=id_field,
+        )
+        result = results[0] if results else None
         return result
 
     def remove_participants(
         self, users, return_deleted_ids=True, id_field='id'
     ):
-        """Removes several participants from this conversation"""
-        results = []
-        for user in users:
-            result = self.remove_participant(
-                return_deleted_id=return_deleted_ids,
-                id_field=id_field,
+        """Removes several participants from this conversation, with a single delete
+
+        Returns the `id_field` of each deleted participant, in the order of `users`
+        """
+        user_ids = [user.id for user in users]
+        participants_qs = self.participants.filter(user_id__in=user_ids)
+
+        if return_deleted_ids:
+            values_by_user_id = dict(
+                participants_qs.values_list('user_id', id_field)
             )
-            if return_deleted_ids:
-                results.append(result)
+            results = [
+                values_by_user_id[user_id]
+                for user_id in user_ids
+                if user_id in values_by_user_id
+            ]
+        else:
+            results = []
+
+        (num_deleted, num_deleted_by_model) = participants_qs.delete()
+        num_removed = num_deleted_by_model.get(
+            self.participants.model._meta.label, 0
+        )
+        if num_removed:
+            self.update_participant_stats(num_removed=num_removed)
+        self.save()
 
         return results
 
@@ -146,6 +216,26 @@ class BaseConversationParticipant(models.Model):
         )
         return value
 
+    def save(self, **kwargs):
+        """Saves this participant
+
+        Side effect: updates `Conversation.num_participants` and `Conversation.participants_fingerprint`
+        """
+        is_new = self._state.adding
+        super().save(**kwargs)
+        if is_new:
+            self.conversation.update_participant_stats(num_added=1)
+
+    def delete(self, **kwargs):
+        """Deletes this participant
+
+        Side effect: updates `Conversation.num_participants` and `Conversation.participants_fingerprint`
+        """
+        conversation = self.conversation
+        result = super().delete(**kwargs)
+        conversation.update_participant_stats(num_removed=1)
+        return result
+
 
 class BaseConversationMessage(models.Model):
     """A message in a conversation
@@ -229,12 +319,49 @@ class BaseConversationMessage(models.Model):
         """Saves this message.
 
         Side effect: also performs any customizations, like updating cache, etc
+        Updates `Conversation.num_messages` and `Conversation.last_message`
         """
+        is_new = self._state.adding
         super().save(**kwargs)
 
+        if is_new:
+            type(self.conversation).objects.filter(
+                pk=self.conversation_id
+            ).update(
+                num_messages=F('num_messages') + 1,
+                last_message=self,
+            )
+
         # force update on `Conversation.updated_at`
         self.conversation.save()
 
+    def delete(self, **kwargs):
+        """Deletes this message, along with its replies
+
+        This is a hard delete; see `deleted_at` for soft-deletion.
+
+        Side effect: updates `Conversation.num_messages` and `Conversation.last_message`
+        """
+        conversation_id = self.conversation_id
+        result = super().delete(**kwargs)
+        (num_deleted, num_deleted_by_model) = result
+
+        self._meta.get_field('conversation').related_model.objects.filter(
+            pk=conversation_id
+        ).update(
+            num_messages=Greatest(
+                F('num_messages')
+                - num_deleted_by_model.get(self._meta.label, 0),
+                0,
+            ),
+            last_message=get_latest_pk_subquery(
+                type(self).objects.all(),
+                'conversation',
+                ('-posted_at', '-pk'),
+            ),
+        )
+        return result
+
 
 class BaseConversationMessageReaction(models.Model):
     """An emoji reaction to a message in
@@ -0,0 +1,11 @@
+# HTK Imports
+from htk.apps.conversations.utils import reconcile_conversations
+from htk.decorators.celery_ import safe_timed_task
+
+
+# Configure in CELERY_BEAT_SCHEDULE
+#@periodic_task(run_every=crontab(minute='45', hour='3',))  # Once a day at 3:45 AM
+@safe_timed_task('Reconcile Conversation Counters')
+def reconcile_conversation_counters():
+    stats = reconcile_conversations()
+    return stats
@@ -0,0 +1,164 @@
+# Python Standard Library Imports
+import hashlib
+import time
+
+# HTK Imports
+from htk.utils import (
+    htk_setting,
+    resolve_model_dynamically,
+)
+from htk.utils.query import (
+    get_count_subquery,
+    get_latest_pk_subquery,
+    reconcile_denormalized_fields,
+)
+
+
+def get_participants_fingerprint(user_ids):
+    """Returns the canonical fingerprint of a set of participant `user_ids`
+
+    The SHA-1 of the sorted, unique ids, so that the same set of users always has the same fingerprint; an empty set has `''`
+    """
+    user_ids = sorted(set(user_ids))
+    if user_ids:
+        fingerprint = hashlib.sha1(
+            ','.join(str(user_id) for user_id in user_ids).encode()
+        ).hexdigest()
+    else:
+        fingerprint = ''
+    return fingerprint
+
+
+def reconcile_conversations(batch_size=None):
+    """Repairs the denormalized counters, last message pointer and participants fingerprint of every Conversation
+
+    Drift happens when participants or messages are written without `save()` or `delete()`, e.g. with `QuerySet.delete()` or a cascade from a deleted User
+
+    Returns a dict of stats, keyed by what was repaired
+    """
+    if batch_size is None:
+        batch_size = htk_setting('HTK_CONVERSATION_RECONCILE_BATCH_SIZE')
+
+    Conversation = resolve_model_dynamically(
+        htk_setting('HTK_CONVERSATION_MODEL')
+    )
+    ConversationParticipant = resolve_model_dynamically(
+        htk_setting('HTK_CONVERSATION_PARTICIPANT_MODEL')
+    )
+    ConversationMessage = resolve_model_dynamically(
+        htk_setting('HTK_CONVERSATION_MESSAGE_MODEL')
+    )
+
+    stats = {}
+    stats['counters'] = reconcile_denormalized_fields(
+        Conversation.objects.all(),
+        {
+            'num_participants': get_count_subquery(
+                ConversationParticipant.objects.all(), 'conversation'
+            ),
+            'num_messages': get_count_subquery(
+                ConversationMessage.objects.all(), 'conversation'
+            ),
+            'last_message_id': get_latest_pk_subquery(
+                ConversationMessage.objects.all(),
+                'conversation',
+                ('-posted_at', '-pk'),
+            ),
+        },
+        batch_size=batch_size,
+    )
+    stats['fingerprints'] = _reconcile_participants_fingerprints(
+        Conversation.objects.all(), ConversationParticipant, batch_size
+    )
+    return stats
+
+
+def backfill_participants_fingerprints(
+    Conversation=None, ConversationParticipant=None, batch_size=None
+):
+    """Computes `participants_fingerprint` for conversations that do not have one yet
+
+    Run this once after adding `participants_fingerprint`, e.g. from a data migration, passing the historical models:
+
+        def backfill(apps, schema_editor):
+            backfill_participants_fingerprints(
+                apps.get_model('conversations', 'Conversation'),
+                apps.get_model('conversations', 'ConversationParticipant'),
+            )
+
+    Until then, `find_by_participants()` does not find existing conversations
+
+    Returns a dict of stats
+    """
+    if batch_size is None:
+        batch_size = htk_setting('HTK_CONVERSATION_RECONCILE_BATCH_SIZE')
+    if Conversation is None:
+        Conversation = resolve_model_dynamically(
+            htk_setting('HTK_CONVERSATION_MODEL')
+        )
+    if ConversationParticipant is None:
+        ConversationParticipant = resolve_model_dynamically(
+            htk_setting('HTK_CONVERSATION_PARTICIPANT_MODEL')
+        )
+
+    stats = _reconcile_participants_fingerprints(
+        Conversation.objects.filter(participants_fingerprint=''),
+        ConversationParticipant,
+        batch_size,
+    )
+    return stats
+
+
+def _reconcile_participants_fingerprints(
+    conversations_qs, ConversationParticipant, batch_size
+):
+    """Recomputes `participants_fingerprint` for `batch_size` conversations of `conversations_qs` at a time, with two queries per batch"""
+    Conversation = conversations_qs.model
+    start = time.time()
+    total = 0
+    fixed = 0
+    last_pk = None
+    while True:
+        batch_qs = conversations_qs.order_by('pk')
+        if last_pk is not None:
+            batch_qs = batch_qs.filter(pk__gt=last_pk)
+        rows = list(
+            batch_qs.values_list('pk', 'participants_fingerprint')[
+                :batch_size
+            ]
+        )
+        if not rows:
+            break
+
+        user_ids_by_conversation_id = {}
+        for conversation_id, user_id in ConversationParticipant.objects.filter(
+            conversation_id__in=[pk for pk, _ in rows]
+        ).values_list('conversation_id', 'user_id'):
+            user_ids_by_conversation_id.setdefault(conversation_id, []).append(
+                user_id
+            )
+
+        mismatched = []
+        for pk, fingerprint in rows:
+            expected = get_participants_fingerprint(
+                user_ids_by_conversation_id.get(pk, [])
+            )
+            if fingerprint != expected:
+                mismatched.append(
+                    Conversation(pk=pk, participants_fingerprint=expected)
+                )
+        if mismatched:
+            Conversation.objects.bulk_update(
+                mismatched, ['participants_fingerprint']
+            )
+
+        total += len(rows)
+        fixed += len(mismatched)
+        last_pk = rows[-1][0]
+
+    stats = {
+        'total': total,
+        'fixed': fixed,
+        'duration': time.time() - start,
+    }
+    return stats
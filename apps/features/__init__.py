@@ -0,0 +1 @@
+default_app_config = 'htk.apps.features.apps.HtkFeaturesAppConfig'
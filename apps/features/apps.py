@@ -0,0 +1,34 @@
+# Django Imports
+from django.apps import AppConfig
+from django.db.models import signals
+
+# HTK Imports
+from htk.utils import htk_setting
+
+
+################################################################################
+# signals and signal handlers
+
+def feature_flag_changed(sender, instance, **kwargs):
+    """signal handler for FeatureFlag post-save and post-delete
+
+    Once committed, pushes the rebuilt feature flags map to the cache and bumps its version, so that every worker picks up the change within seconds.
+    `AbstractFeatureFlag.save()` and `delete()` do the same; this also covers `QuerySet.delete()`
+    """
+    from htk.apps.features.utils import schedule_refresh_feature_flags_cache
+    schedule_refresh_feature_flags_cache()
+
+
+class HtkFeaturesAppConfig(AppConfig):
+    name = 'htk.apps.features'
+    verbose_name = 'Features'
+
+    def ready(self):
+        if htk_setting('HTK_FEATURE_FLAG_MODEL'):
+            from htk.apps.features.utils import get_feature_flag_model
+            FeatureFlag = get_feature_flag_model()
+
+            ##
+            # signals
+            signals.post_save.connect(feature_flag_changed, sender=FeatureFlag)
+            signals.post_delete.connect(feature_flag_changed, sender=FeatureFlag)
@@ -1,11 +1,18 @@
 # HTK Imports
 from htk.cache import CustomCacheScheme
+from htk.constants import TIMEOUT_1_MINUTE
 from htk.constants import TIMEOUT_15_MINUTES
 
 
 class FeatureFlagCache(CustomCacheScheme):
     """Cache management object for Feature Flags
+
+    Read many times per request, so it is also held in the local in-process tier.
+    Changes are pushed by `refresh_feature_flags_cache()`, which bumps the local tier version, so local copies can be kept longer
     """
+    LOCAL_CACHE_ENABLED = True
+    LOCAL_CACHE_DURATION = TIMEOUT_1_MINUTE
+
     def get_cache_duration(self):
         duration = TIMEOUT_15_MINUTES
         return duration
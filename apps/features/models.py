@@ -1,5 +1,8 @@
 # Django Imports
-from django.db import models
+from django.db import (
+    models,
+    transaction,
+)
 
 # HTK Imports
 from htk.models.classes import HtkBaseModel
@@ -34,10 +37,20 @@ class AbstractFeatureFlag(HtkBaseModel):
         return value
 
     def save(self, *args, **kwargs):
-        super(AbstractFeatureFlag, self).save(*args, **kwargs)
-        from htk.apps.features.utils import clear_cache
+        from htk.apps.features.utils import schedule_refresh_feature_flags_cache
 
-        clear_cache()
+        # one transaction, so that this and the post_save handler of `HtkFeaturesAppConfig` refresh only once
+        with transaction.atomic():
+            super(AbstractFeatureFlag, self).save(*args, **kwargs)
+            schedule_refresh_feature_flags_cache()
+
+    def delete(self, *args, **kwargs):
+        from htk.apps.features.utils import schedule_refresh_feature_flags_cache
+
+        with transaction.atomic():
+            value = super(AbstractFeatureFlag, self).delete(*args, **kwargs)
+            schedule_refresh_feature_flags_cache()
+        return value
 
     @property
     def is_enabled(self):
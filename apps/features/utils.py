@@ -1,6 +1,20 @@
+# Python Standard Library Imports
+import threading
+
+# Django Imports
+from django.db import transaction
+
 # HTK Imports
+from htk.cache.local import bump_cache_generation
 from htk.utils import htk_setting
 from htk.utils import resolve_model_dynamically
+from htk.utils.request import get_current_request
+
+
+REQUEST_FEATURE_FLAGS_ATTR = '_htk_feature_flags_map'
+
+# per thread: whether a feature flag changed since the feature flags map was last refreshed
+_refresh_state = threading.local()
 
 
 def get_feature_flag_model():
@@ -19,28 +33,73 @@ def clear_cache():
     c.invalidate_cache()
 
 
+def refresh_feature_flags_cache():
+    """Rebuilds the feature flags map, stores it in the cache, and bumps its version
+
+    Workers compare their process-local copy against the version at most once per `HTK_CACHE_LOCAL_CACHE_GENERATION_CHECK_INTERVAL` seconds, and then re-read the pushed map from the cache instead of rebuilding it from the db
+    """
+    c = _get_cache()
+    # also overwrites the stale copy, so that `get_feature_flags_map()` never falls back to the previous map
+    feature_flags_map = c.recompute(_build_feature_flags_map)
+    bump_cache_generation(c.get_local_cache_name())
+    return feature_flags_map
+
+
+def _refresh_feature_flags_cache_if_stale():
+    if getattr(_refresh_state, 'is_stale', False):
+        _refresh_state.is_stale = False
+        refresh_feature_flags_cache()
+
+
+def schedule_refresh_feature_flags_cache():
+    """Refreshes the feature flags cache once the current transaction commits
+
+    Changes to several flags in one transaction are coalesced into a single refresh, and a transaction that is rolled back does not refresh at all
+    """
+    _refresh_state.is_stale = True
+    # runs right away outside of a transaction
+    transaction.on_commit(_refresh_feature_flags_cache_if_stale)
+
+
+def _build_feature_flags_map():
+    FeatureFlag = get_feature_flag_model()
+
+    feature_flags_map = {
+        feature_flag.name: True
+        for feature_flag
+        in FeatureFlag.objects.all()
+        if feature_flag.is_enabled
+    }
+    return feature_flags_map
+
+
 def get_feature_flags_map():
+    """Returns the map of enabled feature flags
+
+    Only one process rebuilds the map when it expires; the others keep serving the previous map meanwhile
+    """
     c = _get_cache()
+    feature_flags_map = c.get_or_compute(_build_feature_flags_map)
+    return feature_flags_map
 
-    feature_flags_map = c.get()
-    if feature_flags_map is None:
-        FeatureFlag = get_feature_flag_model()
 
-        feature_flags_map = {
-            feature_flag.name: True
-            for feature_flag
-            in FeatureFlag.objects.all()
-            if feature_flag.is_enabled
-        }
+def get_feature_flags_snapshot():
+    """Returns the feature flags map, resolved at most once per request
 
-        c.cache_store(feature_flags_map)
+    Outside of a request, same as `get_feature_flags_map()`
+    """
+    request = get_current_request()
+    if request is None:
+        feature_flags_map = get_feature_flags_map()
     else:
-        pass
-
+        feature_flags_map = getattr(request, REQUEST_FEATURE_FLAGS_ATTR, None)
+        if feature_flags_map is None:
+            feature_flags_map = get_feature_flags_map()
+            setattr(request, REQUEST_FEATURE_FLAGS_ATTR, feature_flags_map)
     return feature_flags_map
 
 
 def is_feature_enabled(feature_name):
-    feature_flags_map = get_feature_flags_map()
+    feature_flags_map = get_feature_flags_snapshot()
     is_enabled = feature_flags_map.get(feature_name, False) is True
     return is_enabled
@@ -3,3 +3,6 @@ HTK_FORUM_THREAD_MODEL = None
 HTK_FORUM_MESSAGE_MODEL = None
 HTK_FORUM_TAG_MODEL = None
 FORUM_SNIPPET_LENGTH = 100
+
+# rows compared per query by `htk.apps.forums.utils.reconcile_forums()`
+HTK_FORUM_RECONCILE_BATCH_SIZE = 1000
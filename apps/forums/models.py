@@ -1,15 +1,20 @@
 # Django Imports
 from django.conf import settings
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Greatest
 
 # HTK Imports
 from htk.apps.forums.constants.defaults import *
 from htk.apps.forums.fk_fields import (
     fk_forum,
+    fk_forum_message,
     fk_forum_thread,
 )
 from htk.models.fk_fields import fk_user
+from htk.models.utils import get_update_fields_excluding
 from htk.utils import htk_setting
+from htk.utils.query import get_latest_pk_subquery
 
 
 class Forum(models.Model):
@@ -19,6 +24,16 @@ class Forum(models.Model):
     description = models.CharField(max_length=256, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # denormalized; maintained by ForumThread and ForumMessage, repaired by `reconcile_forums()`
+    num_threads = models.PositiveIntegerField(default=0)
+    num_messages = models.PositiveIntegerField(default=0)
+    last_thread = fk_forum_thread(related_name='+', required=False)
+
+    DENORMALIZED_FIELDS = (
+        'num_threads',
+        'num_messages',
+        'last_thread',
+    )
 
     class Meta:
         # app_label = 'htk'
@@ -28,22 +43,20 @@ class Forum(models.Model):
         value = '%s' % (self.name,)
         return value
 
+    def save(self, **kwargs):
+        """Saves this forum, without overwriting the denormalized fields of an existing one"""
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = get_update_fields_excluding(
+                self, self.DENORMALIZED_FIELDS
+            )
+        super(Forum, self).save(**kwargs)
+
     @property
     def recent_thread(self):
         """Retrieves the most recent ForumThread"""
-        thread = self.threads.order_by('-updated').first()
+        thread = self.last_thread
         return thread
 
-    @property
-    def num_threads(self) -> int:
-        num = self.threads.count()
-        return num
-
-    @property
-    def num_messages(self) -> int:
-        total = sum(thread.num_messages for thread in self.threads.all())
-        return total
-
 
 class ForumThread(models.Model):
     forum = fk_forum(related_name='threads', required=True)
@@ -57,6 +70,14 @@ class ForumThread(models.Model):
     tags = models.ManyToManyField(
         htk_setting('HTK_FORUM_TAG_MODEL'), blank=True
     )
+    # denormalized; maintained by ForumMessage, repaired by `reconcile_forums()`
+    num_messages = models.PositiveIntegerField(default=0)
+    last_message = fk_forum_message(related_name='+', required=False)
+
+    DENORMALIZED_FIELDS = (
+        'num_messages',
+        'last_message',
+    )
 
     class Meta:
         # app_label = 'htk'
@@ -70,17 +91,60 @@ class ForumThread(models.Model):
         )
         return value
 
-    @property
-    def num_messages(self):
-        num = self.messages.count()
-        return num
+    def save(self, **kwargs):
+        """Saves this thread, without overwriting the denormalized fields of an existing one
+
+        Side effect: updates `Forum.num_threads` and `Forum.last_thread`
+        """
+        is_new = self._state.adding
+        if not is_new and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = get_update_fields_excluding(
+                self, self.DENORMALIZED_FIELDS
+            )
+        super(ForumThread, self).save(**kwargs)
+
+        forum_updates = {
+            # `updated` was just set, so this is now the most recent thread
+            'last_thread': self,
+        }
+        if is_new:
+            forum_updates['num_threads'] = F('num_threads') + 1
+        self._meta.get_field('forum').related_model.objects.filter(
+            pk=self.forum_id
+        ).update(**forum_updates)
+
+    def delete(self, **kwargs):
+        """Deletes this thread, along with its messages
+
+        Side effect: updates `Forum.num_threads`, `Forum.num_messages` and `Forum.last_thread`
+        """
+        ForumModel = self._meta.get_field('forum').related_model
+        ForumMessageModel = self.messages.model
+        forum_id = self.forum_id
+
+        result = super(ForumThread, self).delete(**kwargs)
+        (num_deleted, num_deleted_by_model) = result
+
+        ForumModel.objects.filter(pk=forum_id).update(
+            num_threads=Greatest(
+                F('num_threads') - num_deleted_by_model.get(self._meta.label, 0),
+                0,
+            ),
+            num_messages=Greatest(
+                F('num_messages')
+                - num_deleted_by_model.get(ForumMessageModel._meta.label, 0),
+                0,
+            ),
+            last_thread=get_latest_pk_subquery(
+                type(self).objects.all(), 'forum', ('-updated', '-pk')
+            ),
+        )
+        return result
 
     @property
     def recent_message(self):
-        """Retrieves the most recent message in ForumThread
-        Requires all ForumThreads to have at least one message
-        """
-        message = self.messages.order_by('-timestamp').first()
+        """Retrieves the most recent message in ForumThread"""
+        message = self.last_message
         return message
 
 
@@ -123,10 +187,47 @@ class ForumMessage(models.Model):
         return snippet
 
     def save(self, **kwargs):
-        """Any customizations,  like updating cache, etc"""
+        """Any customizations,  like updating cache, etc
+
+        Side effect: updates `ForumThread.num_messages`, `ForumThread.last_message` and `Forum.num_messages`
+        """
+        is_new = self._state.adding
         super(ForumMessage, self).save(**kwargs)
+        thread = self.thread
+        if is_new:
+            type(thread).objects.filter(pk=thread.pk).update(
+                num_messages=F('num_messages') + 1,
+                last_message=self,
+            )
+            thread._meta.get_field('forum').related_model.objects.filter(
+                pk=thread.forum_id
+            ).update(num_messages=F('num_messages') + 1)
         # force update on `ForumThread.updated_at`
-        self.thread.save()
+        thread.save()
+
+    def delete(self, **kwargs):
+        """Deletes this message, along with its replies
+
+        Side effect: updates `ForumThread.num_messages`, `ForumThread.last_message` and `Forum.num_messages`
+        """
+        thread = self.thread
+
+        result = super(ForumMessage, self).delete(**kwargs)
+        (num_deleted, num_deleted_by_model) = result
+        num_deleted_messages = num_deleted_by_model.get(self._meta.label, 0)
+
+        type(thread).objects.filter(pk=thread.pk).update(
+            num_messages=Greatest(F('num_messages') - num_deleted_messages, 0),
+            last_message=get_latest_pk_subquery(
+                type(self).objects.all(), 'thread', ('-posted_at', '-pk')
+            ),
+        )
+        thread._meta.get_field('forum').related_model.objects.filter(
+            pk=thread.forum_id
+        ).update(
+            num_messages=Greatest(F('num_messages') - num_deleted_messages, 0)
+        )
+        return result
 
 
 class ForumTag(models.Model):
@@ -0,0 +1,11 @@
+# HTK Imports
+from htk.apps.forums.utils import reconcile_forums
+from htk.decorators.celery_ import safe_timed_task
+
+
+# Configure in CELERY_BEAT_SCHEDULE
+#@periodic_task(run_every=crontab(minute='30', hour='3',))  # Once a day at 3:30 AM
+@safe_timed_task('Reconcile Forum Counters')
+def reconcile_forum_counters():
+    stats = reconcile_forums()
+    return stats
@@ -5,7 +5,21 @@ when you run "manage.py test".
 Replace this with more appropriate tests for your application.
 """
 
+# Python Standard Library Imports
+import unittest
+
+# Django Imports
+from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+# HTK Imports
+from htk.utils import (
+    htk_setting,
+    resolve_model_dynamically,
+)
+
 
 class SimpleTest(TestCase):
     def test_basic_addition(self):
@@ -13,3 +27,134 @@ class SimpleTest(TestCase):
         Tests that 1 + 1 always equals 2.
         """
         self.assertEqual(1 + 1, 2)
+
+
+FORUM_MODEL_SETTINGS = (
+    'HTK_FORUM_MODEL',
+    'HTK_FORUM_THREAD_MODEL',
+    'HTK_FORUM_MESSAGE_MODEL',
+)
+
+
+# the forum models are abstract, so this only runs in a project that configures concrete ones
+@unittest.skipUnless(
+    all(htk_setting(setting) for setting in FORUM_MODEL_SETTINGS),
+    'Forum models are not configured',
+)
+class ForumCountersTestCase(TestCase):
+    NUM_FORUMS = 5
+    NUM_THREADS_PER_FORUM = 4
+    NUM_MESSAGES_PER_THREAD = 3
+
+    def setUp(self):
+        self.Forum = resolve_model_dynamically(htk_setting('HTK_FORUM_MODEL'))
+        self.ForumThread = resolve_model_dynamically(
+            htk_setting('HTK_FORUM_THREAD_MODEL')
+        )
+        self.ForumMessage = resolve_model_dynamically(
+            htk_setting('HTK_FORUM_MESSAGE_MODEL')
+        )
+        self.user = get_user_model().objects.create(username='forum_author')
+        for i in range(self.NUM_FORUMS):
+            forum = self.Forum.objects.create(name='Forum %s' % i)
+            for j in range(self.NUM_THREADS_PER_FORUM):
+                thread = self.ForumThread.objects.create(
+                    forum=forum, author=self.user, subject='Thread %s' % j
+                )
+                for k in range(self.NUM_MESSAGES_PER_THREAD):
+                    self.ForumMessage.objects.create(
+                        thread=thread, author=self.user, text='Message %s' % k
+                    )
+
+    def _render_listing(self, forums_qs):
+        """Reads what a forum listing page displays"""
+        rows = [
+            (
+                forum.name,
+                forum.num_threads,
+                forum.num_messages,
+                forum.recent_thread and forum.recent_thread.subject,
+            )
+            for forum in forums_qs
+        ]
+        return rows
+
+    def _render_listing_by_counting(self):
+        """Reads the same values as `_render_listing()`, computed with queries per forum and thread"""
+        rows = [
+            (
+                forum.name,
+                forum.threads.count(),
+                sum(thread.messages.count() for thread in forum.threads.all()),
+                getattr(forum.threads.order_by('-updated').first(), 'subject', None),
+            )
+            for forum in self.Forum.objects.order_by('pk')
+        ]
+        return rows
+
+    def test_counters(self):
+        for forum in self.Forum.objects.all():
+            self.assertEqual(self.NUM_THREADS_PER_FORUM, forum.num_threads)
+            self.assertEqual(
+                self.NUM_THREADS_PER_FORUM * self.NUM_MESSAGES_PER_THREAD,
+                forum.num_messages,
+            )
+        for thread in self.ForumThread.objects.all():
+            self.assertEqual(self.NUM_MESSAGES_PER_THREAD, thread.num_messages)
+            self.assertEqual(
+                thread.messages.order_by('-posted_at', '-pk').first(),
+                thread.recent_message,
+            )
+
+        thread = self.ForumThread.objects.first()
+        thread.recent_message.delete()
+        thread.refresh_from_db()
+        self.assertEqual(self.NUM_MESSAGES_PER_THREAD - 1, thread.num_messages)
+        self.assertEqual(
+            thread.messages.order_by('-posted_at', '-pk').first(),
+            thread.recent_message,
+        )
+
+        forum = thread.forum
+        thread.delete()
+        forum.refresh_from_db()
+        self.assertEqual(self.NUM_THREADS_PER_FORUM - 1, forum.num_threads)
+        self.assertEqual(
+            (self.NUM_THREADS_PER_FORUM - 1) * self.NUM_MESSAGES_PER_THREAD,
+            forum.num_messages,
+        )
+
+    def test_reconcile(self):
+        from htk.apps.forums.utils import reconcile_forums
+
+        expected = self._render_listing_by_counting()
+        self.Forum.objects.update(num_threads=0, num_messages=0, last_thread=None)
+        self.ForumThread.objects.update(num_messages=0, last_message=None)
+
+        stats = reconcile_forums(batch_size=2)
+        self.assertEqual(self.NUM_FORUMS, stats['forums']['fixed'])
+        self.assertEqual(
+            self.NUM_FORUMS * self.NUM_THREADS_PER_FORUM,
+            stats['threads']['fixed'],
+        )
+        self.assertEqual(
+            expected,
+            self._render_listing(self.Forum.objects.order_by('pk')),
+        )
+
+        stats = reconcile_forums()
+        self.assertEqual(0, stats['forums']['fixed'])
+
+    def test_listing_query_count(self):
+        """Benchmarks the queries needed to list all forums with their counters and most recent thread"""
+        with CaptureQueriesContext(connection) as counted_queries:
+            expected = self._render_listing_by_counting()
+
+        with CaptureQueriesContext(connection) as listing_queries:
+            rows = self._render_listing(
+                self.Forum.objects.select_related('last_thread').order_by('pk')
+            )
+
+        self.assertEqual(expected, rows)
+        self.assertEqual(1, len(listing_queries))
+        self.assertGreater(len(counted_queries), len(listing_queries))
@@ -0,0 +1,59 @@
+# HTK Imports
+from htk.utils import (
+    htk_setting,
+    resolve_model_dynamically,
+)
+from htk.utils.query import (
+    get_count_subquery,
+    get_latest_pk_subquery,
+    reconcile_denormalized_fields,
+)
+
+
+def reconcile_forums(batch_size=None):
+    """Repairs the denormalized counters and last-activity pointers of every ForumThread and Forum
+
+    Drift happens when messages or threads are written without `save()` or `delete()`, e.g. with `QuerySet.delete()` or a cascade from a deleted User
+
+    Returns a dict of stats, keyed by model
+    """
+    if batch_size is None:
+        batch_size = htk_setting('HTK_FORUM_RECONCILE_BATCH_SIZE')
+
+    Forum = resolve_model_dynamically(htk_setting('HTK_FORUM_MODEL'))
+    ForumThread = resolve_model_dynamically(
+        htk_setting('HTK_FORUM_THREAD_MODEL')
+    )
+    ForumMessage = resolve_model_dynamically(
+        htk_setting('HTK_FORUM_MESSAGE_MODEL')
+    )
+
+    stats = {}
+    stats['threads'] = reconcile_denormalized_fields(
+        ForumThread.objects.all(),
+        {
+            'num_messages': get_count_subquery(
+                ForumMessage.objects.all(), 'thread'
+            ),
+            'last_message_id': get_latest_pk_subquery(
+                ForumMessage.objects.all(), 'thread', ('-posted_at', '-pk')
+            ),
+        },
+        batch_size=batch_size,
+    )
+    stats['forums'] = reconcile_denormalized_fields(
+        Forum.objects.all(),
+        {
+            'num_threads': get_count_subquery(
+                ForumThread.objects.all(), 'forum'
+            ),
+            'num_messages': get_count_subquery(
+                ForumMessage.objects.all(), 'thread__forum'
+            ),
+            'last_thread_id': get_latest_pk_subquery(
+                ForumThread.objects.all(), 'forum', ('-updated', '-pk')
+            ),
+        },
+        batch_size=batch_size,
+    )
+    return stats
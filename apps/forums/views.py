@@ -18,7 +18,7 @@ from htk.view_helpers import render_custom as _r
 def index(request):
     data = wrap_data_forum(request)
     site = data['site']
-    forums = site.forums.all()
+    forums = site.forums.select_related('last_thread')
     data['forums'] = forums
     response = _r(request, 'forum/index.html', data)
     return response
@@ -32,7 +32,9 @@ def forum(request, fid):
     data['forum'] = forum
     thread_creation_form = ThreadCreationForm()
     data['thread_creation_form'] = thread_creation_form
-    data['threads'] = forum.threads.order_by('sticky', '-updated')
+    data['threads'] = forum.threads.select_related('last_message').order_by(
+        'sticky', '-updated'
+    )
     response = _r(request, 'forum/forum.html', data)
     return response
 
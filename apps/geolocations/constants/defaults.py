@@ -1 +1,6 @@
 HTK_GEOLOCATIONS_MAPBOX_MIN_RELEVANCE_THRESHOLD = 1
+
+# number of characters of the geohash stored on `AbstractGeolocation`; 9 characters is a cell of about 5m x 5m
+HTK_GEOLOCATIONS_GEOHASH_PRECISION = 9
+# maximum number of geohash prefix lookups made by `AbstractGeolocation.find_near_latlng()`
+HTK_GEOLOCATIONS_GEOHASH_MAX_CELLS = 16
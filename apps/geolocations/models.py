@@ -1,28 +1,78 @@
 # Python Standard Library Imports
+import operator
+from functools import reduce
 
 # Django Imports
 from django.db import models
+from django.db.models import Q
 from django.utils.safestring import mark_safe
 
 # HTK Imports
 from htk.apps.geolocations.constants.general import *
 from htk.apps.geolocations.enums import DistanceUnit
 from htk.apps.geolocations.utils import (
+    convert_distance_to_meters,
     convert_meters,
+    geohash_encode,
     get_bounding_box,
+    get_geohash_cells_for_bounding_box,
     get_latlng,
     haversine,
 )
 from htk.models.classes import HtkBaseModel
+from htk.utils.queryset_iterators import chunked_iterator
 
 
 class AbstractGeolocation(HtkBaseModel):
     latitude = models.FloatField(null=True, blank=True)
     longitude = models.FloatField(null=True, blank=True)
+    # maintained on save from `latitude` and `longitude`; see `find_near_latlng()`
+    geohash = models.CharField(max_length=12, null=True, blank=True, db_index=True)
 
     class Meta:
         abstract = True
 
+    def save(self, *args, **kwargs):
+        geohash = self.compute_geohash()
+        if geohash != self.geohash:
+            self.geohash = geohash
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and (
+                'latitude' in update_fields or 'longitude' in update_fields
+            ):
+                kwargs['update_fields'] = list(update_fields) + ['geohash']
+        super(AbstractGeolocation, self).save(*args, **kwargs)
+
+    def compute_geohash(self):
+        if self.has_latlng():
+            geohash = geohash_encode(self.latitude, self.longitude)
+        else:
+            geohash = None
+        return geohash
+
+    @classmethod
+    def backfill_geohashes(cls, batch_size=1000):
+        """Populates `geohash` on existing rows which have a latitude and longitude but no (or an out of date) geohash
+
+        Rows without a geohash are not found by `find_near_latlng()`, so run this once after adding the column
+        """
+        qs = cls.objects.filter(latitude__isnull=False, longitude__isnull=False)
+        num_updated = 0
+        to_update = []
+        for obj in chunked_iterator(qs, size=batch_size):
+            geohash = obj.compute_geohash()
+            if geohash != obj.geohash:
+                obj.geohash = geohash
+                to_update.append(obj)
+            if len(to_update) >= batch_size:
+                cls.objects.bulk_update(to_update, ['geohash'])
+                num_updated += len(to_update)
+                to_update = []
+        if to_update:
+            cls.objects.bulk_update(to_update, ['geohash'])
+            num_updated += len(to_update)
+        return num_updated
+
     def get_address_string(self):
         """This function needs to be overwritten by the concrete class
 
@@ -162,32 +212,64 @@ class AbstractGeolocation(HtkBaseModel):
         `offset` use for pagination
         `limit` return a limited number of records
 
-        Naive Algorithm:
-        - Calculate a distance matrix for every object and pairing
+        Algorithm:
+        - Figure out the bounding box of the search radius, and the geohash grid cells covering it
+        - Find candidate objects with indexed geohash prefix lookups on those cells
+          Objects without a geohash (saved before it was added, see `backfill_geohashes()`) are matched by the bounding box alone
+        - Refine the candidates by their exact (haversine) distance, rank them nearest first, and paginate
+        - Fetch the objects on the page with `in_bulk()`
 
-        Optimized Algorithm:
-        - Split up into zones and grids
-        - Figure out the bounding box or search radius given the distance from this AbstractGeolocation
-        - Find objects within that zone
+        Returns a list ordered by distance, with each object's `search_distance` set in `distance_unit`
         """
+        bounding_box = get_bounding_box(
+            latitude, longitude, distance=distance, distance_unit=distance_unit
+        )
         (
             latitude_min,
             latitude_max,
             longitude_min,
             longitude_max,
-        ) = get_bounding_box(
-            latitude, longitude, distance=distance, distance_unit=distance_unit
-        )
-        nearby_objects = cls.objects.filter(
+        ) = bounding_box
+        cells = get_geohash_cells_for_bounding_box(*bounding_box)
+        candidates = cls.objects.filter(
+            reduce(
+                operator.or_,
+                [Q(geohash__startswith=cell) for cell in cells]
+                + [Q(geohash__isnull=True)],
+            ),
             latitude__gte=latitude_min,
             latitude__lte=latitude_max,
-            longitude__gte=longitude_min,
-            longitude__lte=longitude_max,
         )
+        if -180.0 <= longitude_min and longitude_max <= 180.0:
+            # box does not wrap around the antimeridian
+            candidates = candidates.filter(
+                longitude__gte=longitude_min,
+                longitude__lte=longitude_max,
+            )
         if extra_filters is not None:
-            nearby_objects = nearby_objects.filter(**extra_filters)
+            candidates = candidates.filter(**extra_filters)
+
+        distance_meters = convert_distance_to_meters(distance, distance_unit)
+        distances = []
+        for pk, lat, lng in candidates.values_list(
+            'pk', 'latitude', 'longitude'
+        ).iterator():
+            candidate_distance = haversine(latitude, longitude, lat, lng)
+            if candidate_distance <= distance_meters:
+                distances.append((candidate_distance, pk))
+        distances.sort()
         if limit > 0:
-            nearby_objects = nearby_objects[offset:limit]
+            distances = distances[offset:limit]
+
+        objects_by_pk = cls.objects.in_bulk([pk for _, pk in distances])
+        nearby_objects = []
+        for candidate_distance, pk in distances:
+            obj = objects_by_pk.get(pk)
+            if obj is not None:
+                obj.search_distance = convert_meters(
+                    candidate_distance, distance_unit
+                )
+                nearby_objects.append(obj)
         return nearby_objects
 
     @classmethod
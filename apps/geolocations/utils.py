@@ -55,18 +55,7 @@ def get_latlng(location_name, refresh=False, providers=None):
     c = GeocodeCache(prekey=prekey)
     latlng = c.get()
     if latlng is None or refresh:
-        if provider == 'mapbox':
-            min_relevance_threshold = htk_setting(
-                'HTK_GEOLOCATIONS_MAPBOX_MIN_RELEVANCE_THRESHOLD'
-            )
-            latlng = get_latlng_mapbox(
-                location_name, min_relevance_threshold=min_relevance_threshold
-            )
-        elif provider == 'google':
-            latlng = get_latlng_google(location_name)
-        else:
-            # no provider
-            latlng = (None, None)
+        latlng = _geocode(location_name, provider)
 
         if latlng is None:
             # an exception occurred; possibly hit API limit or other error
@@ -76,6 +65,65 @@ def get_latlng(location_name, refresh=False, providers=None):
     return latlng
 
 
+def get_latlngs(location_names, refresh=False, providers=None):
+    """Geocodes many `location_names` and caches the results
+
+    Cached results are retrieved in a single cache round-trip; only the misses are geocoded (one provider request each) and then stored in a single cache round-trip
+
+    Returns a dict of `{location_name: latlng}`
+    """
+    if providers is None:
+        providers = [
+            'mapbox',
+            'google',
+        ]
+
+    prekeys = {
+        location_name: seo_tokenize(location_name)
+        for location_name in location_names
+    }
+    if refresh:
+        cached = {}
+    else:
+        cached = GeocodeCache.get_many(prekeys.values())
+
+    latlngs = {}
+    to_store = {}
+    provider = None
+    for location_name, prekey in prekeys.items():
+        latlng = cached.get(prekey)
+        if latlng is None:
+            if provider is None:
+                provider = get_geocode_provider(providers)
+            latlng = _geocode(location_name, provider)
+            if latlng is None:
+                # an exception occurred; possibly hit API limit or other error
+                latlng = (None, None)
+            else:
+                to_store[prekey] = latlng
+        latlngs[location_name] = latlng
+
+    GeocodeCache.store_many(to_store)
+    return latlngs
+
+
+def _geocode(location_name, provider):
+    """Geocodes `location_name` with `provider`, bypassing the cache"""
+    if provider == 'mapbox':
+        min_relevance_threshold = htk_setting(
+            'HTK_GEOLOCATIONS_MAPBOX_MIN_RELEVANCE_THRESHOLD'
+        )
+        latlng = get_latlng_mapbox(
+            location_name, min_relevance_threshold=min_relevance_threshold
+        )
+    elif provider == 'google':
+        latlng = get_latlng_google(location_name)
+    else:
+        # no provider
+        latlng = (None, None)
+    return latlng
+
+
 def WGS84EarthRadius(lat):
     """Earth radius in meters at a given latitude, according to the WGS-84 ellipsoid [m]
 
@@ -203,3 +251,114 @@ def haversine(lat1, lon1, lat2, lon2):
     radius = WGS84EarthRadius(avg_lat)
     meters = arclength * radius
     return meters
+
+
+##
+# Geohash
+#
+# References:
+# - https://en.wikipedia.org/wiki/Geohash
+# - http://geohash.org/
+
+
+GEOHASH_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def _normalize_longitude(longitude):
+    if -180.0 <= longitude <= 180.0:
+        normalized = longitude
+    else:
+        normalized = ((longitude + 180.0) % 360.0) - 180.0
+    return normalized
+
+
+def geohash_encode(latitude, longitude, precision=None):
+    """Encodes the point at `latitude`, `longitude` as a geohash string of `precision` characters
+
+    Points which share a geohash prefix fall in the same grid cell, so an indexed geohash column turns a proximity search into a handful of prefix (range) lookups
+    """
+    if precision is None:
+        precision = htk_setting('HTK_GEOLOCATIONS_GEOHASH_PRECISION')
+
+    latitude = max(-90.0, min(90.0, latitude))
+    longitude = _normalize_longitude(longitude)
+
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    num_bits = 0
+    is_longitude_bit = True
+    while len(chars) < precision:
+        (value, value_range) = (
+            (longitude, lng_range) if is_longitude_bit else (latitude, lat_range)
+        )
+        mid = (value_range[0] + value_range[1]) / 2.0
+        if value >= mid:
+            bits = (bits << 1) | 1
+            value_range[0] = mid
+        else:
+            bits = bits << 1
+            value_range[1] = mid
+        is_longitude_bit = not is_longitude_bit
+        num_bits += 1
+        if num_bits == 5:
+            chars.append(GEOHASH_BASE32[bits])
+            bits = 0
+            num_bits = 0
+    geohash = ''.join(chars)
+    return geohash
+
+
+def get_geohash_cell_size(precision):
+    """Returns the `(height, width)` in degrees of a geohash cell of `precision` characters"""
+    num_bits = 5 * precision
+    lng_bits = (num_bits + 1) // 2
+    lat_bits = num_bits // 2
+    cell_size = (
+        180.0 / (2**lat_bits),
+        360.0 / (2**lng_bits),
+    )
+    return cell_size
+
+
+def get_geohash_cells_for_bounding_box(
+    latitude_min, latitude_max, longitude_min, longitude_max, max_cells=None
+):
+    """Returns the geohash prefixes of the grid cells covering a bounding box
+
+    Picks the finest precision (up to `HTK_GEOLOCATIONS_GEOHASH_PRECISION`) for which at most `max_cells` cells cover the box, so that few prefix lookups are needed while each one matches as few rows outside the box as possible
+    """
+    if max_cells is None:
+        max_cells = htk_setting('HTK_GEOLOCATIONS_GEOHASH_MAX_CELLS')
+
+    max_precision = htk_setting('HTK_GEOLOCATIONS_GEOHASH_PRECISION')
+
+    latitude_min = max(-90.0, latitude_min)
+    latitude_max = min(90.0, latitude_max)
+    if longitude_max - longitude_min >= 360.0:
+        (longitude_min, longitude_max) = (-180.0, 180.0)
+
+    precision = 1
+    for candidate_precision in range(max_precision, 0, -1):
+        (height, width) = get_geohash_cell_size(candidate_precision)
+        num_cells = (
+            (math.floor(latitude_max / height) - math.floor(latitude_min / height) + 1)
+            * (math.floor(longitude_max / width) - math.floor(longitude_min / width) + 1)
+        )
+        if num_cells <= max_cells:
+            precision = candidate_precision
+            break
+
+    (height, width) = get_geohash_cell_size(precision)
+    cells = set()
+    # step from the center of the cell containing the min corner, one cell at a time
+    lat = (math.floor(latitude_min / height) + 0.5) * height
+    while lat - height / 2.0 <= latitude_max:
+        lng = (math.floor(longitude_min / width) + 0.5) * width
+        while lng - width / 2.0 <= longitude_max:
+            cells.add(geohash_encode(lat, lng, precision=precision))
+            lng += width
+        lat += height
+    cells = sorted(cells)
+    return cells
@@ -5,5 +5,20 @@ HTK_LOCALIZABLE_STRING_LANGUAGE_CODES = [
     'en-US',
 ]
 
+# serve `lookup_localization()` and `lookup_many()` from compiled in-process catalogs
+# only takes effect with a cache backend shared by all processes, which carries the catalog version
+HTK_LOCALIZATION_CATALOG_ENABLED = False
+# how often, in seconds, each process checks whether the catalogs have changed
+HTK_LOCALIZATION_CATALOG_VERSION_CHECK_INTERVAL = 5
+
+# rows per query and per bulk write in `load_strings()` and `dump_strings()`
+HTK_LOCALIZATION_BATCH_SIZE = 1000
+
 # See: `htk.apps.i18n.dataclasses.LocalizationUsageCheck`
 HTK_ADMINTOOLS_LOCALIZATION_USAGE_CHECKS = []
+
+# processes used by instrumentation scans; `None` uses one per CPU
+HTK_LOCALIZATION_USAGE_SCAN_MAX_WORKERS = 1
+HTK_LOCALIZATION_USAGE_SCAN_MIN_FILES_PER_WORKER = 50
+# how long, in seconds, `is_instrumented()` reuses the last scan
+HTK_LOCALIZATION_USAGE_SCAN_RECHECK_INTERVAL = 60
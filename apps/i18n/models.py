@@ -1,10 +1,10 @@
-# Python Standard Library Imports
-import subprocess
-
 # Django Imports
 from django.db import models
 
 # HTK Imports
+from htk.apps.i18n.utils.catalog import (
+    schedule_invalidate_localization_catalog,
+)
 from htk.apps.i18n.utils.choices import get_language_code_choices
 from htk.models import HtkBaseModel
 from htk.utils import (
@@ -32,6 +32,17 @@ class AbstractLocalizableString(HtkBaseModel):
         value = self.key
         return value
 
+    def save(self, **kwargs):
+        """Saves, then drops the local catalogs, and bumps the localization catalog version once committed"""
+        super().save(**kwargs)
+        schedule_invalidate_localization_catalog()
+
+    def delete(self, **kwargs):
+        """Deletes, then drops the local catalogs, and bumps the localization catalog version once committed"""
+        value = super().delete(**kwargs)
+        schedule_invalidate_localization_catalog()
+        return value
+
     def json_encode(self, include_key=True):
         value = {}
         if include_key:
@@ -54,15 +65,9 @@ class AbstractLocalizableString(HtkBaseModel):
         return value
 
     def key_without_namespaces(self, namespaces=None):
-        if namespaces is None:
-            key = self.key
-        else:
-            key = self.key
-            for namespace in namespaces:
-                if key.startswith(f'{namespace}.'):
-                    key = key.removeprefix(f'{namespace}.')
-                    break
+        from htk.apps.i18n.utils.general import strip_key_namespaces
 
+        key = strip_key_namespaces(self.key, namespaces=namespaces)
         return key
 
     def add_translation(self, language_code, value, update=False):
@@ -89,7 +94,8 @@ class AbstractLocalizableString(HtkBaseModel):
     def is_instrumented(self):
         """Determines whether this localizable string is actually instrumented in the codebase.
 
-        Checks against `HTK_ADMINTOOLS_LOCALIZATION_USAGE_CHECKS`
+        Checks against `HTK_ADMINTOOLS_LOCALIZATION_USAGE_CHECKS`, scanning for all keys at once (see `htk.apps.i18n.utils.instrumentation`).
+        To check many strings, use `get_instrumented_keys()` instead
 
         This helps to determine if there are any orphaned translations.
 
@@ -97,27 +103,9 @@ class AbstractLocalizableString(HtkBaseModel):
         - `True` if it is instrumented
         - `False` if no instrumentations in the codebase are detected
         """
-        is_instrumented = False  # guilty until proven innocent
+        from htk.apps.i18n.utils.instrumentation import is_key_instrumented
 
-        l10n_usage_checks = htk_setting(
-            'HTK_ADMINTOOLS_LOCALIZATION_USAGE_CHECKS'
-        )
-        for l10n_usage_check in l10n_usage_checks:
-            result = subprocess.run(
-                [
-                    'grep',
-                    '-R',  # recursive
-                    self.key_without_namespaces(
-                        namespaces=l10n_usage_check.namespaces
-                    ),
-                    l10n_usage_check.directory,
-                ],
-                capture_output=True,
-            )
-
-            is_instrumented = len(result.stdout) > 0
-            if is_instrumented:
-                break
+        is_instrumented = is_key_instrumented(self.key)
 
         return is_instrumented
 
@@ -172,6 +160,17 @@ class AbstractLocalizedString(HtkBaseModel):
         value = '{} - {}'.format(self.key, self.language_code)
         return value
 
+    def save(self, **kwargs):
+        """Saves, then drops the local catalogs, and bumps the localization catalog version once committed"""
+        super().save(**kwargs)
+        schedule_invalidate_localization_catalog()
+
+    def delete(self, **kwargs):
+        """Deletes, then drops the local catalogs, and bumps the localization catalog version once committed"""
+        value = super().delete(**kwargs)
+        schedule_invalidate_localization_catalog()
+        return value
+
     @property
     def key(self):
         return self.localizable_string.key
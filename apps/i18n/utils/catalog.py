@@ -0,0 +1,136 @@
+"""Compiled, versioned localization catalogs
+
+Each worker process compiles the translations of a locale into a flat `{key: value}` dict with a single query, the first time the locale is looked up,
+and serves every lookup from it until the catalog version changes.
+
+The version is a shared cache generation, bumped after any `LocalizableString` or `LocalizedString` is saved or deleted,
+and re-read by each process at most once per `HTK_LOCALIZATION_CATALOG_VERSION_CHECK_INTERVAL` seconds.
+Catalogs are therefore only used with a cache backend shared by all processes; with `DummyCache` or `LocMemCache`, lookups query the database instead.
+
+A save or delete also drops the catalogs of the current process right away,
+and until its transaction commits, the thread that made it bypasses the catalogs, so that it reads its own changes and never keeps a catalog compiled from changes that are rolled back.
+"""
+
+# Python Standard Library Imports
+import threading
+
+# Django Imports
+from django.db import transaction
+
+# HTK Imports
+from htk.cache.local import (
+    bump_cache_generation,
+    get_cache_generation,
+)
+from htk.cache.utils import is_cache_shared
+from htk.utils import (
+    htk_setting,
+    resolve_model_dynamically,
+)
+
+
+LOCALIZATION_CATALOG_GENERATION_NAME = 'LocalizationCatalog'
+
+# {locale: (version, {key: value})}
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+# per thread: whether a change made in the current transaction is waiting to invalidate the catalogs
+_pending_invalidation = threading.local()
+
+
+def is_localization_catalog_enabled():
+    """Determines whether lookups are served from the compiled catalogs
+
+    Requires `HTK_LOCALIZATION_CATALOG_ENABLED`, and a cache backend shared by all processes to carry the catalog version
+    """
+    is_enabled = htk_setting('HTK_LOCALIZATION_CATALOG_ENABLED') and is_cache_shared()
+    return is_enabled
+
+
+def get_localization_catalog_version():
+    version = get_cache_generation(
+        LOCALIZATION_CATALOG_GENERATION_NAME,
+        htk_setting('HTK_LOCALIZATION_CATALOG_VERSION_CHECK_INTERVAL'),
+    )
+    return version
+
+
+def invalidate_localization_catalog():
+    """Bumps the catalog version, so that every process recompiles its catalogs
+
+    Call this after changing strings without `save()` or `delete()`, e.g. with `QuerySet.update()` or `bulk_create()`
+    """
+    clear_localization_catalogs()
+    version = bump_cache_generation(LOCALIZATION_CATALOG_GENERATION_NAME)
+    return version
+
+
+def _invalidate_localization_catalog_on_commit():
+    _pending_invalidation.is_pending = False
+    invalidate_localization_catalog()
+
+
+def schedule_invalidate_localization_catalog():
+    """Drops the catalogs of this process now, and bumps the catalog version once the current transaction commits
+
+    Bumping any earlier would let another process recompile the previous translations under the new version
+    """
+    clear_localization_catalogs()
+    _pending_invalidation.is_pending = True
+    # runs right away outside of a transaction
+    transaction.on_commit(_invalidate_localization_catalog_on_commit)
+
+
+def _is_invalidation_pending():
+    is_pending = getattr(_pending_invalidation, 'is_pending', False)
+    if is_pending and not transaction.get_connection().in_atomic_block:
+        # the transaction was rolled back, so there is nothing to invalidate
+        _pending_invalidation.is_pending = False
+        is_pending = False
+    return is_pending
+
+
+def compile_localization_catalog(locale):
+    """Returns a `{key: value}` dict of all translations for `locale`, read with a single query"""
+    LocalizedString = resolve_model_dynamically(
+        htk_setting('HTK_LOCALIZED_STRING_MODEL')
+    )
+    catalog = dict(
+        LocalizedString.objects.filter(language_code=locale).values_list(
+            'localizable_string__key', 'value'
+        )
+    )
+    return catalog
+
+
+def get_localization_catalog(locale):
+    """Returns the compiled catalog for `locale`, recompiling it if the catalog version has changed
+
+    Returns `None` when the catalog cannot be trusted: the catalog version is unavailable, or this thread has uncommitted changes to the strings.
+    Callers then look up the database directly.
+
+    The returned dict is shared; callers must not mutate it
+    """
+    version = get_localization_catalog_version()
+    if version is None or _is_invalidation_pending():
+        catalog = None
+    else:
+        (catalog_version, catalog) = _catalogs.get(locale, (None, None))
+        if catalog is None or catalog_version != version:
+            with _catalogs_lock:
+                # another thread may have compiled it while this one waited
+                (catalog_version, catalog) = _catalogs.get(locale, (None, None))
+                if catalog is None or catalog_version != version:
+                    catalog = compile_localization_catalog(locale)
+                    _catalogs[locale] = (version, catalog)
+    return catalog
+
+
+def clear_localization_catalogs():
+    """Discards the catalogs compiled by this process
+
+    Does not affect other processes
+    """
+    with _catalogs_lock:
+        _catalogs.clear()
@@ -1,14 +1,18 @@
 # Python Standard Library Imports
 import json
-import operator
 import os
-from functools import (
-    lru_cache,
-    reduce,
-)
+from functools import lru_cache
+
+# Django Imports
+from django.db import transaction
 
 # HTK Imports
+from htk.apps.i18n.utils.catalog import (
+    schedule_invalidate_localization_catalog,
+)
+from htk.apps.i18n.utils.general import strip_key_namespaces
 from htk.utils import (
+    chunks,
     htk_setting,
     resolve_model_dynamically,
 )
@@ -77,67 +81,145 @@ def retrieve_all_strings(
     }
 
     """
+    data = dict(
+        iter_all_strings(
+            by_language=by_language,
+            language_codes=language_codes,
+            namespaces=namespaces,
+        )
+    )
+    return data
+
+
+def iter_all_strings(
+    by_language=False, language_codes=None, namespaces=None
+):
+    """Generates the `(key, translations)` items of `retrieve_all_strings()`, in order
+
+    Rows are read as plain values in chunks, with one query in total when `by_language` is `False`, or one per language otherwise,
+    so that all strings never need to be held in memory at once
+    """
+    batch_size = htk_setting('HTK_LOCALIZATION_BATCH_SIZE')
+
     if by_language:
         if language_codes is None:
             language_codes = look_up_supported_languages()
 
+        namespaces = namespaces or []
+        stripped_namespaces = [
+            namespace for namespace in namespaces if namespace != 'common'
+        ]
+
         LocalizedString = resolve_model_dynamically(
             htk_setting('HTK_LOCALIZED_STRING_MODEL')
         )
 
-        data = {
-            language_code: {
-                localized_string.key_without_namespaces(
-                    namespaces=[
-                        namespace
-                        for namespace in namespaces
-                        if namespace != 'common'
-                    ]
-                ): localized_string.value
-                for localized_string in LocalizedString.objects.filter(
-                    language_code=language_code
-                ).order_by('localizable_string__key')
+        for language_code in language_codes:
+            rows = (
+                LocalizedString.objects.filter(language_code=language_code)
+                .order_by('localizable_string__key')
+                .values_list('localizable_string__key', 'value')
+                .iterator(chunk_size=batch_size)
+            )
+            translations = {
+                strip_key_namespaces(key, stripped_namespaces): value
+                for key, value in rows
                 if (
                     len(namespaces) == 0
-                    or reduce(
-                        operator.or_,
-                        (
-                            localized_string.key.startswith(f'{namespace}.')
-                            for namespace in namespaces
-                        ),
+                    or any(
+                        key.startswith(f'{namespace}.')
+                        for namespace in namespaces
                     )
                 )
             }
-            for language_code in language_codes
-        }
+            yield (language_code, translations)
     else:
         LocalizableString = resolve_model_dynamically(
             htk_setting('HTK_LOCALIZABLE_STRING_MODEL')
         )
-        localizable_strings = LocalizableString.objects.order_by('key')
-        data = {
-            localizable_string.key: localizable_string.json_encode(
-                include_key=False
-            )['translations']
-            for localizable_string in localizable_strings
-        }
+        # left join, so that untranslated strings are included with a `None` language code
+        rows = (
+            LocalizableString.objects.order_by(
+                'key', 'translations__language_code'
+            )
+            .values_list(
+                'key', 'translations__language_code', 'translations__value'
+            )
+            .iterator(chunk_size=batch_size)
+        )
 
-    return data
+        current_key = None
+        translations = None
+        for key, language_code, value in rows:
+            if key != current_key:
+                if current_key is not None:
+                    yield (current_key, translations)
+                current_key = key
+                translations = {}
+            if language_code is not None:
+                translations[language_code] = value
+
+        if current_key is not None:
+            yield (current_key, translations)
+
+
+def _write_json_object(f, items, indent=None):
+    """Writes the `(key, value)` `items` to `f` as a JSON object, one at a time
+
+    The output is the same as `json.dumps(dict(items), indent=indent)`
+    """
+    if indent is None:
+        item_separator = ', '
+        opening = '{'
+        closing = '}'
+        prefix = ''
+    else:
+        item_separator = ',\n'
+        prefix = ' ' * indent
+        opening = '{\n'
+        closing = '\n}'
+
+    num_items = 0
+    for key, value in items:
+        if num_items == 0:
+            f.write(opening)
+        else:
+            f.write(item_separator)
+        encoded_value = json.dumps(value, indent=indent)
+        if indent is not None:
+            encoded_value = encoded_value.replace('\n', '\n' + prefix)
+        f.write(f'{prefix}{json.dumps(key)}: {encoded_value}')
+        num_items += 1
+
+    if num_items == 0:
+        f.write('{}')
+    else:
+        f.write(closing)
+
+    return num_items
 
 
 def dump_strings(file_path, indent=4, by_language=False, language_codes=None):
-    data = retrieve_all_strings(
-        by_language=False, language_codes=language_codes
-    )
+    """Exports all strings to a JSON file at `file_path`, in the format of `retrieve_all_strings()`
+
+    Strings are streamed into the file as they are read
 
+    Returns the number of top-level entries written
+    """
     dir_name = os.path.dirname(file_path)
-    os.makedirs(dir_name, exist_ok=True)
+    if dir_name:
+        os.makedirs(dir_name, exist_ok=True)
 
     with open(file_path, 'w') as f:
-        f.write(json.dumps(data, indent=indent))
+        num_strings = _write_json_object(
+            f,
+            iter_all_strings(
+                by_language=by_language, language_codes=language_codes
+            ),
+            indent=indent,
+        )
         f.write('\n')
 
-    num_strings = len(data)
     return num_strings
 
 
@@ -145,23 +227,91 @@ def load_strings(data, overwrite=False):
     """Load strings from `data` into `LocalizableString` and `LocalizedString`
 
     When `overwrite` is `True`, existing translations will be overwritten; otherwise only new translations will be added
+
+    Existing rows are read in batches of `HTK_LOCALIZATION_BATCH_SIZE` keys, and only the differences are written,
+    with `bulk_create()` and `bulk_update()`, in a single transaction.
+    The localization catalog is invalidated once the transaction commits.
     """
     LocalizableString = resolve_model_dynamically(
         htk_setting('HTK_LOCALIZABLE_STRING_MODEL')
     )
+    LocalizedString = resolve_model_dynamically(
+        htk_setting('HTK_LOCALIZED_STRING_MODEL')
+    )
+    batch_size = htk_setting('HTK_LOCALIZATION_BATCH_SIZE')
+
     num_strings = 0
     num_translations = 0
 
-    for key, translations in data.items():
-        (
-            localizable_string,
-            was_created,
-        ) = LocalizableString.objects.get_or_create(key=key)
-        num_strings += 1
-        for language_code, value in translations.items():
-            localized_string = localizable_string.add_translation(
-                language_code, value, update=overwrite
+    with transaction.atomic():
+        for keys in chunks(list(data.keys()), batch_size):
+            localizable_string_ids = dict(
+                LocalizableString.objects.filter(key__in=keys).values_list(
+                    'key', 'id'
+                )
             )
-            num_translations += 1
+
+            new_keys = [key for key in keys if key not in localizable_string_ids]
+            if new_keys:
+                LocalizableString.objects.bulk_create(
+                    [LocalizableString(key=key) for key in new_keys],
+                    batch_size=batch_size,
+                )
+                # re-read, since not every database returns ids from `bulk_create()`
+                localizable_string_ids.update(
+                    LocalizableString.objects.filter(
+                        key__in=new_keys
+                    ).values_list('key', 'id')
+                )
+
+            existing_translations = {
+                (localizable_string_id, language_code): (localized_string_id, value)
+                for (
+                    localized_string_id,
+                    localizable_string_id,
+                    language_code,
+                    value,
+                ) in LocalizedString.objects.filter(
+                    localizable_string_id__in=localizable_string_ids.values()
+                ).values_list(
+                    'id', 'localizable_string_id', 'language_code', 'value'
+                )
+            }
+
+            new_translations = []
+            updated_translations = []
+            for key in keys:
+                localizable_string_id = localizable_string_ids[key]
+                num_strings += 1
+                for language_code, value in data[key].items():
+                    num_translations += 1
+                    existing = existing_translations.get(
+                        (localizable_string_id, language_code)
+                    )
+                    if existing is None:
+                        new_translations.append(
+                            LocalizedString(
+                                localizable_string_id=localizable_string_id,
+                                language_code=language_code,
+                                value=value,
+                            )
+                        )
+                    elif overwrite and existing[1] != value:
+                        updated_translations.append(
+                            LocalizedString(id=existing[0], value=value)
+                        )
+                    else:
+                        pass
+
+            if new_translations:
+                LocalizedString.objects.bulk_create(
+                    new_translations, batch_size=batch_size
+                )
+            if updated_translations:
+                LocalizedString.objects.bulk_update(
+                    updated_translations, ['value'], batch_size=batch_size
+                )
+
+        schedule_invalidate_localization_catalog()
 
     return num_strings, num_translations
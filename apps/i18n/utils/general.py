@@ -1,25 +1,87 @@
 # HTK Imports
+from htk.apps.i18n.utils.catalog import (
+    get_localization_catalog,
+    is_localization_catalog_enabled,
+)
 from htk.utils import (
     htk_setting,
     resolve_model_dynamically,
 )
 
 
+def strip_key_namespaces(key, namespaces=None):
+    """Removes the first of `namespaces` that prefixes `key`, e.g. `'common.ok'` -> `'ok'`"""
+    for namespace in namespaces or []:
+        if key.startswith(f'{namespace}.'):
+            key = key.removeprefix(f'{namespace}.')
+            break
+    return key
+
+
+def get_missing_localization(key, locale):
+    """Returns the placeholder displayed for a `key` that has no translation for `locale`"""
+    value = f'???[{key}]-[{locale}]???'
+    return value
+
+
+def _get_localization_catalog(locale):
+    """Returns the compiled catalog for `locale`, or `None` if lookups should query the database"""
+    catalog = (
+        get_localization_catalog(locale)
+        if is_localization_catalog_enabled()
+        else None
+    )
+    return catalog
+
+
 def lookup_localization(key=None, locale='en-US'):
     """Looks up a `LocalizedString` key and
     returns the value associated with that key.
-    """
 
-    LocalizedString = resolve_model_dynamically(
-        htk_setting('HTK_LOCALIZED_STRING_MODEL')
-    )
-    try:
-        localized_string = LocalizedString.objects.get(
-            localizable_string__key=key,
-            language_code=locale,
-        ).value
+    Served from the compiled catalog for `locale` when enabled (see `is_localization_catalog_enabled()`), so that missing keys do not query the database either.
+    """
+    catalog = _get_localization_catalog(locale)
+    if catalog is not None:
+        localized_string = catalog.get(key)
+        if localized_string is None:
+            localized_string = get_missing_localization(key, locale)
+    else:
+        LocalizedString = resolve_model_dynamically(
+            htk_setting('HTK_LOCALIZED_STRING_MODEL')
+        )
+        try:
+            localized_string = LocalizedString.objects.get(
+                localizable_string__key=key,
+                language_code=locale,
+            ).value
 
-    except LocalizedString.DoesNotExist:
-        localized_string = f'???[{key}]-[{locale}]???'
+        except LocalizedString.DoesNotExist:
+            localized_string = get_missing_localization(key, locale)
 
     return localized_string
+
+
+def lookup_many(keys, locale='en-US'):
+    """Looks up many `LocalizedString` keys at once
+
+    Returns a dict of `{key: value}`, with the missing-key placeholder for keys that have no translation
+    """
+    catalog = _get_localization_catalog(locale)
+    if catalog is None:
+        LocalizedString = resolve_model_dynamically(
+            htk_setting('HTK_LOCALIZED_STRING_MODEL')
+        )
+        catalog = dict(
+            LocalizedString.objects.filter(
+                localizable_string__key__in=keys,
+                language_code=locale,
+            ).values_list('localizable_string__key', 'value')
+        )
+
+    values = {}
+    for key in keys:
+        value = catalog.get(key)
+        values[key] = (
+            value if value is not None else get_missing_localization(key, locale)
+        )
+    return values
@@ -0,0 +1,202 @@
+"""Scans the codebase for instrumented localization keys
+
+Each directory of `HTK_ADMINTOOLS_LOCALIZATION_USAGE_CHECKS` is walked once, and each file is read once and matched against all keys at the same time with an Aho-Corasick automaton,
+optionally across a process pool (`HTK_LOCALIZATION_USAGE_SCAN_MAX_WORKERS`) when there are enough files to scan.
+
+The keys found in each file are cached per process, until the file's mtime or size changes, or the set of keys changes.
+"""
+
+# Python Standard Library Imports
+import hashlib
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# HTK Imports
+from htk.apps.i18n.utils.general import strip_key_namespaces
+from htk.utils import (
+    htk_setting,
+    resolve_model_dynamically,
+)
+from htk.utils.text.algorithms import AhoCorasick
+
+
+# {path: (patterns_signature, mtime_ns, size, pattern_indexes)}
+_file_matches = {}
+
+# (checked_at, keys, instrumented_keys), from the last `is_key_instrumented()`
+_instrumented_keys_memo = (None, None, None)
+
+# the automaton of the current scan worker process
+_worker_automaton = None
+
+
+def _get_patterns_signature(patterns):
+    signature = hashlib.sha1('\n'.join(patterns).encode()).hexdigest()
+    return signature
+
+
+def _iter_files(directory):
+    """Generates `(path, stat)` for every regular file under `directory`"""
+    for dir_path, dir_names, file_names in os.walk(directory):
+        for file_name in file_names:
+            path = os.path.join(dir_path, file_name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            yield (path, stat)
+
+
+def _scan_file(automaton, path):
+    """Returns `(path, mtime_ns, size, pattern_indexes)`, or `None` if `path` cannot be read"""
+    try:
+        stat = os.stat(path)
+        with open(path, 'rb') as f:
+            content = f.read()
+    except OSError:
+        result = None
+    else:
+        result = (
+            path,
+            stat.st_mtime_ns,
+            stat.st_size,
+            frozenset(automaton.find_indexes(content)),
+        )
+    return result
+
+
+def _init_scan_worker(encoded_patterns):
+    global _worker_automaton
+    _worker_automaton = AhoCorasick(encoded_patterns)
+
+
+def _scan_files_in_worker(paths):
+    results = [_scan_file(_worker_automaton, path) for path in paths]
+    return results
+
+
+def _scan_files(paths, encoded_patterns, max_workers):
+    """Generates the `_scan_file()` results for `paths`, in a process pool if `max_workers` > 1 and there are enough files"""
+    min_files = htk_setting('HTK_LOCALIZATION_USAGE_SCAN_MIN_FILES_PER_WORKER')
+    if max_workers > 1 and len(paths) >= 2 * min_files:
+        num_workers = min(max_workers, len(paths) // min_files)
+        # a few batches per worker, so that a worker stuck on a large file does not hold up the rest
+        batch_size = max(1, math.ceil(len(paths) / (num_workers * 4)))
+        batches = [
+            paths[i : i + batch_size] for i in range(0, len(paths), batch_size)
+        ]
+        with ProcessPoolExecutor(
+            max_workers=num_workers,
+            initializer=_init_scan_worker,
+            initargs=(encoded_patterns,),
+        ) as executor:
+            for results in executor.map(_scan_files_in_worker, batches):
+                yield from results
+    else:
+        automaton = AhoCorasick(encoded_patterns)
+        for path in paths:
+            yield _scan_file(automaton, path)
+
+
+def scan_directory(directory, patterns, max_workers=None):
+    """Finds which of `patterns` occur as substrings of any file under `directory`
+
+    Files unchanged since they were last scanned for the same `patterns` are not read again
+
+    Returns a set of patterns
+    """
+    if max_workers is None:
+        max_workers = htk_setting('HTK_LOCALIZATION_USAGE_SCAN_MAX_WORKERS')
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+
+    patterns = sorted(set(patterns))
+    signature = _get_patterns_signature(patterns)
+
+    found_indexes = set()
+    paths_to_scan = []
+    for path, stat in _iter_files(directory):
+        cached = _file_matches.get(path)
+        if cached is not None and cached[:3] == (
+            signature,
+            stat.st_mtime_ns,
+            stat.st_size,
+        ):
+            found_indexes.update(cached[3])
+        else:
+            paths_to_scan.append(path)
+
+    if paths_to_scan:
+        encoded_patterns = [pattern.encode() for pattern in patterns]
+        for result in _scan_files(paths_to_scan, encoded_patterns, max_workers):
+            if result is not None:
+                (path, mtime_ns, size, pattern_indexes) = result
+                _file_matches[path] = (signature, mtime_ns, size, pattern_indexes)
+                found_indexes.update(pattern_indexes)
+
+    found_patterns = {patterns[index] for index in found_indexes}
+    return found_patterns
+
+
+def get_instrumented_keys(keys, usage_checks=None, max_workers=None):
+    """Finds which localization `keys` are instrumented in the codebase
+
+    Checks against `usage_checks` (default: `HTK_ADMINTOOLS_LOCALIZATION_USAGE_CHECKS`), scanning each directory once for all keys.
+    A key is instrumented if, without the namespaces of a check, it occurs anywhere in that check's directory.
+
+    Returns a set of keys
+    """
+    if usage_checks is None:
+        usage_checks = htk_setting('HTK_ADMINTOOLS_LOCALIZATION_USAGE_CHECKS')
+
+    keys = list(keys)
+    instrumented_keys = set()
+    for l10n_usage_check in usage_checks:
+        patterns_by_key = {
+            key: strip_key_namespaces(key, l10n_usage_check.namespaces)
+            for key in keys
+        }
+        found_patterns = scan_directory(
+            l10n_usage_check.directory,
+            patterns_by_key.values(),
+            max_workers=max_workers,
+        )
+        instrumented_keys.update(
+            key
+            for key, pattern in patterns_by_key.items()
+            if pattern in found_patterns
+        )
+
+    return instrumented_keys
+
+
+def is_key_instrumented(key):
+    """Determines whether `key` is instrumented in the codebase
+
+    Scans for all `LocalizableString` keys at once, and reuses the result for `HTK_LOCALIZATION_USAGE_SCAN_RECHECK_INTERVAL` seconds,
+    without querying the database again, as long as `key` was among the keys scanned.
+
+    To check many keys, e.g. for an orphaned translations report, prefer `get_instrumented_keys()`
+    """
+    global _instrumented_keys_memo
+
+    now = time.monotonic()
+    (checked_at, memo_keys, instrumented_keys) = _instrumented_keys_memo
+    if (
+        checked_at is None
+        or key not in memo_keys
+        or now - checked_at
+        >= htk_setting('HTK_LOCALIZATION_USAGE_SCAN_RECHECK_INTERVAL')
+    ):
+        LocalizableString = resolve_model_dynamically(
+            htk_setting('HTK_LOCALIZABLE_STRING_MODEL')
+        )
+        keys = set(LocalizableString.objects.values_list('key', flat=True))
+        keys.add(key)
+        instrumented_keys = get_instrumented_keys(keys)
+        _instrumented_keys_memo = (now, frozenset(keys), instrumented_keys)
+
+    is_instrumented = key in instrumented_keys
+    return is_instrumented
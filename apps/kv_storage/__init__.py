@@ -2,5 +2,8 @@
 from htk.apps.kv_storage.utils import kv_delete
 from htk.apps.kv_storage.utils import kv_get
 from htk.apps.kv_storage.utils import kv_get_cached
+from htk.apps.kv_storage.utils import kv_get_many
+from htk.apps.kv_storage.utils import kv_iter_prefix
 from htk.apps.kv_storage.utils import kv_list_keys
 from htk.apps.kv_storage.utils import kv_put
+from htk.apps.kv_storage.utils import kv_put_many
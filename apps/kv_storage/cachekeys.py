@@ -1,11 +1,43 @@
 # HTK Imports
+from htk.apps.kv_storage.constants import KVStorageCacheMissing
 from htk.cache import CustomCacheScheme
+from htk.cache.codecs import get_cache_codec
 from htk.constants import *
+from htk.utils import htk_setting
 
 
 class KVStorageCache(CustomCacheScheme):
     """Cache management object for key-value storage
+
+    Values are encoded with `HTK_KV_STORAGE_CACHE_CODEC`, if configured, except for the `KV_STORAGE_CACHE_MISSING` marker, which is stored as is
     """
     def get_cache_duration(self):
         duration = TIMEOUT_30_MINUTES
         return duration
+
+    @classmethod
+    def get_cache_codec(cls):
+        codec_class_path = htk_setting('HTK_KV_STORAGE_CACHE_CODEC')
+        if codec_class_path:
+            codec = get_cache_codec(
+                codec_class_path,
+                htk_setting('HTK_KV_STORAGE_CACHE_COMPRESSION_THRESHOLD')
+            )
+        else:
+            codec = None
+        return codec
+
+    @classmethod
+    def encode_cache_payload(cls, payload):
+        codec = cls.get_cache_codec()
+        if codec and not isinstance(payload, KVStorageCacheMissing):
+            value = codec.encode(payload)
+        else:
+            value = payload
+        return value
+
+    @classmethod
+    def decode_cache_payload(cls, value):
+        codec = cls.get_cache_codec()
+        payload = codec.decode(value) if codec else value
+        return payload
@@ -0,0 +1,2 @@
+# HTK Imports
+from htk.apps.kv_storage.constants.general import *
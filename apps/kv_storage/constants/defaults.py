@@ -0,0 +1,10 @@
+HTK_KV_STORAGE_MODELS = {}
+
+# cache duration in seconds for keys known not to exist; set to 0 to disable negative caching
+HTK_KV_STORAGE_NEGATIVE_CACHE_DURATION = 300
+
+# dotted path to a `htk.cache.codecs.BaseCacheCodec` subclass, e.g. 'htk.cache.codecs.JSONCacheCodec'
+# `None` stores values in the cache as-is (pickled by the cache backend)
+HTK_KV_STORAGE_CACHE_CODEC = None
+# encoded values at least this many bytes long are zlib-compressed
+HTK_KV_STORAGE_CACHE_COMPRESSION_THRESHOLD = 1024
@@ -0,0 +1,9 @@
+class KVStorageCacheMissing(object):
+    """Stored in the cache for keys known not to exist in key-value storage (negative caching)
+
+    Not a string, so that no stored value can be mistaken for it.
+    Each read from the cache unpickles a new instance, so check with `isinstance()` rather than `==`
+    """
+
+
+KV_STORAGE_CACHE_MISSING = KVStorageCacheMissing()
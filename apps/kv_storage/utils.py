@@ -1,7 +1,15 @@
+# Django Imports
+from django.db import connections
+
 # HTK Imports
+from htk.apps.kv_storage.constants import *
+from htk.utils import chunks
 from htk.utils import htk_setting
 
 
+DEFAULT_KV_BATCH_SIZE = 1000
+
+
 def get_kv_storage_model(namespace=None):
     """Gets the key-value storage model class
     """
@@ -16,12 +24,17 @@ def get_kv_storage_model(namespace=None):
     return KVStorageModel
 
 
-def _get_kv_cache(key, namespace=None):
-    from htk.apps.kv_storage.cachekeys import KVStorageCache
+def _get_kv_prekey(key, namespace=None):
     if namespace is None:
         prekey = key
     else:
         prekey = (namespace, key,)
+    return prekey
+
+
+def _get_kv_cache(key, namespace=None):
+    from htk.apps.kv_storage.cachekeys import KVStorageCache
+    prekey = _get_kv_prekey(key, namespace=namespace)
     c = KVStorageCache(prekey=prekey)
     return c
 
@@ -52,6 +65,31 @@ def kv_list_keys(namespace=None, prefix=None):
     return keys
 
 
+def kv_iter_prefix(prefix=None, namespace=None, keys_only=False, chunk_size=DEFAULT_KV_BATCH_SIZE):
+    """Streams key-value pairs whose key starts with `prefix`, ordered by key
+
+    Keyset-paginates over the unique `key` column, `chunk_size` rows per query, so memory use stays flat and no OFFSET scans are needed
+
+    Yields `(key, value)` tuples, or just keys if `keys_only` == True
+    """
+    KV = get_kv_storage_model(namespace=namespace)
+    if KV:
+        qs = KV.objects.order_by('key')
+        if prefix:
+            qs = qs.filter(key__startswith=prefix)
+        fields = ('key',) if keys_only else ('key', 'value',)
+
+        last_key = None
+        while True:
+            chunk_qs = qs if last_key is None else qs.filter(key__gt=last_key)
+            rows = list(chunk_qs.values_list(*fields)[:chunk_size])
+            for row in rows:
+                yield row[0] if keys_only else row
+            if len(rows) < chunk_size:
+                break
+            last_key = rows[-1][0]
+
+
 def kv_put(key, value, namespace=None, overwrite=False):
     """PUTs a key-value pair for `key` and `value`
 
@@ -83,23 +121,137 @@ def kv_put(key, value, namespace=None, overwrite=False):
     return kv_obj
 
 
+def kv_put_many(items, namespace=None, overwrite=False, batch_size=DEFAULT_KV_BATCH_SIZE):
+    """PUTs many key-value pairs from the dict `items`
+
+    Writes with `bulk_create`, `batch_size` rows per INSERT, then updates the cache in a single round-trip
+
+    `overwrite` == True : existing keys are updated in the same INSERT (upsert)
+    `overwrite` == False : raises IntegrityError if any key already exists
+    """
+    KV = get_kv_storage_model(namespace=namespace)
+    kv_objs = []
+    if KV and items:
+        kv_objs = [
+            KV(key=key, value=value)
+            for key, value
+            in items.items()
+        ]
+        if overwrite:
+            features = connections[KV.objects.db].features
+            bulk_create_kwargs = {
+                'update_conflicts': True,
+                'update_fields': ['value', 'timestamp',],
+            }
+            if features.supports_update_conflicts_with_target:
+                bulk_create_kwargs['unique_fields'] = ['key',]
+        else:
+            bulk_create_kwargs = {}
+        kv_objs = KV.objects.bulk_create(
+            kv_objs,
+            batch_size=batch_size,
+            **bulk_create_kwargs
+        )
+
+        # update the cache if values were successfully written
+        from htk.apps.kv_storage.cachekeys import KVStorageCache
+        KVStorageCache.store_many({
+            _get_kv_prekey(key, namespace=namespace): value
+            for key, value
+            in items.items()
+            if value is not None
+        })
+        # `None` values are not cached, but may still have a negative cache entry
+        KVStorageCache.invalidate_many([
+            _get_kv_prekey(key, namespace=namespace)
+            for key, value
+            in items.items()
+            if value is None
+        ])
+    return kv_objs
+
+
 def kv_get(key, namespace=None, cache_only=False, force_refetch=False):
     """GETs the value of `key` from key-value storage
 
     `cache_only` == True : skips lookup in db, returns the cached value or None
+
+    Keys that do not exist are negatively cached for `HTK_KV_STORAGE_NEGATIVE_CACHE_DURATION` seconds, so repeated lookups of absent keys do not hit the db
     """
     c = _get_kv_cache(key, namespace=namespace)
     if force_refetch:
         c.invalidate_cache()
     value = c.get()
-    if value is None and not cache_only:
+    if isinstance(value, KVStorageCacheMissing):
+        value = None
+    elif value is None and not cache_only:
         kv_obj = _get_kv_obj(key, namespace=namespace)
         if kv_obj:
             value = kv_obj.value
             c.cache_store(value)
+        else:
+            negative_cache_duration = htk_setting('HTK_KV_STORAGE_NEGATIVE_CACHE_DURATION')
+            if negative_cache_duration:
+                c.cache_store(KV_STORAGE_CACHE_MISSING, duration=negative_cache_duration)
     return value
 
 
+def kv_get_many(keys, namespace=None, cache_only=False):
+    """GETs the values of many `keys` from key-value storage
+
+    Looks up all of `keys` in a single cache round-trip, then fetches the misses with `key__in` db queries of up to `DEFAULT_KV_BATCH_SIZE` keys each and backfills the cache
+
+    `cache_only` == True : skips lookup in db
+
+    Returns a dict of `{key: value}` for keys that were found
+    """
+    from htk.apps.kv_storage.cachekeys import KVStorageCache
+    prekeys_keys = {
+        _get_kv_prekey(key, namespace=namespace): key
+        for key in keys
+    }
+    cached = KVStorageCache.get_many(prekeys_keys.keys())
+    values = {
+        prekeys_keys[prekey]: value
+        for prekey, value
+        in cached.items()
+        if not isinstance(value, KVStorageCacheMissing)
+    }
+
+    missing_keys = [
+        prekeys_keys[prekey]
+        for prekey in prekeys_keys.keys()
+        if KVStorageCache.get_hashable_prekey(prekey) not in cached
+    ]
+    if missing_keys and not cache_only:
+        KV = get_kv_storage_model(namespace=namespace)
+        if KV:
+            fetched = {}
+            for keys_chunk in chunks(missing_keys, DEFAULT_KV_BATCH_SIZE):
+                fetched.update(
+                    KV.objects.filter(key__in=keys_chunk).values_list('key', 'value')
+                )
+            values.update(fetched)
+            KVStorageCache.store_many({
+                _get_kv_prekey(key, namespace=namespace): value
+                for key, value
+                in fetched.items()
+                if value is not None
+            })
+
+            negative_cache_duration = htk_setting('HTK_KV_STORAGE_NEGATIVE_CACHE_DURATION')
+            if negative_cache_duration:
+                KVStorageCache.store_many(
+                    {
+                        _get_kv_prekey(key, namespace=namespace): KV_STORAGE_CACHE_MISSING
+                        for key in missing_keys
+                        if key not in fetched
+                    },
+                    duration=negative_cache_duration
+                )
+    return values
+
+
 def kv_get_cached(key, namespace=None):
     """GETs the cached value of `key`
     Returns None if not cached
@@ -1,7 +1,9 @@
 # HTK Imports
+from htk.apps.mp.coalescing import coalesce_mp_updates
 from htk.apps.mp.services import invalidate_for_instance
 from htk.apps.mp.services import invalidate_for_instances
 from htk.apps.mp.services import materialized_property
+from htk.apps.mp.services import store_mps_bulk
 from htk.apps.mp.services import test_mp
 from htk.apps.mp.services import to_field_name
 
@@ -11,6 +13,8 @@ __all__ = [
     to_field_name,
     invalidate_for_instance,
     invalidate_for_instances,
+    coalesce_mp_updates,
+    store_mps_bulk,
     test_mp,
 ]
 
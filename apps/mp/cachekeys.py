@@ -0,0 +1,13 @@
+# HTK Imports
+from htk.cache import CustomCacheScheme
+from htk.constants import *
+
+
+class MPVerificationStatsCache(CustomCacheScheme):
+    """Cache management object for the latest verification stats of one chunk of a Materialized Property
+
+    prekey = [<model name>, <mp name>, <chunk>,]
+    """
+    def get_cache_duration(self):
+        duration = TIMEOUT_7_DAYS
+        return duration
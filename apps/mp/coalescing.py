@@ -0,0 +1,166 @@
+"""coalescing.py
+
+Coalesces Materialized Property recomputations
+
+Without coalescing, every signal on a dependency recomputes (or enqueues `async_store_mp` for) each dependent instance on its own, so a bulk update touching N rows fans out N single-row saves or N Celery tasks.
+
+Invalidations are collected as `(model, pk, mp)` triples, deduplicated, and flushed in one go:
+- Eventually consistent MPs are always coalesced per transaction, and flushed on commit as one `async_store_mps` task per model
+- Inside an explicit `coalesce_mp_updates()` scope (or a request handled by `MaterializedPropertiesCoalescingMiddleware`), synchronous MPs are deferred as well, and recomputed in bulk when the scope exits
+"""
+
+# Python Standard Library Imports
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import partial
+
+# Django Imports
+from django.db import transaction
+
+# HTK Imports
+from htk.apps.mp.utils import format_model_name
+from htk.utils import chunks
+from htk.utils import htk_setting
+
+
+_state = threading.local()
+
+
+class MPUpdateBuffer(object):
+    """Deduplicated set of pending Materialized Property recomputations"""
+
+    def __init__(self):
+        # {model: {mp: set(pks)}}
+        self.pending = defaultdict(lambda: defaultdict(set))
+
+    def __len__(self):
+        return sum(
+            len(pks)
+            for pks_by_mp in self.pending.values()
+            for pks in pks_by_mp.values()
+        )
+
+    def add(self, model, pk, mp):
+        self.pending[model][mp].add(pk)
+
+    def pop_all(self):
+        pending = self.pending
+        self.pending = defaultdict(lambda: defaultdict(set))
+        return pending
+
+
+def _get_scopes():
+    scopes = getattr(_state, 'scopes', None)
+    if scopes is None:
+        scopes = []
+        _state.scopes = scopes
+    return scopes
+
+
+@contextmanager
+def coalesce_mp_updates():
+    """Defers Materialized Property recomputations until the end of the block
+
+    Both synchronous and eventually consistent MPs are coalesced. Within the block, MP values on dependent instances may be stale.
+
+    Scopes may be nested; only the outermost scope flushes.
+    If the scope exits inside a transaction, the flush happens on commit.
+    """
+    scopes = _get_scopes()
+    buffer = MPUpdateBuffer()
+    scopes.append(buffer)
+    try:
+        yield buffer
+    finally:
+        scopes.pop()
+        if scopes:
+            # hand off to the enclosing scope
+            for model, pks_by_mp in buffer.pop_all().items():
+                for mp, pks in pks_by_mp.items():
+                    for pk in pks:
+                        scopes[-1].add(model, pk, mp)
+        else:
+            transaction.on_commit(lambda: flush_mp_updates(buffer))
+
+
+def _get_transaction_buffer():
+    """Returns the buffer of this thread for eventually consistent MP updates made in a transaction
+
+    The buffer is dropped by its flush on commit.
+    A rollback discards the flush without notice, so the buffer may also carry over updates from a rolled back transaction or savepoint,
+    which are then recomputed along with the next transaction's; recomputing is idempotent.
+    """
+    buffer = getattr(_state, 'transaction_buffer', None)
+    if buffer is None:
+        buffer = MPUpdateBuffer()
+        _state.transaction_buffer = buffer
+    return buffer
+
+
+def _flush_transaction_buffer(buffer):
+    if getattr(_state, 'transaction_buffer', None) is buffer:
+        _state.transaction_buffer = None
+    flush_mp_updates(buffer)
+
+
+def enqueue_mp_update(mp, instance):
+    """Schedules recomputation of `mp` on `instance`
+
+    Returns `True` if the update was buffered, `False` if the caller should apply it right away
+    """
+    scopes = _get_scopes()
+    connection = transaction.get_connection()
+    if instance.pk is None:
+        buffer = None
+    elif scopes:
+        buffer = scopes[-1]
+    elif mp.eventually_consistent and connection.in_atomic_block:
+        buffer = _get_transaction_buffer()
+        # registered by every update, since a flush registered earlier may have been discarded by a rollback;
+        # the first flush on commit empties the buffer, and the others find nothing left to do
+        transaction.on_commit(partial(_flush_transaction_buffer, buffer))
+    else:
+        buffer = None
+
+    if buffer is not None:
+        buffer.add(type(instance), instance.pk, mp)
+        was_buffered = True
+    else:
+        was_buffered = False
+    return was_buffered
+
+
+def flush_mp_updates(buffer):
+    """Applies all of the pending recomputations in `buffer`
+
+    Eventually consistent MPs are dispatched as one `async_store_mps` task per model (per `HTK_MP_BATCH_SIZE` pks); the others are recomputed in bulk right away
+    """
+    from htk.apps.mp.services import store_mps_bulk
+    from htk.apps.mp.tasks import async_store_mps
+
+    batch_size = htk_setting('HTK_MP_BATCH_SIZE')
+    for model, pks_by_mp in buffer.pop_all().items():
+        async_pks_by_mp = {}
+        sync_pks_by_mp = {}
+        for mp, pks in pks_by_mp.items():
+            if mp.eventually_consistent:
+                async_pks_by_mp[mp.name] = pks
+            else:
+                sync_pks_by_mp[mp] = pks
+
+        if sync_pks_by_mp:
+            store_mps_bulk(model, sync_pks_by_mp)
+
+        if async_pks_by_mp:
+            all_pks = sorted(set().union(*async_pks_by_mp.values()))
+            for pks_chunk in chunks(all_pks, batch_size):
+                pks_chunk = set(pks_chunk)
+                async_store_mps.delay(
+                    format_model_name(model),
+                    {
+                        mp_name: [pk for pk in pks if pk in pks_chunk]
+                        for mp_name, pks in async_pks_by_mp.items()
+                        if pks & pks_chunk
+                    },
+                )
@@ -0,0 +1,2 @@
+# max number of instances loaded and written per bulk Materialized Property recomputation
+HTK_MP_BATCH_SIZE = 500
@@ -0,0 +1,17 @@
+# HTK Imports
+from htk.apps.mp.coalescing import coalesce_mp_updates
+
+
+class MaterializedPropertiesCoalescingMiddleware(object):
+    """Coalesces Materialized Property recomputations triggered while handling a request
+
+    Dependent MPs are recomputed in bulk once the view returns, instead of once per changed row
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with coalesce_mp_updates():
+            response = self.get_response(request)
+        return response
@@ -22,8 +22,11 @@ from django.db import models
 from django.db.models import signals
 
 # HTK Imports
+from htk.apps.mp.coalescing import enqueue_mp_update
 from htk.apps.mp.signals import priority_connect
 from htk.apps.mp.utils import format_model_name
+from htk.utils import chunks
+from htk.utils import htk_setting
 
 
 # isort: off
@@ -51,8 +54,13 @@ def materialized_property(
     dbl_check_on_post_save=False,
     eventually_consistent=False,
     verify_qs=None,
+    sql_expression=None,
 ):
-    """Decorator to create a Materialized Property"""
+    """Decorator to create a Materialized Property
+
+    `sql_expression` optional ORM expression (or a callable returning one) that computes the same value as the decorated function in the database, e.g. `Coalesce(Sum('children__value'), 0)`.
+    When declared, verification and backfill run set-based (see `verify_mp_sql()`) instead of evaluating the function per instance.
+    """
 
     def wrap(f):
         return MaterializedPropertySubstitution(
@@ -66,6 +74,7 @@ def materialized_property(
             dbl_check_on_post_save=dbl_check_on_post_save,
             eventually_consistent=eventually_consistent,
             verify_qs=verify_qs,
+            sql_expression=sql_expression,
         )
 
     return wrap
@@ -103,6 +112,7 @@ class MaterializedPropertySubstitution(object):
         dbl_check_on_post_save,
         eventually_consistent,
         verify_qs,
+        sql_expression=None,
     ):
         self.f = f
         self.field_definition = field_definition
@@ -115,6 +125,7 @@ class MaterializedPropertySubstitution(object):
         self.dbl_check_on_post_save = dbl_check_on_post_save
         self.eventually_consistent = eventually_consistent
         self.verify_qs = verify_qs
+        self.sql_expression = sql_expression
 
     def wrapped(self, *args, **kwargs):
         return self.f(*args, **kwargs)
@@ -252,6 +263,14 @@ class MaterializedPropertySubstitution(object):
             )
         prepare_handlers.append(self.handle_prepared)
 
+    def get_sql_expression(self):
+        expression = (
+            self.sql_expression()
+            if callable(self.sql_expression)
+            else self.sql_expression
+        )
+        return expression
+
     def values_equal(self, x, y):
         if isinstance(self.field_definition, models.DecimalField):
             if x is None or y is None:
@@ -364,10 +383,14 @@ class MaterializedPropertySubstitution(object):
         save=True,
         force=None,
         changed_only=True,
+        coalesce=True,
     ):
         from htk.apps.mp.tasks import async_store_mp
 
-        if self.eventually_consistent:
+        if save and coalesce and enqueue_mp_update(self, resolved_instance):
+            # deferred; see htk.apps.mp.coalescing
+            pass
+        elif self.eventually_consistent:
             cls = type(resolved_instance)
             async_store_mp.delay(
                 format_model_name(cls),
@@ -481,6 +504,7 @@ class MaterializedPropertySubstitution(object):
                     save=save,
                     force=force,
                     changed_only=second_check,
+                    coalesce=not second_check,
                 )
                 if old_resolved_instance:
                     setattr(
@@ -653,6 +677,69 @@ def parse_dependency(model, dependency):
             )
 
 
+def get_registered_mp(model, mp_name):
+    """Returns the Materialized Property `mp_name` of `model`, including MPs declared on (abstract) base classes"""
+    model = get_model_instance_cls(model)
+    for cls in model.__mro__:
+        mp = registered_mps.get(cls, {}).get(mp_name)
+        if mp is not None:
+            break
+    else:
+        raise Exception('Unknown mp {} on {}'.format(mp_name, model.__name__))
+    return mp
+
+
+def store_mps_bulk(model, pks_by_mp, batch_size=None):
+    """Recomputes Materialized Properties for many instances of `model`
+
+    `pks_by_mp` is a dict of `{mp: pks}`, where `mp` is a MaterializedPropertySubstitution or an MP name
+
+    Loads instances with one `in_bulk` query and writes changed values with one `bulk_update` per `batch_size` instances
+
+    Returns the number of instances updated
+    """
+    model = get_model_instance_cls(model)
+    if batch_size is None:
+        batch_size = htk_setting('HTK_MP_BATCH_SIZE')
+    pks_by_mp = {
+        (get_registered_mp(model, mp) if isinstance(mp, basestring) else mp): set(
+            pks
+        )
+        for mp, pks in pks_by_mp.items()
+    }
+    all_pks = sorted(set().union(*pks_by_mp.values()))
+
+    num_updated = 0
+    for pks_chunk in chunks(all_pks, batch_size):
+        instances = model.objects.in_bulk(pks_chunk)
+        changed = {}
+        update_fields = set()
+        for mp, pks in pks_by_mp.items():
+            for pk in pks.intersection(instances.keys()):
+                if pk in pending_delete:
+                    continue
+                instance = instances[pk]
+                value = mp.f(instance)
+                is_unchanged = mp.values_equal(
+                    value, getattr(instance, mp.field_name)
+                ) and (
+                    not mp.use_is_set_field
+                    or getattr(instance, mp.is_set_field_name)
+                )
+                if not is_unchanged:
+                    mp.update_on_instance(instance, value, save=False)
+                    changed[pk] = instance
+                    update_fields.add(mp.field_name)
+                    if mp.use_is_set_field:
+                        update_fields.add(mp.is_set_field_name)
+        if changed:
+            model.objects.bulk_update(
+                list(changed.values()), sorted(update_fields)
+            )
+            num_updated += len(changed)
+    return num_updated
+
+
 def invalidate_for_instance(instance, mps, save=False):
     """Invalidates the Materialized Properties `mps` for this `instance
 
@@ -734,6 +821,29 @@ def test_mp(
     not_set = 0
     attr_name = mp.field_name
     suspects = []
+    start = time.time()
+
+    for instance in it:
+        total += 1
+        throttler.throttle()
+        if mp.is_not_set(instance):
+            not_set += 1
+            suspects.append(instance.pk)
+            continue
+        try:
+            real = mp.get_real(instance)
+        except Exception as err:
+            log_err(err, instance)
+            continue
+        cached = getattr(instance, attr_name)
+        if not mp.values_equal(real, cached):
+            failed += 1
+            suspects.append(instance.pk)
+            log_dbg(
+                "Real value '{}' does not match cached value '{}' for {}".format(
+                    real, cached, fmt(instance)
+                )
+            )
 
     pk_name = model._meta.pk.name
     if fix:
@@ -762,6 +872,113 @@ def test_mp(
                 continue
 
     log_stat(failed, total, not_set)
+    stats = _build_verification_stats(
+        'python',
+        total,
+        failed,
+        not_set,
+        len(suspects) if fix else 0,
+        time.time() - start,
+    )
+    return stats
+
+
+def _build_verification_stats(mode, total, failed, not_set, fixed, duration):
+    stats = {
+        'mode': mode,
+        'total': total,
+        'failed': failed,
+        'not_set': not_set,
+        'fixed': fixed,
+        'duration': duration,
+        'rows_per_second': total / duration if duration else None,
+    }
+    return stats
+
+
+def verify_mp_sql(
+    qs,
+    model,
+    mp,
+    fix=False,
+    log_stat=default_stat,
+    batch_size=None,
+):
+    """Set-based verification (and backfill, with `fix=True`) of Materialized Property `mp` over `qs`
+
+    Requires `mp` to declare a `sql_expression`. The expected value is annotated onto `qs` and compared against the stored field in the database, so a chunk costs one COUNT, one query for the mismatched rows, and one bulk UPDATE per `batch_size` mismatches, with no Python evaluation of the MP.
+
+    Returns a dict of stats, same shape as `test_mp()`
+    """
+    if isinstance(mp, basestring):
+        mp = get_registered_mp(model, mp)
+    expression = mp.get_sql_expression()
+    if expression is None:
+        raise Exception(
+            'mp {} on {} has no sql_expression'.format(mp.name, model.__name__)
+        )
+    if batch_size is None:
+        batch_size = htk_setting('HTK_MP_BATCH_SIZE')
+    start = time.time()
+
+    field_name = mp.field_name
+    expected_name = '_mp_expected_' + mp.name
+    is_different = (
+        models.Q(**{field_name + '__isnull': True})
+        & models.Q(**{expected_name + '__isnull': False})
+    ) | (
+        models.Q(**{field_name + '__isnull': False})
+        & (
+            models.Q(**{expected_name + '__isnull': True})
+            | ~models.Q(**{field_name: models.F(expected_name)})
+        )
+    )
+    if mp.use_is_set_field:
+        is_not_set = models.Q(**{mp.is_set_field_name: False})
+    elif not mp.no_auto_back_fill and isinstance(
+        mp.field_definition, (models.CharField, models.TextField)
+    ):
+        is_not_set = models.Q(**{field_name: MAGIC_VALUE_NOT_SET_STRING})
+    else:
+        is_not_set = models.Q(**{field_name + '__isnull': True})
+
+    total = qs.count()
+    annotated_qs = qs.annotate(**{expected_name: expression})
+    was_not_set = models.ExpressionWrapper(
+        is_not_set, output_field=models.BooleanField()
+    )
+    mismatches = (
+        list(
+            annotated_qs.filter(is_different | is_not_set).values_list(
+                'pk', expected_name, was_not_set
+            )
+        )
+        if total
+        else []
+    )
+    not_set = sum(1 for (_, _, was_not_set) in mismatches if was_not_set)
+    failed = len(mismatches) - not_set
+
+    fixed = 0
+    if fix and mismatches:
+        update_fields = [field_name]
+        if mp.use_is_set_field:
+            update_fields.append(mp.is_set_field_name)
+        instances = []
+        for pk, expected, _ in mismatches:
+            instance = model(pk=pk)
+            mp.update_on_instance(instance, expected, save=False)
+            instances.append(instance)
+        model.objects.bulk_update(
+            instances, update_fields, batch_size=batch_size
+        )
+        fixed = len(instances)
+
+    log_stat(failed, total, not_set)
+    stats = _build_verification_stats(
+        'sql', total, failed, not_set, fixed, time.time() - start
+    )
+    return stats
 
 
 def extract_stack_safe():
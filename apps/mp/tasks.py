@@ -12,9 +12,12 @@ from django.apps import apps
 from django.conf import settings
 
 # HTK Imports
+from htk.apps.mp.cachekeys import MPVerificationStatsCache
 from htk.apps.mp.services import fmt
 from htk.apps.mp.services import registered_mps
+from htk.apps.mp.services import store_mps_bulk
 from htk.apps.mp.services import test_mp
+from htk.apps.mp.services import verify_mp_sql
 from htk.apps.mp.utils import format_model_name
 from htk.apps.mp.utils import get_model_by_name
 from htk.decorators.celery_ import safe_timed_task
@@ -77,23 +80,37 @@ def verify_mp(cls_name, mp_name, chunk):
             level='warning'
         )
 
-    # Better to do it in mysql, but would need to write native SQL then
-    # Assuming mp evaluation takes much more time then iteration itself it should be fine
     _, pk_column = cls._meta.pk.get_attname_column()
     chunk_condition = "{}.{} %% %s = %s".format(cls._meta.db_table, pk_column)
     qs = cls.objects.all()
     if mp.verify_qs is not None:
         qs = mp.verify_qs(qs)
-    it = chunked_iterator(qs.extra(where=[chunk_condition], params=[CHUNKS, chunk])) #lint-ignore: SQLiError
-    test_mp(
-        it,
-        cls,
-        mp,
-        fix=True,
-        #log_dbg=log.warning,
-        log_stat=task_stat,
-        log_err=task_exception
-    )
+    chunk_qs = qs.extra(where=[chunk_condition], params=[CHUNKS, chunk]) #lint-ignore: SQLiError
+
+    if mp.sql_expression is not None:
+        # set-based: compare (and fix) in the database, no per-instance evaluation
+        stats = verify_mp_sql(
+            chunk_qs,
+            cls,
+            mp,
+            fix=True,
+            log_stat=task_stat
+        )
+    else:
+        # Assuming mp evaluation takes much more time then iteration itself it should be fine
+        it = chunked_iterator(chunk_qs)
+        stats = test_mp(
+            it,
+            cls,
+            mp,
+            fix=True,
+            #log_dbg=log.warning,
+            log_stat=task_stat,
+            log_err=task_exception
+        )
+
+    c = MPVerificationStatsCache(prekey=[cls_name, mp_name, chunk])
+    c.cache_store(stats)
 
 verify_mp._raise_on_error_in_test = True
 
@@ -121,8 +138,25 @@ def async_store_mp(resolved_instance_class, resolved_instance_pk, mp_name):
 async_store_mp._raise_on_error_in_test = True
 
 
+@safe_timed_task('async_store_mps')
+def async_store_mps(resolved_instance_class, pks_by_mp_name):
+    """Recomputes Materialized Properties for many instances of one model
+
+    `pks_by_mp_name` is a dict of `{mp_name: [pk, ...]}`
+
+    Dispatched by htk.apps.mp.coalescing in place of one `async_store_mp` task per instance
+    """
+    cls = get_model_by_name(resolved_instance_class)
+    if cls is None:
+        raise Exception("Can't locate {}".format(resolved_instance_class))
+    store_mps_bulk(cls, pks_by_mp_name)
+
+async_store_mps._raise_on_error_in_test = True
+
+
 __all__ = [
     'verify_materialized_properties',
     'verify_mp',
     'async_store_mp',
+    'async_store_mps',
 ]
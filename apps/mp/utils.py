@@ -19,3 +19,28 @@ def get_model_by_name(clazz):
 		return model
 
 	raise Exception("Model {} not found".format(clazz))
+
+
+def get_mp_verification_stats(clazz, mp_name):
+	"""Returns the latest verification stats of Materialized Property `mp_name` on model `clazz`, summed over all verified chunks
+
+	`clazz` is the model name, as formatted by `format_model_name()`
+	"""
+	from htk.apps.mp.cachekeys import MPVerificationStatsCache
+	from htk.apps.mp.tasks import CHUNKS
+
+	chunk_stats = MPVerificationStatsCache.get_many(
+		[[clazz, mp_name, chunk] for chunk in range(CHUNKS)]
+	).values()
+	stats = {
+		'chunks': len(chunk_stats),
+		'modes': sorted(set(x['mode'] for x in chunk_stats)),
+	}
+	for key in ('total', 'failed', 'not_set', 'fixed', 'duration',):
+		stats[key] = sum(x[key] for x in chunk_stats)
+	stats['rows_per_second'] = (
+		stats['total'] / stats['duration']
+		if stats['duration']
+		else None
+	)
+	return stats
@@ -1,15 +1,378 @@
 # from abc import ABCMeta
 # from abc import abstractmethod
 
+# Python Standard Library Imports
+import math
+import random
+import time
+
 # Django Imports
 from django.core.cache import cache
 
 # HTK Imports
+from htk.cache.local import bump_cache_generation
+from htk.cache.local import get_cache_generation
+from htk.cache.local import get_local_cache
 from htk.cache.utils import get_cache_key_prefix
 from htk.constants.time import *
+from htk.utils import htk_setting
+
+
+class TieredCacheMixin(object):
+    """Shared cache plumbing for `CacheableObject` and `CustomCacheScheme`
+
+    Local tier:
+    An opt-in L1 in-process tier in front of the Django cache.
+    Subclasses enable it by setting `LOCAL_CACHE_ENABLED = True`, and may tune `LOCAL_CACHE_MAX_SIZE` and `LOCAL_CACHE_DURATION` per class.
+
+    Each class gets its own bounded LRU per worker process.
+    Cross-process invalidation goes through a shared generation key: `invalidate_cache()` bumps it, and other workers drop their local entries within `HTK_CACHE_LOCAL_CACHE_GENERATION_CHECK_INTERVAL` seconds.
+    A `cache_store()` from another worker is only picked up once the (short) local entry expires.
+
+    Stampede protection:
+    `get_or_compute(fn)` lets only one process at a time recompute a missing value (single flight via `CacheRecomputeLock`), while the others serve the last known (stale) value.
+    Values are also refreshed early with XFetch-style probability as they approach expiry, so hot keys rarely expire at all.
+    """
+
+    LOCAL_CACHE_ENABLED = False
+    LOCAL_CACHE_MAX_SIZE = None
+    LOCAL_CACHE_DURATION = None
+
+    # how long a stale copy is kept past expiry for `get_or_compute()`, defaults to HTK_CACHE_STALE_DURATION
+    STALE_DURATION = None
+    # XFetch beta; > 1.0 favors earlier refreshes, < 1.0 favors later ones
+    XFETCH_BETA = 1.0
+    # maximum time one process may hold the recompute lock, defaults to HTK_CACHE_RECOMPUTE_LOCK_DURATION
+    RECOMPUTE_LOCK_DURATION = None
+
+    @classmethod
+    def get_local_cache_name(cls):
+        name = cls.__name__
+        return name
+
+    @classmethod
+    def get_local_cache(cls):
+        """Returns the `LocalLRUCache` for this class, or `None` if the local tier is disabled"""
+        if cls.LOCAL_CACHE_ENABLED and htk_setting(
+            'HTK_CACHE_LOCAL_CACHE_ENABLED'
+        ):
+            max_size = (
+                htk_setting('HTK_CACHE_LOCAL_CACHE_MAX_SIZE')
+                if cls.LOCAL_CACHE_MAX_SIZE is None
+                else cls.LOCAL_CACHE_MAX_SIZE
+            )
+            duration = (
+                htk_setting('HTK_CACHE_LOCAL_CACHE_DURATION')
+                if cls.LOCAL_CACHE_DURATION is None
+                else cls.LOCAL_CACHE_DURATION
+            )
+            local_cache = get_local_cache(
+                cls.get_local_cache_name(), max_size, duration
+            )
+        else:
+            local_cache = None
+        return local_cache
+
+    @classmethod
+    def get_local_cache_generation(cls):
+        generation = get_cache_generation(
+            cls.get_local_cache_name(),
+            htk_setting('HTK_CACHE_LOCAL_CACHE_GENERATION_CHECK_INTERVAL'),
+        )
+        return generation
+
+    @classmethod
+    def encode_cache_payload(cls, payload):
+        """Encodes `payload` before it is written to the Django cache
+
+        Identity by default. Can be overridden by a subclass to plug in a value codec, together with `decode_cache_payload()`
+        """
+        value = payload
+        return value
+
+    @classmethod
+    def decode_cache_payload(cls, value):
+        """Decodes a `value` read from the Django cache
+
+        Identity by default. Never called for cache misses
+        """
+        payload = value
+        return payload
+
+    @classmethod
+    def get_local_cache_stats(cls):
+        """Returns hit, miss and eviction counters for this class's local tier"""
+        local_cache = cls.get_local_cache()
+        stats = local_cache.get_stats() if local_cache is not None else None
+        return stats
+
+    def _tiered_get(self, cache_key, default=None):
+        local_cache = self.get_local_cache()
+        if local_cache is not None:
+            generation = self.get_local_cache_generation()
+            (found, value) = local_cache.get(cache_key, generation=generation)
+        else:
+            found = False
+
+        if not found:
+            value = cache.get(cache_key)
+            if value is not None:
+                value = self.decode_cache_payload(value)
+            if local_cache is not None and value is not None:
+                self._local_set(
+                    local_cache,
+                    cache_key,
+                    value,
+                    generation,
+                    self.get_cache_duration(),
+                )
+
+        if value is None:
+            value = default
+        return value
+
+    def _tiered_set(self, cache_key, payload, duration, add_only=False):
+        value = self.encode_cache_payload(payload)
+        if add_only:
+            was_stored = cache.add(cache_key, value, duration)
+        else:
+            cache.set(cache_key, value, duration)
+            was_stored = True
+
+        local_cache = self.get_local_cache()
+        if local_cache is not None:
+            if was_stored:
+                generation = self.get_local_cache_generation()
+                self._local_set(
+                    local_cache, cache_key, payload, generation, duration
+                )
+            else:
+                local_cache.delete(cache_key)
+        return was_stored
 
+    def _tiered_delete(self, cache_key):
+        self._tiered_delete_many([cache_key])
 
-class CacheableObject(object):
+    def get_or_compute(self, fn, duration=None):
+        """Returns the cached value, computing and storing it with `fn()` on a miss
+
+        - Only the process holding the recompute lock calls `fn()`; the others serve the stale copy if there is one, otherwise wait up to `HTK_CACHE_RECOMPUTE_WAIT_TIMEOUT` seconds for the lock holder before computing it themselves
+        - Before expiry, a hit may trigger an early refresh with XFetch probability, which grows as expiry approaches and with how long `fn()` took last time
+
+        A `None` result from `fn()` is returned but not cached
+        """
+        cache_key = self.get_cache_key()
+        stale_key = self.get_stale_cache_key(cache_key)
+        if duration is None:
+            duration = self.get_cache_duration()
+
+        values = self._tiered_get_many(
+            {
+                cache_key: duration,
+                stale_key: duration,
+            }
+        )
+        value = values.get(cache_key)
+        # (value, delta, expires_at)
+        stale = values.get(stale_key)
+
+        if value is not None:
+            if stale is not None and self._should_refresh_early(stale):
+                lock = CacheRecomputeLock(cache_key, self._get_lock_duration())
+                if lock.acquire():
+                    try:
+                        refreshed_value = self._compute_and_store(fn, duration)
+                    finally:
+                        lock.release()
+                    # keep serving the cached value if the refresh came up empty
+                    if refreshed_value is not None:
+                        value = refreshed_value
+        else:
+            lock = CacheRecomputeLock(cache_key, self._get_lock_duration())
+            if lock.acquire():
+                try:
+                    value = self._compute_and_store(fn, duration)
+                finally:
+                    lock.release()
+            elif stale is not None:
+                value = stale[0]
+            else:
+                value = self._wait_for_recompute(cache_key, lock)
+                if value is None:
+                    value = self._compute_and_store(fn, duration)
+        return value
+
+    def recompute(self, fn, duration=None):
+        """Computes the value with `fn()` and stores it, along with the stale copy served by `get_or_compute()`
+
+        Use this instead of `cache_store()` to push a new value for a key read with `get_or_compute()`, so that the previous value is not served as stale afterwards
+        """
+        if duration is None:
+            duration = self.get_cache_duration()
+        value = self._compute_and_store(fn, duration)
+        return value
+
+    @classmethod
+    def get_stale_cache_key(cls, cache_key):
+        key = '%s:stale' % cache_key
+        return key
+
+    @classmethod
+    def _get_lock_duration(cls):
+        duration = (
+            htk_setting('HTK_CACHE_RECOMPUTE_LOCK_DURATION')
+            if cls.RECOMPUTE_LOCK_DURATION is None
+            else cls.RECOMPUTE_LOCK_DURATION
+        )
+        return duration
+
+    def _should_refresh_early(self, stale):
+        """XFetch: refresh when `now - delta * beta * log(rand())` reaches the expiry
+
+        Never for values that do not expire
+
+        See: Vattani, Chierichetti, Lowenstein; "Optimal Probabilistic Cache Stampede Prevention"
+        """
+        (_, delta, expires_at) = stale
+        if expires_at is None:
+            should_refresh = False
+        else:
+            # 1.0 - random() is in (0, 1], so log() is always defined and <= 0
+            gap = -delta * self.XFETCH_BETA * math.log(1.0 - random.random())
+            should_refresh = time.time() + gap >= expires_at
+        return should_refresh
+
+    def _compute_and_store(self, fn, duration):
+        start = time.time()
+        value = fn()
+        delta = time.time() - start
+        if value is not None:
+            cache_key = self.get_cache_key()
+            stale_duration = (
+                htk_setting('HTK_CACHE_STALE_DURATION')
+                if self.STALE_DURATION is None
+                else self.STALE_DURATION
+            )
+            self._tiered_set(cache_key, value, duration)
+            if duration is None:
+                # never expires, so there is no expiry to refresh ahead of, and the stale copy need not outlive it
+                (expires_at, stale_cache_duration) = (None, None)
+            else:
+                (expires_at, stale_cache_duration) = (
+                    time.time() + duration,
+                    duration + stale_duration,
+                )
+            self._tiered_set(
+                self.get_stale_cache_key(cache_key),
+                (value, delta, expires_at),
+                stale_cache_duration,
+            )
+        return value
+
+    def _wait_for_recompute(self, cache_key, lock):
+        """Polls for the value while another process holds the recompute lock
+
+        Returns `None` if the lock was released or the wait timed out without a value
+        """
+        value = None
+        timeout = htk_setting('HTK_CACHE_RECOMPUTE_WAIT_TIMEOUT')
+        poll_interval = htk_setting('HTK_CACHE_RECOMPUTE_POLL_INTERVAL')
+        deadline = time.monotonic() + timeout
+        while value is None and time.monotonic() < deadline:
+            time.sleep(poll_interval)
+            value = cache.get(cache_key)
+            if value is None and not lock.is_locked():
+                value = cache.get(cache_key)
+                break
+        if value is not None:
+            value = self.decode_cache_payload(value)
+        return value
+
+    @classmethod
+    def _tiered_get_many(cls, cache_keys_durations):
+        """Retrieves many values in a single cache round-trip
+
+        `cache_keys_durations` is a dict of `{cache_key: duration}`; the duration bounds how long a value may be held in the local tier
+
+        Returns a dict of `{cache_key: value}` for keys that were found
+        """
+        values = {}
+        local_cache = cls.get_local_cache()
+        if local_cache is not None:
+            generation = cls.get_local_cache_generation()
+            for cache_key in cache_keys_durations.keys():
+                (found, value) = local_cache.get(
+                    cache_key, generation=generation
+                )
+                if found:
+                    values[cache_key] = value
+
+        remaining_keys = [
+            cache_key
+            for cache_key in cache_keys_durations.keys()
+            if cache_key not in values
+        ]
+        if remaining_keys:
+            fetched = cache.get_many(remaining_keys)
+            for cache_key, value in fetched.items():
+                if value is not None:
+                    value = cls.decode_cache_payload(value)
+                    values[cache_key] = value
+                    if local_cache is not None:
+                        cls._local_set(
+                            local_cache,
+                            cache_key,
+                            value,
+                            generation,
+                            cache_keys_durations[cache_key],
+                        )
+        return values
+
+    @classmethod
+    def _tiered_set_many(cls, cache_keys_payloads, duration):
+        """Stores many `{cache_key: payload}` values with the same `duration` in a single cache round-trip"""
+        if cache_keys_payloads:
+            cache.set_many(
+                {
+                    cache_key: cls.encode_cache_payload(payload)
+                    for cache_key, payload in cache_keys_payloads.items()
+                },
+                duration,
+            )
+            local_cache = cls.get_local_cache()
+            if local_cache is not None:
+                generation = cls.get_local_cache_generation()
+                for cache_key, payload in cache_keys_payloads.items():
+                    cls._local_set(
+                        local_cache, cache_key, payload, generation, duration
+                    )
+
+    @classmethod
+    def _tiered_delete_many(cls, cache_keys):
+        cache_keys = list(cache_keys)
+        if cache_keys:
+            # also drop the stale copies kept by `get_or_compute()`
+            cache_keys += [
+                cls.get_stale_cache_key(cache_key) for cache_key in cache_keys
+            ]
+            cache.delete_many(cache_keys)
+            local_cache = cls.get_local_cache()
+            if local_cache is not None:
+                for cache_key in cache_keys:
+                    local_cache.delete(cache_key)
+                bump_cache_generation(cls.get_local_cache_name())
+
+    @classmethod
+    def _local_set(cls, local_cache, cache_key, value, generation, duration):
+        """Stores `value` in the local tier, never for longer than the L2 `duration`"""
+        if duration is None or duration > local_cache.duration:
+            duration = local_cache.duration
+        local_cache.set(
+            cache_key, value, generation=generation, duration=duration
+        )
+
+
+class CacheableObject(TieredCacheMixin):
     """Abstract base class for cacheable objects
 
     Meant to be a secondary base class via multiple inheritance
@@ -73,7 +436,7 @@ class CacheableObject(object):
         Pownce: instead of deleting, set the cache key to None for a short period of time--they claim there is a small race condition?
         """
         cache_key = self.get_cache_key()
-        cache.delete(cache_key)
+        self._tiered_delete(cache_key)
 
     def cache_store(self, refresh=False):
         """Default cache store method"""
@@ -82,15 +445,65 @@ class CacheableObject(object):
         cache_duration = self.get_cache_duration()
         if refresh:
             # cache.set() will insert or update
-            cache.set(cache_key, cache_payload, cache_duration)
+            self._tiered_set(cache_key, cache_payload, cache_duration)
         else:
             # use cache.add() instead of cache.set() by default,
             # cache.add() fails if there's already something stored for the key
-            cache.add(cache_key, cache_payload, cache_duration)
+            self._tiered_set(
+                cache_key, cache_payload, cache_duration, add_only=True
+            )
 
     def cache_retrieve(self, default=None):
         cache_key = self.get_cache_key()
-        return cache.get(cache_key, default=default)
+        return self._tiered_get(cache_key, default=default)
+
+    @classmethod
+    def cache_retrieve_many(cls, objs):
+        """Retrieves the cached payloads for many `objs` in a single cache round-trip
+
+        Returns a dict of `{obj: payload}` for objects that were cached
+        """
+        cache_keys_objs = {obj.get_cache_key(): obj for obj in objs}
+        values = cls._tiered_get_many(
+            {
+                cache_key: obj.get_cache_duration()
+                for cache_key, obj in cache_keys_objs.items()
+            }
+        )
+        payloads = {
+            cache_keys_objs[cache_key]: value
+            for cache_key, value in values.items()
+        }
+        return payloads
+
+    @classmethod
+    def cache_store_many(cls, objs, refresh=False):
+        """Stores the payloads for many `objs`, one cache round-trip per distinct duration
+
+        `refresh` == False : like `cache_store()`, objects that are already cached are left alone
+        """
+        objs = list(objs)
+        if not refresh:
+            cached_keys = set(
+                cache.get_many([obj.get_cache_key() for obj in objs]).keys()
+            )
+            objs = [
+                obj for obj in objs if obj.get_cache_key() not in cached_keys
+            ]
+
+        payloads_by_duration = {}
+        for obj in objs:
+            payloads_by_duration.setdefault(obj.get_cache_duration(), {})[
+                obj.get_cache_key()
+            ] = obj.get_cache_payload()
+
+        for duration, cache_keys_payloads in payloads_by_duration.items():
+            cls._tiered_set_many(cache_keys_payloads, duration)
+
+    @classmethod
+    def invalidate_cache_many(cls, objs):
+        """Invalidates the cache for many `objs` in a single cache round-trip"""
+        cls._tiered_delete_many([obj.get_cache_key() for obj in objs])
 
 
 class LockableObject(object):
@@ -170,7 +583,26 @@ class LockableObject(object):
         cache.delete(lock_key)
 
 
-class CustomCacheScheme(object):
+class CacheRecomputeLock(LockableObject):
+    """Single-flight lock for recomputing the value of `cache_key`
+
+    Used by `get_or_compute()`
+    """
+
+    def __init__(self, cache_key, duration):
+        self.cache_key = cache_key
+        self.duration = duration
+
+    def get_lock_duration(self):
+        duration = self.duration
+        return duration
+
+    def get_lock_key_suffix(self):
+        suffix = self.cache_key
+        return suffix
+
+
+class CustomCacheScheme(TieredCacheMixin):
     """Abstract base class for custom cache schemes
 
     `prekey` A list of values used to compute the eventual cache key.
@@ -233,20 +665,91 @@ class CustomCacheScheme(object):
 
     def get(self):
         cache_key = self.get_cache_key()
-        value = cache.get(cache_key)
+        value = self._tiered_get(cache_key)
         return value
 
     def invalidate_cache(self):
         cache_key = self.get_cache_key()
-        cache.delete(cache_key)
+        self._tiered_delete(cache_key)
 
     def cache_store(self, payload=None, duration=None):
         if payload is None:
             payload = self.get_cache_payload()
         cache_key = self.get_cache_key()
         duration = self.get_cache_duration() if duration is None else duration
-        cache.set(cache_key, payload, duration)
+        self._tiered_set(cache_key, payload, duration)
+
+    def cache_add(self, payload=None, duration=None):
+        """Stores `payload` only if nothing is cached for the key yet, with `cache.add()`
+
+        Returns whether `payload` was stored
+        """
+        if payload is None:
+            payload = self.get_cache_payload()
+        cache_key = self.get_cache_key()
+        duration = self.get_cache_duration() if duration is None else duration
+        was_stored = self._tiered_set(cache_key, payload, duration, add_only=True)
+        return was_stored
 
     def cache_retrieve(self, default=None):
         cache_key = self.get_cache_key()
-        return cache.get(cache_key, default=default)
+        return self._tiered_get(cache_key, default=default)
+
+    @classmethod
+    def get_hashable_prekey(cls, prekey):
+        """Returns `prekey` in a form that can be used as a dict key
+
+        Lists are converted to tuples
+        """
+        if isinstance(prekey, list):
+            prekey = tuple(prekey)
+        return prekey
+
+    @classmethod
+    def get_many(cls, prekeys):
+        """Retrieves the values for many `prekeys` in a single cache round-trip
+
+        Returns a dict of `{prekey: value}` for prekeys that were cached. List prekeys are returned as tuples.
+        """
+        cache_keys_prekeys = {}
+        cache_keys_durations = {}
+        for prekey in prekeys:
+            c = cls(prekey=prekey)
+            cache_key = c.get_cache_key()
+            cache_keys_prekeys[cache_key] = cls.get_hashable_prekey(prekey)
+            cache_keys_durations[cache_key] = c.get_cache_duration()
+
+        values = cls._tiered_get_many(cache_keys_durations)
+        values = {
+            cache_keys_prekeys[cache_key]: value
+            for cache_key, value in values.items()
+        }
+        return values
+
+    @classmethod
+    def store_many(cls, prekeys_payloads, duration=None):
+        """Stores many `{prekey: payload}` values, one cache round-trip per distinct duration
+
+        A `None` payload stores the default `get_cache_payload()`, same as `cache_store()`
+        """
+        payloads_by_duration = {}
+        for prekey, payload in prekeys_payloads.items():
+            c = cls(prekey=prekey)
+            if payload is None:
+                payload = c.get_cache_payload()
+            cache_duration = (
+                c.get_cache_duration() if duration is None else duration
+            )
+            payloads_by_duration.setdefault(cache_duration, {})[
+                c.get_cache_key()
+            ] = payload
+
+        for cache_duration, cache_keys_payloads in payloads_by_duration.items():
+            cls._tiered_set_many(cache_keys_payloads, cache_duration)
+
+    @classmethod
+    def invalidate_many(cls, prekeys):
+        """Invalidates many `prekeys` in a single cache round-trip"""
+        cls._tiered_delete_many(
+            [cls(prekey=prekey).get_cache_key() for prekey in prekeys]
+        )
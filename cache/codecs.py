@@ -0,0 +1,136 @@
+# Python Standard Library Imports
+import json
+import threading
+import zlib
+
+# HTK Imports
+from htk.utils.general import memoized
+from htk.utils.general import resolve_method_dynamically
+
+
+class BaseCacheCodec(object):
+    """Base class for cache value codecs
+
+    A codec turns a payload into compact `bytes` before it is written to the Django cache, and back when it is read.
+    Payloads whose encoding is at least `compression_threshold` bytes long are zlib-compressed.
+
+    The first byte of every encoded value is a tag identifying the format, so values written by another codec, or cached before a codec was configured, pass through `decode()` unchanged.
+
+    Subclasses implement `serialize()` and `deserialize()`, and set the `TAG`/`COMPRESSED_TAG` bytes.
+    """
+
+    TAG = None
+    COMPRESSED_TAG = None
+
+    def __init__(self, compression_threshold=1024, compression_level=6):
+        self.compression_threshold = compression_threshold
+        self.compression_level = compression_level
+        self._lock = threading.Lock()
+        self.values_encoded = 0
+        self.values_compressed = 0
+        self.bytes_serialized = 0
+        self.bytes_stored = 0
+
+    def serialize(self, payload):
+        raise NotImplementedError()
+
+    def deserialize(self, data):
+        raise NotImplementedError()
+
+    def encode(self, payload):
+        data = self.serialize(payload)
+        serialized_size = len(data)
+        if serialized_size >= self.compression_threshold:
+            value = self.COMPRESSED_TAG + zlib.compress(
+                data, self.compression_level
+            )
+            was_compressed = True
+        else:
+            value = self.TAG + data
+            was_compressed = False
+
+        with self._lock:
+            self.values_encoded += 1
+            self.values_compressed += 1 if was_compressed else 0
+            self.bytes_serialized += serialized_size
+            self.bytes_stored += len(value)
+        return value
+
+    def decode(self, value):
+        if isinstance(value, bytes) and value[:1] == self.TAG:
+            payload = self.deserialize(value[1:])
+        elif isinstance(value, bytes) and value[:1] == self.COMPRESSED_TAG:
+            payload = self.deserialize(zlib.decompress(value[1:]))
+        else:
+            # not written by this codec
+            payload = value
+        return payload
+
+    def get_stats(self):
+        """Returns counters for the values encoded by this codec in this process"""
+        with self._lock:
+            stats = {
+                'values_encoded': self.values_encoded,
+                'values_compressed': self.values_compressed,
+                'bytes_serialized': self.bytes_serialized,
+                'bytes_stored': self.bytes_stored,
+                'compression_ratio': (
+                    float(self.bytes_stored) / self.bytes_serialized
+                    if self.bytes_serialized
+                    else None
+                ),
+            }
+        return stats
+
+
+class JSONCacheCodec(BaseCacheCodec):
+    """Stores payloads as (optionally compressed) JSON
+
+    Only suitable for JSON-serializable payloads; tuples are decoded as lists
+    """
+
+    TAG = b'j'
+    COMPRESSED_TAG = b'J'
+
+    def serialize(self, payload):
+        data = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        return data
+
+    def deserialize(self, data):
+        payload = json.loads(data.decode('utf-8'))
+        return payload
+
+
+class MsgpackCacheCodec(BaseCacheCodec):
+    """Stores payloads as (optionally compressed) MessagePack
+
+    Requires the `msgpack` package
+    """
+
+    TAG = b'm'
+    COMPRESSED_TAG = b'M'
+
+    def serialize(self, payload):
+        # Third Party (PyPI) Imports
+        import msgpack
+
+        data = msgpack.packb(payload, use_bin_type=True)
+        return data
+
+    def deserialize(self, data):
+        # Third Party (PyPI) Imports
+        import msgpack
+
+        payload = msgpack.unpackb(data, raw=False)
+        return payload
+
+
+@memoized
+def get_cache_codec(codec_class_path, compression_threshold):
+    """Returns the process-wide codec instance for `codec_class_path`
+
+    Memoized so that each codec's byte counters accumulate across calls
+    """
+    codec_class = resolve_method_dynamically(codec_class_path)
+    codec = codec_class(compression_threshold=compression_threshold)
+    return codec
@@ -1 +1,16 @@
 HTK_CACHE_KEY_PREFIX = 'htk'
+
+##
+# Local (L1, in-process) cache tier
+# Only used by CacheableObject / CustomCacheScheme subclasses that set `LOCAL_CACHE_ENABLED = True`
+HTK_CACHE_LOCAL_CACHE_ENABLED = True
+HTK_CACHE_LOCAL_CACHE_MAX_SIZE = 1000
+HTK_CACHE_LOCAL_CACHE_DURATION = 10
+HTK_CACHE_LOCAL_CACHE_GENERATION_CHECK_INTERVAL = 1
+
+##
+# Stampede protection, used by `get_or_compute()`
+HTK_CACHE_STALE_DURATION = 300
+HTK_CACHE_RECOMPUTE_LOCK_DURATION = 30
+HTK_CACHE_RECOMPUTE_WAIT_TIMEOUT = 5
+HTK_CACHE_RECOMPUTE_POLL_INTERVAL = 0.1
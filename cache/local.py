@@ -0,0 +1,171 @@
+# Python Standard Library Imports
+import threading
+import time
+from collections import OrderedDict
+
+# Django Imports
+from django.core.cache import cache
+
+# HTK Imports
+from htk.cache.utils import get_cache_key_prefix
+
+
+class LocalLRUCache(object):
+    """Bounded, TTL-aware, in-process LRU cache
+
+    Used as the optional L1 tier in front of the Django cache (L2) by `CacheableObject` and `CustomCacheScheme`.
+
+    Each worker process has its own copy, so values are never shared across processes.
+    Payloads are stored by reference; callers must not mutate values returned by `get()`.
+    """
+
+    def __init__(self, max_size, duration):
+        self.max_size = max_size
+        self.duration = duration
+        self._data = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, generation=None):
+        """Returns `(found, value)` for `key`
+
+        An entry is only considered found if it has not expired and was stored with the same `generation`
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                found, value = False, None
+            else:
+                (value, expires_at, entry_generation) = entry
+                if expires_at <= now or entry_generation != generation:
+                    del self._data[key]
+                    self.expirations += 1
+                    self.misses += 1
+                    found, value = False, None
+                else:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    found = True
+        return found, value
+
+    def set(self, key, value, generation=None, duration=None):
+        if duration is None:
+            duration = self.duration
+        expires_at = time.monotonic() + duration
+        with self._lock:
+            self._data[key] = (value, expires_at, generation)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def get_stats(self):
+        with self._lock:
+            stats = {
+                'size': len(self._data),
+                'max_size': self.max_size,
+                'duration': self.duration,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+        return stats
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+            self.expirations = 0
+
+
+_local_caches = {}
+_local_caches_lock = threading.Lock()
+
+
+def get_local_cache(name, max_size, duration):
+    """Returns the process-wide `LocalLRUCache` registered under `name`, creating it if necessary"""
+    local_cache = _local_caches.get(name)
+    if local_cache is None:
+        with _local_caches_lock:
+            local_cache = _local_caches.get(name)
+            if local_cache is None:
+                local_cache = LocalLRUCache(max_size, duration)
+                _local_caches[name] = local_cache
+    return local_cache
+
+
+def get_local_cache_stats():
+    """Returns hit, miss and eviction counters for every registered local cache, keyed by name"""
+    stats = {
+        name: local_cache.get_stats()
+        for name, local_cache in list(_local_caches.items())
+    }
+    return stats
+
+
+def clear_local_caches():
+    """Empties every registered local cache in this process
+
+    Does not affect the shared Django cache
+    """
+    for local_cache in list(_local_caches.values()):
+        local_cache.clear()
+
+
+_generations = {}
+
+
+def _get_generation_key(name):
+    key = '%s:generation:%s' % (get_cache_key_prefix(), name)
+    return key
+
+
+def get_cache_generation(name, check_interval):
+    """Returns the current shared generation for local cache `name`
+
+    The generation lives in the Django cache so that it is visible to every worker, and is re-read at most once per `check_interval` seconds per process.
+    """
+    now = time.monotonic()
+    (generation, checked_at) = _generations.get(name, (None, None))
+    if checked_at is None or now - checked_at >= check_interval:
+        generation_key = _get_generation_key(name)
+        generation = cache.get(generation_key)
+        if generation is None:
+            # seed with a time-based value rather than 1, so that a generation key which was evicted never restarts at a value some worker has already used
+            cache.add(generation_key, int(time.time() * 1000), None)
+            generation = cache.get(generation_key)
+        _generations[name] = (generation, now)
+    return generation
+
+
+def bump_cache_generation(name):
+    """Advances the shared generation for local cache `name`
+
+    Every worker discards its local entries for `name` the next time it checks the generation.
+    """
+    generation_key = _get_generation_key(name)
+    try:
+        generation = cache.incr(generation_key)
+    except ValueError:
+        generation = int(time.time() * 1000)
+        cache.set(generation_key, generation, None)
+    _generations[name] = (generation, time.monotonic())
+    return generation
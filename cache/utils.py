@@ -6,3 +6,16 @@ from htk.utils import htk_setting
 def get_cache_key_prefix():
     prefix = htk_setting('HTK_CACHE_KEY_PREFIX')
     return prefix
+
+
+def is_cache_shared(alias='default'):
+    """Determines whether the Django cache `alias` is shared between processes
+
+    `DummyCache` stores nothing, and `LocMemCache` is private to each process, so neither can carry a shared value such as a cache generation
+    """
+    from django.core.cache import caches
+    from django.core.cache.backends.dummy import DummyCache
+    from django.core.cache.backends.locmem import LocMemCache
+
+    is_shared = not isinstance(caches[alias], (DummyCache, LocMemCache))
+    return is_shared
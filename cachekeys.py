@@ -8,7 +8,11 @@ class StaticAssetVersionCache(CustomCacheScheme):
 
     Usually refreshed at the end of a deploy
     So that client browser cache doesn't have stale JS/CSS after a deploy
+
+    Read on every page render, so it is also held in the local in-process tier
     """
+    LOCAL_CACHE_ENABLED = True
+
     def get_cache_duration(self):
         duration = TIMEOUT_30_DAYS
         return duration
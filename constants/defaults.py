@@ -30,6 +30,18 @@ HTK_CSS_EXTENSION = 'css'
 
 HTK_HANDLE_MAX_LENGTH = 64
 
+##
+# Background tasks (`htk.tasks.BaseTask`)
+HTK_BATCH_TASK_CHUNK_SIZE = 500
+HTK_BATCH_TASK_MAX_WORKERS = 4
+
+##
+# DataTables (`htk.api.views.model_datatables_api_get_view`)
+HTK_DATATABLES_COUNT_CACHE_DURATION = 60
+HTK_DATATABLES_CURSOR_CACHE_DURATION = 1800
+# below this many estimated rows, counts are exact
+HTK_DATATABLES_ESTIMATED_COUNT_THRESHOLD = 10000
+
 ##
 # JSON Serialization Settings
 HTK_JSON_DECIMAL_SHOULD_QUANTIZE = True
@@ -47,6 +59,7 @@ HTK_DEFAULT_EMAIL_RECIPIENTS = [
 ]
 HTK_EMAIL_CONTEXT_GENERATOR = 'htk.mailers.email_context_generator'
 HTK_EMAIL_ATTACHMENTS = ()
+HTK_EMAIL_BATCH_SIZE = 100
 
 HTK_FIND_EMAILS_VALIDATOR = 'htk.lib.fullcontact.utils.find_valid_emails'
 HTK_EMAIL_PERSON_RESOLVER = 'htk.lib.fullcontact.utils.find_person_by_email'
@@ -98,10 +111,13 @@ from htk.apps.changelog.constants.defaults import *
 from htk.apps.conversations.constants.defaults import *
 from htk.apps.cpq.constants.defaults import *
 from htk.apps.file_storage.constants.defaults import *
+from htk.apps.forums.constants.defaults import *
 from htk.apps.geolocations.constants.defaults import *
 from htk.apps.i18n.constants.defaults import *
 from htk.apps.invitations.constants.defaults import *
+from htk.apps.kv_storage.constants.defaults import *
 from htk.apps.maintenance_mode.constants.defaults import *
+from htk.apps.mp.constants.defaults import *
 from htk.apps.mobile.constants.defaults import *
 from htk.apps.notifications.constants.defaults import *
 from htk.apps.organizations.constants.defaults import *
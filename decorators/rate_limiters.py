@@ -1,7 +1,18 @@
 # Python Standard Library Imports
+import threading
 import time
 from functools import wraps
 
+# Django Imports
+from django.core.cache import cache
+from django.http import HttpResponse
+
+# HTK Imports
+from htk.cache.utils import get_cache_key_prefix
+from htk.constants.http import HTTPStatus
+from htk.exceptions import RateLimitExceeded
+from htk.utils.request import extract_request_ip
+
 
 class rate_limit_instance_method(object):
     """Instance Method rate-limiter using token bucket algorithm
@@ -68,3 +79,212 @@ class rate_limit_instance_method(object):
                 instance_method(*args, **kwargs)
                 bucket['allowance'] -= 1.0
         return wrapped
+
+
+class CacheRateLimiterBackend(object):
+    """Rate limiter counters stored in the Django cache, shared by every process using the same cache
+
+    Relies on `cache.add()` and `cache.incr()` being atomic, which holds for the memcached and Redis backends
+    """
+    def incr(self, key, ttl):
+        # ensure that the key exists before `incr()`, which raises `ValueError` for missing keys
+        cache.add(key, 0, ttl)
+        try:
+            value = cache.incr(key)
+        except ValueError:
+            # expired between `add()` and `incr()`
+            cache.add(key, 1, ttl)
+            value = 1
+        return value
+
+    def decr(self, key):
+        try:
+            cache.decr(key)
+        except ValueError:
+            pass
+
+    def get_many(self, keys):
+        values = cache.get_many(keys)
+        return values
+
+
+class LocalMemoryRateLimiterBackend(object):
+    """Rate limiter counters held in process memory
+
+    Not shared across processes; meant for tests and single-process use
+    """
+    def __init__(self):
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def incr(self, key, ttl):
+        now = time.time()
+        with self._lock:
+            (value, expires_at) = self._counters.get(key, (0, None))
+            if expires_at is not None and expires_at <= now:
+                (value, expires_at) = (0, None)
+            value += 1
+            self._counters[key] = (value, expires_at or now + ttl)
+        return value
+
+    def decr(self, key):
+        with self._lock:
+            if key in self._counters:
+                (value, expires_at) = self._counters[key]
+                self._counters[key] = (value - 1, expires_at)
+
+    def get_many(self, keys):
+        now = time.time()
+        with self._lock:
+            values = {
+                key: self._counters[key][0]
+                for key in keys
+                if key in self._counters and self._counters[key][1] > now
+            }
+        return values
+
+
+class RateLimiter(object):
+    """Sliding window rate limiter: at most `rate` calls per `per` seconds for `name`, across all processes sharing `backend`
+
+    Keeps one counter per fixed window of `per` seconds, and weighs the previous window's count by how much of it still overlaps the sliding window.
+
+    See:
+    - https://blog.cloudflare.com/counting-things-a-lot-of-different-things/
+    """
+    def __init__(self, name, rate=1, per=60, backend=None):
+        self.name = name
+        self.rate = rate
+        self.per = per
+        self.backend = backend if backend is not None else CacheRateLimiterBackend()
+
+    def _get_window_key(self, window):
+        key = '%s:ratelimit:%s:%s' % (
+            get_cache_key_prefix(),
+            self.name,
+            window,
+        )
+        return key
+
+    def try_acquire(self):
+        """Attempts to consume one call
+
+        Returns `(acquired, retry_after)`, where `retry_after` is an estimate of the seconds to wait before retrying
+        """
+        now = time.time()
+        window = int(now // self.per)
+        elapsed_fraction = (now % self.per) / self.per
+        key = self._get_window_key(window)
+        previous_key = self._get_window_key(window - 1)
+
+        # reserve a slot first, so that concurrent callers each see a distinct count
+        count = self.backend.incr(key, int(self.per * 2) + 1)
+        previous_count = self.backend.get_many([previous_key]).get(previous_key, 0)
+        weighted_count = previous_count * (1.0 - elapsed_fraction) + count
+
+        if weighted_count <= self.rate:
+            acquired = True
+            retry_after = 0
+        else:
+            # release the reservation
+            self.backend.decr(key)
+            acquired = False
+            if previous_count:
+                # time until enough of the previous window has slid out
+                excess = weighted_count - self.rate
+                retry_after = min(
+                    excess * self.per / previous_count,
+                    self.per * (1.0 - elapsed_fraction)
+                )
+            else:
+                # time until the next window
+                retry_after = self.per * (1.0 - elapsed_fraction)
+        return acquired, retry_after
+
+    def acquire(self, block=False, timeout=None):
+        """Consumes one call
+
+        `block` == False : raises `RateLimitExceeded` if no call is available
+        `block` == True : waits until a call is available, up to `timeout` seconds (indefinitely if `None`), then raises `RateLimitExceeded`
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            (acquired, retry_after) = self.try_acquire()
+            if acquired:
+                break
+            if not block or (deadline is not None and time.time() + retry_after > deadline):
+                raise RateLimitExceeded(self.name, retry_after=retry_after)
+            # never spin faster than one call's share of the window
+            time.sleep(max(retry_after, self.per / self.rate / 10.0))
+
+
+class rate_limit(object):
+    """Rate-limits calls to a function or method, sharing state across processes
+
+    `rate` calls per `per` seconds, counted under `name` (defaults to the function's module and qualified name)
+    `key_fn` optional; called with the function's arguments, returns a suffix so that limits apply per-key (e.g. per user or per API account)
+    `block` == True : waits for a slot (up to `timeout` seconds) instead of raising `RateLimitExceeded`
+    `backend` defaults to `CacheRateLimiterBackend`; pass `LocalMemoryRateLimiterBackend()` in tests
+
+    Example:
+
+        @rate_limit(rate=10, per=1, name='iterable_api', block=True, timeout=30)
+        def call_iterable(...):
+            ...
+    """
+    def __init__(self, rate=1, per=60, name=None, key_fn=None, block=False, timeout=None, backend=None):
+        self.rate = rate
+        self.per = per
+        self.name = name
+        self.key_fn = key_fn
+        self.block = block
+        self.timeout = timeout
+        self.backend = backend if backend is not None else CacheRateLimiterBackend()
+
+    def get_limiter(self, fn, args, kwargs):
+        name = self.name or '{}.{}'.format(fn.__module__, fn.__qualname__)
+        if self.key_fn is not None:
+            name = '{}:{}'.format(name, self.key_fn(*args, **kwargs))
+        limiter = RateLimiter(name, rate=self.rate, per=self.per, backend=self.backend)
+        return limiter
+
+    def __call__(self, fn):
+        @wraps(fn)
+        def wrapped(*args, **kwargs):
+            limiter = self.get_limiter(fn, args, kwargs)
+            limiter.acquire(block=self.block, timeout=self.timeout)
+            return fn(*args, **kwargs)
+        return wrapped
+
+
+class rate_limit_view(rate_limit):
+    """Rate-limits a Django view, responding with 429 Too Many Requests when rejected
+
+    `per_ip` == True : limits each client IP separately (ignored if `key_fn` is given)
+    """
+    def __init__(self, rate=1, per=60, name=None, key_fn=None, per_ip=False, block=False, timeout=None, backend=None):
+        if key_fn is None and per_ip:
+            key_fn = lambda request, *args, **kwargs: extract_request_ip(request)
+        super(rate_limit_view, self).__init__(
+            rate=rate,
+            per=per,
+            name=name,
+            key_fn=key_fn,
+            block=block,
+            timeout=timeout,
+            backend=backend
+        )
+
+    def __call__(self, view_fn):
+        @wraps(view_fn)
+        def wrapped(request, *args, **kwargs):
+            limiter = self.get_limiter(view_fn, (request,) + args, kwargs)
+            try:
+                limiter.acquire(block=self.block, timeout=self.timeout)
+            except RateLimitExceeded as e:
+                response = HttpResponse(status=HTTPStatus.TOO_MANY_REQUESTS)
+                response['Retry-After'] = str(int(e.retry_after or 0) + 1)
+            else:
+                response = view_fn(request, *args, **kwargs)
+            return response
+        return wrapped
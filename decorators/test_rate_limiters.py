@@ -0,0 +1,145 @@
+# Python Standard Library Imports
+from unittest import mock
+
+# Django Imports
+from django.http import HttpResponse
+from django.test import (
+    RequestFactory,
+    SimpleTestCase,
+)
+
+# HTK Imports
+from htk.decorators import rate_limiters
+from htk.decorators.rate_limiters import (
+    LocalMemoryRateLimiterBackend,
+    RateLimiter,
+    rate_limit,
+    rate_limit_view,
+)
+from htk.exceptions import RateLimitExceeded
+
+
+class FakeClock(object):
+    """Stands in for the `time` module, so that windows are deterministic and sleeping advances the clock instantly
+    """
+    def __init__(self, now):
+        self.now = now
+        self.slept = 0
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+        self.slept += seconds
+
+
+class RateLimiterTestCase(SimpleTestCase):
+    def setUp(self):
+        # the start of a window of 8 seconds, so that the window fractions below are exact
+        self.clock = FakeClock(800)
+        patcher = mock.patch.object(rate_limiters, 'time', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.backend = LocalMemoryRateLimiterBackend()
+
+    def test_reject(self):
+        limiter = RateLimiter('test_reject', rate=2, per=8, backend=self.backend)
+        limiter.acquire()
+        limiter.acquire()
+
+        with self.assertRaises(RateLimitExceeded) as cm:
+            limiter.acquire()
+        # nothing in the previous window, so the next call is allowed in the next window
+        self.assertEqual(8, cm.exception.retry_after)
+
+        # halfway through the next window, the 2 earlier calls count as 1, so a single call fits,
+        # which it would not if the rejected call had consumed a slot
+        self.clock.now = 812
+        limiter.acquire()
+        self.assertEqual((False, 4,), limiter.try_acquire())
+
+    def test_reject_decorator(self):
+        calls = []
+
+        @rate_limit(rate=1, per=8, name='test_reject_decorator', backend=self.backend)
+        def fn(value):
+            calls.append(value)
+
+        fn(1)
+        with self.assertRaises(RateLimitExceeded):
+            fn(2)
+        self.assertEqual([1], calls)
+
+    def test_reject_per_key(self):
+        calls = []
+
+        @rate_limit(rate=1, per=8, name='test_reject_per_key', key_fn=lambda value: value, backend=self.backend)
+        def fn(value):
+            calls.append(value)
+
+        fn('a')
+        fn('b')
+        with self.assertRaises(RateLimitExceeded):
+            fn('a')
+        self.assertEqual(['a', 'b'], calls)
+
+    def test_reject_view(self):
+        @rate_limit_view(rate=1, per=8, name='test_reject_view', backend=self.backend)
+        def view(request):
+            return HttpResponse('OK')
+
+        request = RequestFactory().get('/')
+        self.assertEqual(200, view(request).status_code)
+
+        response = view(request)
+        self.assertEqual(429, response.status_code)
+        self.assertEqual('9', response['Retry-After'])
+
+    def test_block(self):
+        calls = []
+
+        @rate_limit(rate=1, per=8, name='test_block', block=True, backend=self.backend)
+        def fn(value):
+            calls.append((value, self.clock.now,))
+
+        fn(1)
+        fn(2)
+        # the first call still counts in full at the start of the next window, and has slid out by the end of it
+        self.assertEqual([(1, 800,), (2, 816,)], calls)
+        self.assertEqual(16, self.clock.slept)
+
+    def test_block_timeout(self):
+        limiter = RateLimiter('test_block_timeout', rate=1, per=8, backend=self.backend)
+        limiter.acquire(block=True, timeout=1)
+
+        with self.assertRaises(RateLimitExceeded):
+            limiter.acquire(block=True, timeout=1)
+        # gave up without waiting, since the wait would outlast the timeout
+        self.assertEqual(0, self.clock.slept)
+
+    def test_sliding_window_weighting(self):
+        limiter = RateLimiter('test_sliding_window_weighting', rate=8, per=8, backend=self.backend)
+        for _ in range(8):
+            limiter.acquire()
+
+        # halfway through the next window, half of the previous window's 8 calls still count
+        self.clock.now = 812
+        for _ in range(4):
+            limiter.acquire()
+        (acquired, retry_after) = limiter.try_acquire()
+        self.assertFalse(acquired)
+        # one excess call, which slides out after a call's share of the window
+        self.assertEqual(1, retry_after)
+
+        # three quarters through, only a quarter of the previous window's calls count
+        self.clock.now = 814
+        limiter.acquire()
+        limiter.acquire()
+        self.assertFalse(limiter.try_acquire()[0])
+
+        # two windows later, the earlier calls no longer count at all
+        self.clock.now = 824
+        for _ in range(8):
+            limiter.acquire()
+        self.assertFalse(limiter.try_acquire()[0])
@@ -1,5 +1,6 @@
 # Python Standard Library Imports
 import inspect
+import threading
 
 # Third Party (PyPI) Imports
 import rollbar
@@ -27,6 +28,9 @@ class BaseBatchRelationshipEmails(BaseTask):
     - http://blog.mailchimp.com/what-is-transactional-email/
     - https://www.ftc.gov/tips-advice/business-center/guidance/can-spam-act-compliance-guide-business
     """
+    # per thread: `(task, chunk)` while `execute_users()` runs a chunk, see `_get_chunk()`
+    _chunk_state = threading.local()
+
     def __init__(self, cooldown_class=None, template=None):
         # set cooldown_class
         from htk.cachekeys import BatchRelationshipEmailCooldown
@@ -51,26 +55,55 @@ class BaseBatchRelationshipEmails(BaseTask):
         prekey += kw_values
         return prekey
 
+    def _get_chunk(self):
+        """Returns the chunk being run by `execute_users()` in this thread, or `None`
+
+        A chunk is a dict of:
+        - `email_batches_data`: `{user_id: email_batches_data}`
+        - `cooldowns`: `{prekey: has_cooldown}`, prefetched for every email batch of the chunk
+        """
+        state = getattr(self._chunk_state, 'state', None)
+        chunk = state[1] if state is not None and state[0] is self else None
+        return chunk
+
     def has_email_batch_cooldown(self, user, **kwargs):
         """Checks whether cooldown timer is still going for the email batch for `user` and `kwargs`
         """
         prekey = self.get_email_batch_cooldown_prekey(user, **kwargs)
-        c = self.cooldown_class(prekey)
-        _has_cooldown = bool(c.get())
+        chunk = self._get_chunk()
+        hashable_prekey = self.cooldown_class.get_hashable_prekey(prekey)
+        if chunk is not None and hashable_prekey in chunk['cooldowns']:
+            _has_cooldown = chunk['cooldowns'][hashable_prekey]
+        else:
+            c = self.cooldown_class(prekey)
+            _has_cooldown = bool(c.get())
         return _has_cooldown
 
     def reset_email_batch_cooldown(self, user, **kwargs):
         """Resets cooldown timer for email batch for `user` and `kwargs`
 
+        Within `execute_users()`, the cooldown prefetched for the chunk is checked instead of reading it again
+
         Returns whether cooldown was reset, False if timer was still running
         """
         prekey = self.get_email_batch_cooldown_prekey(user, **kwargs)
-        c = self.cooldown_class(prekey)
-        if c.get():
-            was_reset = False
+        chunk = self._get_chunk()
+        hashable_prekey = self.cooldown_class.get_hashable_prekey(prekey)
+        if chunk is not None and hashable_prekey in chunk['cooldowns']:
+            if chunk['cooldowns'][hashable_prekey]:
+                was_reset = False
+            else:
+                c = self.cooldown_class(prekey)
+                c.cache_store()
+                chunk['cooldowns'][hashable_prekey] = True
+                was_reset = True
         else:
-            c.cache_store()
-            was_reset = True
+            c = self.cooldown_class(prekey)
+            if c.get():
+                was_reset = False
+            else:
+                c.cache_store()
+                was_reset = True
         return was_reset
 
     def get_users(self):
@@ -101,7 +134,11 @@ class BaseBatchRelationshipEmails(BaseTask):
         One `user` may receive one or many emails
         """
         recipient = user
-        email_batches_data = self.get_recipient_email_batches_data(recipient)
+        chunk = self._get_chunk()
+        if chunk is not None and recipient.id in chunk['email_batches_data']:
+            email_batches_data = chunk['email_batches_data'][recipient.id]
+        else:
+            email_batches_data = self.get_recipient_email_batches_data(recipient)
         for email_batch_data in email_batches_data:
             try:
                 if self.has_email_batch_cooldown(recipient, **email_batch_data):
@@ -116,6 +153,41 @@ class BaseBatchRelationshipEmails(BaseTask):
                 }
                 rollbar.report_exc_info(extra_data=extra_data)
 
+    def execute_users(self, users):
+        """Send out emails for a chunk of `users`, calling `execute()` for each
+
+        Email batch cooldowns for the whole chunk are prefetched with one multi-get; those reset by `execute()` are still stored right after each email is sent
+        """
+        chunk = {
+            'email_batches_data' : {},
+            'cooldowns' : {},
+        }
+        for user in users:
+            try:
+                email_batches_data = self.get_recipient_email_batches_data(user)
+            except Exception:
+                # left to `execute()`, which fails for this user
+                continue
+            chunk['email_batches_data'][user.id] = email_batches_data
+            for email_batch_data in email_batches_data:
+                prekey = self.cooldown_class.get_hashable_prekey(
+                    self.get_email_batch_cooldown_prekey(user, **email_batch_data)
+                )
+                chunk['cooldowns'][prekey] = False
+        chunk['cooldowns'].update(
+            {
+                prekey : bool(value)
+                for prekey, value in self.cooldown_class.get_many(list(chunk['cooldowns'].keys())).items()
+            }
+        )
+
+        self._chunk_state.state = (self, chunk,)
+        try:
+            (executed_users, num_failed,) = super(BaseBatchRelationshipEmails, self).execute_users(users)
+        finally:
+            self._chunk_state.state = None
+        return executed_users, num_failed
+
     def send_email(self, recipient, **kwargs):
         """Workhorse function called by `self.send_emails` for
         sending to one `recipient`
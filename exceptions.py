@@ -20,3 +20,17 @@ class MissingBingSiteVerificationFile(Http404):
 
 class MissingBraveRewardsVerificationFile(Http404):
     pass
+
+
+class RateLimitExceeded(Exception):
+    """Raised by `htk.decorators.rate_limiters` when a call is rejected
+
+    `retry_after` is the estimated number of seconds until a call would be allowed
+    """
+
+    def __init__(self, name, retry_after=None):
+        self.name = name
+        self.retry_after = retry_after
+        super(RateLimitExceeded, self).__init__(
+            'Rate limit exceeded for {}'.format(name)
+        )
@@ -1,2 +1,3 @@
 # HTK Imports
+from htk.extensions.data_structures.bounded_set import *
 from htk.extensions.data_structures.ordered_set import *
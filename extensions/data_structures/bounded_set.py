@@ -0,0 +1,49 @@
+# Python Standard Library Imports
+from collections import OrderedDict
+
+# Third Party (PyPI) Imports
+from six.moves import collections_abc
+
+
+class BoundedSet(collections_abc.MutableSet):
+    """A set holding at most `max_size` keys
+
+    When full, adding a key evicts the least recently added or re-added key, so memory stays bounded while recently seen keys are remembered.
+    Suited to deduplicating long streams, where forgetting an old key only costs redundant work.
+    """
+
+    def __init__(self, max_size, iterable=None):
+        self.max_size = max_size
+        self.map = OrderedDict()
+        self.evictions = 0
+        if iterable is not None:
+            self |= iterable
+
+    def __len__(self):
+        return len(self.map)
+
+    def __contains__(self, key):
+        return key in self.map
+
+    def add(self, key):
+        if key in self.map:
+            self.map.move_to_end(key)
+        else:
+            self.map[key] = None
+            if len(self.map) > self.max_size:
+                self.map.popitem(last=False)
+                self.evictions += 1
+
+    def discard(self, key):
+        self.map.pop(key, None)
+
+    def __iter__(self):
+        return iter(self.map)
+
+    def __repr__(self):
+        return '%s(%r, %r)' % (self.__class__.__name__, self.max_size, list(self))
+
+
+__all__ = [
+    'BoundedSet',
+]
@@ -1,11 +1,17 @@
 # Python Standard Library Imports
 import math
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 import shopify
 
+# HTK Imports
+from htk.decorators.rate_limiters import RateLimiter
+
 
 SHOPIFY_API_RATE_LIMIT_CYCLE = 0.5 # can average 2 calls per second
+SHOPIFY_API_PAGE_SIZE = 250
 
 class HtkShopifyAPIClient(object):
     def __init__(self, shop_name=None, api_key=None, api_secret=None):
@@ -15,6 +21,13 @@ class HtkShopifyAPIClient(object):
 
         self.reset_session()
 
+        # shared by all threads and processes fetching from this shop
+        self.rate_limiter = RateLimiter(
+            'shopify_api:%s' % self.shop_name,
+            rate=int(1 / SHOPIFY_API_RATE_LIMIT_CYCLE),
+            per=1
+        )
+
     def reset_session(self):
         shopify.ShopifyResource.clear_session()
         if self.shop_name and self.api_key and self.api_secret:
@@ -48,6 +61,41 @@ class HtkShopifyAPIClient(object):
                 i += 1
                 yield item, i, item_count, page
 
+    def find_page(self, resource, page, page_size=SHOPIFY_API_PAGE_SIZE, **params):
+        """Fetches one page of the ActiveResource `resource`, waiting for the rate limiter first
+        """
+        self.rate_limiter.acquire(block=True)
+        items = resource.find(limit=page_size, page=page, **params)
+        return items
+
+    def iter_resource_pages(self, resource, start_page=1, max_workers=1, page_size=SHOPIFY_API_PAGE_SIZE, **params):
+        """Returns an iterator/generator over pages of the ActiveResource `resource`
+
+        Up to `max_workers` pages are fetched concurrently ahead of the consumer, within the API rate limit,
+        and yielded in page order as `(items, page, num_pages, item_count)`
+
+        `params` are passed to both `count()` and `find()`, e.g. `updated_at_min`
+        """
+        self.rate_limiter.acquire(block=True)
+        item_count = resource.count(**params)
+        num_pages = int(math.ceil(item_count / (page_size * 1.0)))
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # pages being fetched, in page order
+            futures = deque()
+            next_page = start_page
+            while futures or next_page <= num_pages:
+                # keep at most `max_workers` pages in flight, so memory stays bounded if the consumer is slower
+                while next_page <= num_pages and len(futures) < max_workers:
+                    futures.append(
+                        (next_page, executor.submit(self.find_page, resource, next_page, page_size=page_size, **params),)
+                    )
+                    next_page += 1
+
+                (page, future,) = futures.popleft()
+                items = future.result()
+                yield items, page, num_pages, item_count
+
     ##
     # Product
     # https://help.shopify.com/api/reference/product
@@ -57,6 +105,11 @@ class HtkShopifyAPIClient(object):
         """
         return self.resource_iterator(shopify.Product)
 
+    def iter_product_pages(self, **kwargs):
+        """Returns an iterator/generator over pages of Products
+        """
+        return self.iter_resource_pages(shopify.Product, **kwargs)
+
     ##
     # Order
     # https://help.shopify.com/api/reference/order
@@ -66,6 +119,11 @@ class HtkShopifyAPIClient(object):
         """
         return self.resource_iterator(shopify.Order)
 
+    def iter_order_pages(self, **kwargs):
+        """Returns an iterator/generator over pages of Orders
+        """
+        return self.iter_resource_pages(shopify.Order, **kwargs)
+
     ##
     # Customer
     # https://help.shopify.com/api/reference/customer
@@ -74,3 +132,8 @@ class HtkShopifyAPIClient(object):
         """Returns an iterator/generator over all Customers
         """
         return self.resource_iterator(shopify.Customer)
+
+    def iter_customer_pages(self, **kwargs):
+        """Returns an iterator/generator over pages of Customers
+        """
+        return self.iter_resource_pages(shopify.Customer, **kwargs)
@@ -2,12 +2,20 @@
 import json
 import time
 from decimal import Decimal
+from functools import partial
 
 # Third Party (PyPI) Imports
 import rollbar
 
+# Django Imports
+from django.db import connections
+
 # HTK Imports
-from htk.utils import htk_setting
+from htk.extensions.data_structures import BoundedSet
+from htk.utils import (
+    htk_setting,
+    utcnow,
+)
 from htk.utils.cache_descriptors import CachedAttribute
 from htk.utils.notifications import notify
 
@@ -22,6 +30,7 @@ class HtkShopifyArchiver(object):
 
             api = get_shopify_api_cli()
         self.api = api
+        self._reset_cache()
 
     def _get_iterator_for_item_type(self, item_type):
         iterators = {
@@ -32,6 +41,15 @@ class HtkShopifyArchiver(object):
         iterator = iterators.get(item_type)
         return iterator
 
+    def _get_page_iterator_for_item_type(self, item_type):
+        iterators = {
+            'product': self.api.iter_product_pages,
+            'order': self.api.iter_order_pages,
+            'customer': self.api.iter_customer_pages,
+        }
+        iterator = iterators.get(item_type)
+        return iterator
+
     def _get_archiver_for_item_type(self, item_type):
         archivers = {
             'product': self.archive_product,
@@ -47,43 +65,67 @@ class HtkShopifyArchiver(object):
         """
         cache = self.items_seen[item_type]
         pk = key(item)
-        if pk in cache:
-            was_cached = True
-        else:
-            cache[pk] = True
-            was_cached = False
+        was_cached = pk in cache
+        cache.add(pk)
         return was_cached
 
     def _reset_cache(self):
+        """Resets the items seen in this session
+
+        Each item type remembers at most `HTK_SHOPIFY_ARCHIVER_ITEMS_SEEN_MAX_SIZE` of the most recently seen primary keys,
+        so memory stays bounded over a full archive; an item which was forgotten is just upserted again
+        """
+        max_size = htk_setting('HTK_SHOPIFY_ARCHIVER_ITEMS_SEEN_MAX_SIZE')
         self.items_seen = {
-            # products
-            'product': {},
-            'product_tag': {},
-            'product_image': {},
-            'product_variant': {},
-            # customer
-            'customer': {},
-            'customer_address': {},
-            # order, refunds, fulfillments, transactions
-            'order': {},
-            'order_line_item': {},
-            'fulfillment': {},
-            'refund': {},
-            'transaction': {},
+            item_type: BoundedSet(max_size)
+            for item_type in (
+                # products
+                'product',
+                'product_tag',
+                'product_image',
+                'product_variant',
+                # customer
+                'customer',
+                'customer_address',
+                # order, refunds, fulfillments, transactions
+                'order',
+                'order_line_item',
+                'fulfillment',
+                'refund',
+                'transaction',
+            )
         }
 
     def archive_all(
-        self, include_products=True, include_customers=True, include_orders=True
+        self,
+        include_products=True,
+        include_customers=True,
+        include_orders=True,
+        pipeline=False,
+        incremental=True,
     ):
-        """Archives everything"""
+        """Archives everything
+
+        If `pipeline`, uses `archive_item_type_pipeline()`, which fetches pages concurrently and checkpoints progress;
+        `incremental` then archives only items updated since the last completed run
+        """
         self._reset_cache()
 
+        if pipeline:
+            archive_products = partial(self.archive_item_type_pipeline, 'product', incremental=incremental)
+            archive_customers = partial(self.archive_item_type_pipeline, 'customer', incremental=incremental)
+            archive_orders = partial(self.archive_item_type_pipeline, 'order', incremental=incremental)
+        else:
+            archive_products = self.archive_products
+            archive_customers = self.archive_customers
+            archive_orders = self.archive_orders
+
         if include_products:
-            self._safe_archive(self.archive_products)
+            self._safe_archive(archive_products)
         if include_customers:
-            self._safe_archive(self.archive_customers)
+            self._safe_archive(archive_customers)
         if include_orders:
-            self._safe_archive(self.archive_orders)
+            self._safe_archive(archive_orders)
 
     def _safe_archive(self, archiver):
         """Safely executes archival of Shopify resources using `archiver`
@@ -147,6 +189,87 @@ class HtkShopifyArchiver(object):
             self.archive_item(item_type, item)
             num_archived = i
 
+        self.flush()
+
+        end_time = time.time()
+        duration = Decimal(end_time - start_time).quantize(Decimal(10) ** -2)
+        msg = 'Archived %s %ss in %s seconds' % (
+            num_archived,
+            item_type,
+            duration,
+        )
+        notify(msg, use_messages=False)
+
+    def archive_item_type_pipeline(self, item_type, max_workers=None, incremental=True):
+        """Archives a collection of Shopify.Resource of `item_type`, fetching pages concurrently and checkpointing progress
+
+        - Up to `max_workers` (default: `HTK_SHOPIFY_ARCHIVER_MAX_WORKERS`) pages are fetched ahead, within the API rate limit, while earlier pages are archived
+        - Once a page has been archived and flushed, it is checkpointed; a run which was interrupted resumes after the last checkpointed page
+        - Once a run completes, its start time is checkpointed; if `incremental`, the next run only archives items updated since
+        """
+        if max_workers is None:
+            max_workers = htk_setting('HTK_SHOPIFY_ARCHIVER_MAX_WORKERS')
+
+        start_time = time.time()
+        # items of a page which failed to flush may have been seen already
+        self._reset_cache()
+
+        checkpoint = self.get_checkpoint(item_type)
+        run = checkpoint.get('run')
+        if run:
+            # resume the interrupted run, with its original filter
+            start_page = run['page'] + 1
+        else:
+            run = {
+                'started_at': utcnow().isoformat(),
+                'updated_at_min': (
+                    checkpoint.get('updated_at_min') if incremental else None
+                ),
+                'page': 0,
+            }
+            start_page = 1
+
+        params = {}
+        if run['updated_at_min']:
+            params['updated_at_min'] = run['updated_at_min']
+
+        msg = 'Archiving %ss from page %s%s...' % (
+            item_type,
+            start_page,
+            ' updated since %s' % run['updated_at_min'] if run['updated_at_min'] else '',
+        )
+        print(msg)
+        notify(msg, use_messages=False)
+
+        num_archived = 0
+        iterator = self._get_page_iterator_for_item_type(item_type)
+        for items, page, num_pages, total in iterator(
+            start_page=start_page, max_workers=max_workers, **params
+        ):
+            for item in items:
+                self.archive_item(item_type, item)
+            num_archived += len(items)
+
+            # never checkpoint items which are still buffered
+            self.flush()
+            run['page'] = page
+            checkpoint['run'] = run
+            self.save_checkpoint(item_type, checkpoint)
+
+            msg = 'Page %s of %s (%s %ss)' % (
+                page,
+                num_pages,
+                total,
+                item_type,
+            )
+            print(msg)
+
+        checkpoint = {
+            'updated_at_min': run['started_at'],
+            'run': None,
+        }
+        self.save_checkpoint(item_type, checkpoint)
+
         end_time = time.time()
         duration = Decimal(end_time - start_time).quantize(Decimal(10) ** -2)
         msg = 'Archived %s %ss in %s seconds' % (
@@ -156,6 +279,54 @@ class HtkShopifyArchiver(object):
         )
         notify(msg, use_messages=False)
 
+    ##
+    # Checkpoints
+
+    def _get_checkpoint_key(self, item_type):
+        key = 'shopify_archiver_checkpoint:%s' % item_type
+        return key
+
+    def get_checkpoint(self, item_type):
+        """Gets the checkpoint of `item_type`, or an empty dict
+
+        Stored with `htk.apps.kv_storage`; can be overridden to store checkpoints elsewhere
+        """
+        from htk.apps.kv_storage.utils import kv_get
+
+        checkpoint = kv_get(
+            self._get_checkpoint_key(item_type),
+            namespace=htk_setting('HTK_SHOPIFY_ARCHIVER_CHECKPOINT_KV_NAMESPACE'),
+            force_refetch=True,
+        )
+        checkpoint = dict(checkpoint) if checkpoint else {}
+        return checkpoint
+
+    def save_checkpoint(self, item_type, checkpoint):
+        from htk.apps.kv_storage.utils import kv_put
+
+        kv_put(
+            self._get_checkpoint_key(item_type),
+            checkpoint,
+            namespace=htk_setting('HTK_SHOPIFY_ARCHIVER_CHECKPOINT_KV_NAMESPACE'),
+            overwrite=True,
+        )
+
+    def clear_checkpoint(self, item_type):
+        """Clears the checkpoint of `item_type`, so that the next run archives everything"""
+        from htk.apps.kv_storage.utils import kv_delete
+
+        kv_delete(
+            self._get_checkpoint_key(item_type),
+            namespace=htk_setting('HTK_SHOPIFY_ARCHIVER_CHECKPOINT_KV_NAMESPACE'),
+        )
+
+    def flush(self, item_type=None):
+        """Writes any buffered items of `item_type`, or of all item types, to the database
+
+        Can be overridden by archivers which buffer writes
+        """
+        pass
+
     def archive_item(self, item_type, item):
         """Archives a single Shopify.Resource `item` into some database using `archiver`"""
         archiver = self._get_archiver_for_item_type(item_type)
@@ -172,7 +343,14 @@ class HtkShopifyArchiver(object):
 
 
 class HtkShopifyMongoDBArchiver(HtkShopifyArchiver):
-    def __init__(self, mongodb_connection=None, mongodb_name=None, api=None):
+    """Archives Shopify resources into MongoDB
+
+    Upserts are buffered per item type, and written in batches of `flush_size` (default: `HTK_SHOPIFY_ARCHIVER_FLUSH_SIZE`)
+    """
+
+    def __init__(
+        self, mongodb_connection=None, mongodb_name=None, api=None, flush_size=None
+    ):
         if mongodb_connection is None:
             self.mongodb_connection = htk_setting('HTK_MONGODB_CONNECTION')
         else:
@@ -183,6 +361,14 @@ class HtkShopifyMongoDBArchiver(HtkShopifyArchiver):
             self.mongodb_name = mongodb_name
 
         self.mongodb_initialized = False
+
+        if flush_size is None:
+            self.flush_size = htk_setting('HTK_SHOPIFY_ARCHIVER_FLUSH_SIZE')
+        else:
+            self.flush_size = flush_size
+        # item_type -> {pk: document}
+        self.pending_upserts = {}
+
         super(HtkShopifyMongoDBArchiver, self).__init__(api=api)
 
     def get_collection_name(self, item_type):
@@ -233,6 +419,39 @@ class HtkShopifyMongoDBArchiver(HtkShopifyArchiver):
             upsert=True,
         )
 
+    def _db_upsert_many(self, item_type, documents):
+        """Performs the actual DB upsert of many `documents`, a dict of `{pk: document}`, in one round-trip"""
+        from pymongo import ReplaceOne
+
+        self._init_mongodb()
+
+        collection_name = self.get_collection_name(item_type)
+        collection = self.mongo_db[collection_name]
+
+        collection.bulk_write(
+            [
+                ReplaceOne(
+                    {
+                        '_id': pk,
+                    },
+                    document,
+                    upsert=True,
+                )
+                for pk, document in documents.items()
+            ],
+            ordered=False,
+        )
+
+    def flush(self, item_type=None):
+        """Writes the buffered upserts of `item_type`, or of all item types"""
+        item_types = (
+            [item_type] if item_type else list(self.pending_upserts.keys())
+        )
+        for pending_item_type in item_types:
+            documents = self.pending_upserts.pop(pending_item_type, None)
+            if documents:
+                self._db_upsert_many(pending_item_type, documents)
+
     def upsert(self, item_type, document):
         key = lambda document: document['_id']
         pk = key(document)
@@ -248,7 +467,12 @@ class HtkShopifyMongoDBArchiver(HtkShopifyArchiver):
             preparator = self._get_document_preparator(item_type)
             if preparator:
                 preparator(document)
-            self._db_upsert(item_type, document, pk)
+
+            documents = self.pending_upserts.setdefault(item_type, {})
+            # a later version of the same item replaces the buffered one
+            documents[pk] = document
+            if len(documents) >= self.flush_size:
+                self.flush(item_type)
 
     def _convert_iso_date_fields(self, document, iso_date_fields):
         """Converts ISO date fields to UNIX timestamp"""
@@ -575,9 +799,11 @@ class HtkShopifyMongoDBArchiver(HtkShopifyArchiver):
 
 
 class HtkShopifySQLArchiver(HtkShopifyMongoDBArchiver):
-    def __init__(self, mongodb_dual_archive=False):
+    def __init__(self, mongodb_dual_archive=False, api=None, flush_size=None):
         self.mongodb_dual_archive = mongodb_dual_archive
-        super(HtkShopifySQLArchiver, self).__init__()
+        super(HtkShopifySQLArchiver, self).__init__(
+            api=api, flush_size=flush_size
+        )
 
     def get_model(self, item_type):
         models = htk_setting('HTK_SHOPIFY_SQL_MODELS')
@@ -605,3 +831,39 @@ class HtkShopifySQLArchiver(HtkShopifyMongoDBArchiver):
         instance = model.from_document(document)
         persisted_instance = instance.upsert()
         return persisted_instance
+
+    def _db_upsert_many(self, item_type, documents):
+        """Performs the actual DB upsert of many `documents`, a dict of `{pk: document}`
+
+        Converts the MongoDB documents into Django model instances, and upserts them with a single `INSERT ... ON CONFLICT DO UPDATE` (`ON DUPLICATE KEY UPDATE` on MySQL)
+        """
+        if self.mongodb_dual_archive:
+            try:
+                super(HtkShopifySQLArchiver, self)._db_upsert_many(
+                    item_type, documents
+                )
+            except:
+                rollbar.report_exc_info()
+
+        model = self.get_model(item_type)
+        instances = [
+            model.from_document(dict(document))
+            for document in documents.values()
+        ]
+        update_fields = [
+            field.name
+            for field in model._meta.concrete_fields
+            if not field.primary_key
+        ]
+        features = connections[model.objects.db].features
+        bulk_create_kwargs = {
+            'update_conflicts': True,
+            'update_fields': update_fields,
+        }
+        if features.supports_update_conflicts_with_target:
+            bulk_create_kwargs['unique_fields'] = [model._meta.pk.name]
+        persisted_instances = model.objects.bulk_create(
+            instances,
+            **bulk_create_kwargs
+        )
+        return persisted_instances
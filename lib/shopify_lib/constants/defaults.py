@@ -38,3 +38,12 @@ HTK_SHOPIFY_SQL_MODELS = {
     'refund' : 'shopify.ShopifyRefund',
     'transaction' : 'shopify.ShopifyTransaction',
 }
+
+# number of buffered documents per item type written in one bulk upsert
+HTK_SHOPIFY_ARCHIVER_FLUSH_SIZE = 500
+# primary keys remembered per item type to skip duplicates within an archive session
+HTK_SHOPIFY_ARCHIVER_ITEMS_SEEN_MAX_SIZE = 100000
+# pages fetched concurrently by `archive_item_type_pipeline()`
+HTK_SHOPIFY_ARCHIVER_MAX_WORKERS = 4
+# `htk.apps.kv_storage` namespace for archiver checkpoints
+HTK_SHOPIFY_ARCHIVER_CHECKPOINT_KV_NAMESPACE = None
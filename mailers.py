@@ -6,6 +6,7 @@ from email.mime.image import MIMEImage
 from django.conf import settings
 from django.core.mail import (
     EmailMultiAlternatives,
+    get_connection,
     send_mail,
 )
 from django.template import TemplateDoesNotExist
@@ -83,18 +84,52 @@ def get_email_context():
     return context
 
 
-def attach_images_to_message(message, images):
+def read_images(images):
+    """Reads the files at `images` paths
+
+    Returns a list of `(filename, content)` tuples, for `attach_image_contents_to_message()`
+    """
+    image_contents = []
     for image in images:
-      fp = open(image, 'rb')
-      filename = os.path.basename(image)
-      msg_image = MIMEImage(fp.read())
-      fp.close()
-      msg_image.add_header('Content-ID', '<%s>' % filename)
-      message.attach(msg_image)
+        with open(image, 'rb') as fp:
+            image_contents.append((os.path.basename(image), fp.read(),))
+    return image_contents
 
 
-def send_email(
-    template=None,
+def attach_image_contents_to_message(message, image_contents):
+    """Attaches inline images, given as `(filename, content)` tuples, to `message`
+    """
+    for (filename, content,) in image_contents:
+        msg_image = MIMEImage(content)
+        msg_image.add_header('Content-ID', '<%s>' % filename)
+        message.attach(msg_image)
+
+
+def attach_images_to_message(message, images):
+    attach_image_contents_to_message(message, read_images(images))
+
+
+def get_email_templates(template):
+    """Gets the compiled `(html_template, text_template)` for `template`
+
+    Either may be `None` if it does not exist
+    """
+    try:
+        html_template = get_template('emails/%s.html' % template)
+    except TemplateDoesNotExist:
+        html_template = None
+
+    try:
+        text_template = get_template('emails/%s.txt' % template)
+    except TemplateDoesNotExist:
+        text_template = None
+
+    return (html_template, text_template,)
+
+
+def build_templated_email(
+    html_template,
+    text_template,
     subject='',
     sender=None,
     reply_to=None,
@@ -103,54 +138,47 @@ def send_email(
     bcc=None,
     context=None,
     text_only=False,
-    headers=None
+    headers=None,
+    connection=None
 ):
-    """Sends a templated email w/ text and HTML
+    """Builds a templated email w/ text and HTML from compiled templates
+
+    `context` is the complete template context, including the base email context; it is not modified
+    Does not attach `HTK_EMAIL_ATTACHMENTS`
     """
-    if headers is None:
-        headers = {}
+    headers = dict(headers) if headers else {}
 
     if reply_to is not None:
         headers['Reply-To'] = reply_to
 
-    template = template or 'base'
     sender = sender or htk_setting('HTK_DEFAULT_EMAIL_SENDER', HTK_DEFAULT_EMAIL_SENDER)
     to = to or htk_setting('HTK_DEFAULT_EMAIL_RECIPIENTS', HTK_DEFAULT_EMAIL_RECIPIENTS)
     bcc = bcc or []
     cc = cc or []
 
-    base_context = get_email_context()
-    if context:
-        base_context.update(context)
-    else:
-        pass
-    context = base_context
+    context = dict(context) if context else {}
 
     if settings.ENV_DEV:
         subject = '[%s-dev] %s' % (htk_setting('HTK_SYMBOLIC_SITE_NAME'), subject,)
 
     # assume HTML template exists, get that first
-    try:
-        html_template = get_template('emails/%s.html' % template)
+    if html_template:
         context['base_template'] = htk_setting('HTK_EMAIL_BASE_TEMPLATE_HTML')
         html_content = html_template.render(context)
-    except TemplateDoesNotExist:
-        html_template = None
+    else:
         html_content = ''
 
     # if native text template exists, use it
-    try:
-        context['base_template'] = htk_setting('HTK_EMAIL_BASE_TEMPLATE_TEXT')
-        text_template = get_template('emails/%s.txt' % template)
+    context['base_template'] = htk_setting('HTK_EMAIL_BASE_TEMPLATE_TEXT')
+    if text_template:
         text_content = text_template.render(context)
-    except TemplateDoesNotExist:
-        text_template = None
+    elif html_template:
         # convert HTML to text
-        if html_template:
-            html_text_content = html_template.render(context)
-            text_content = html2markdown(html_text_content)
-        else:
-            text_content = ''
+        # rendered again, since the HTML template extends the text base template this time
+        html_text_content = html_template.render(context)
+        text_content = html2markdown(html_text_content)
+    else:
+        text_content = ''
 
     msg = EmailMultiAlternatives(
         subject=subject,
@@ -159,7 +187,8 @@ def send_email(
         to=to,
         bcc=bcc,
         cc=cc,
-        headers=headers
+        headers=headers,
+        connection=connection
     )
 
     if not text_only and html_content:
@@ -167,6 +196,49 @@ def send_email(
     else:
         pass
 
+    return msg
+
+
+def send_email(
+    template=None,
+    subject='',
+    sender=None,
+    reply_to=None,
+    to=None,
+    cc=None,
+    bcc=None,
+    context=None,
+    text_only=False,
+    headers=None
+):
+    """Sends a templated email w/ text and HTML
+
+    To send many emails with the same template, use `send_emails()`
+    """
+    template = template or 'base'
+    (html_template, text_template,) = get_email_templates(template)
+
+    base_context = get_email_context()
+    if context:
+        base_context.update(context)
+    else:
+        pass
+    context = base_context
+
+    msg = build_templated_email(
+        html_template,
+        text_template,
+        subject=subject,
+        sender=sender,
+        reply_to=reply_to,
+        to=to,
+        cc=cc,
+        bcc=bcc,
+        context=context,
+        text_only=text_only,
+        headers=headers
+    )
+
     email_attachments = htk_setting('HTK_EMAIL_ATTACHMENTS')
     if email_attachments:
         attach_images_to_message(msg, email_attachments)
@@ -176,6 +248,82 @@ def send_email(
     msg.send()
 
 
+def send_emails(
+    emails,
+    template=None,
+    subject='',
+    sender=None,
+    reply_to=None,
+    text_only=False,
+    headers=None,
+    batch_size=None,
+    connection=None,
+    fail_silently=False
+):
+    """Sends a templated email w/ text and HTML to many recipients
+
+    `emails` an iterable of dicts, one per email, with the keys:
+    - `to` (required) list of recipients
+    - `context` (optional) per-email template context, on top of the shared base email context
+    - `subject`, `cc`, `bcc`, `reply_to`, `headers` (optional) override the defaults passed to this function
+
+    Compared to calling `send_email()` for each, the templates are compiled, the base email context built and `HTK_EMAIL_ATTACHMENTS` read only once,
+    and the emails are sent `batch_size` (default: `HTK_EMAIL_BATCH_SIZE`) at a time over a single connection with `send_messages()`
+    `connection` (optional) is used as is, and left for the caller to open and close; otherwise, a connection is opened for this call and closed afterwards
+
+    Returns the number of emails sent
+    """
+    template = template or 'base'
+    if batch_size is None:
+        batch_size = htk_setting('HTK_EMAIL_BATCH_SIZE')
+
+    (html_template, text_template,) = get_email_templates(template)
+    base_context = get_email_context()
+
+    image_contents = read_images(htk_setting('HTK_EMAIL_ATTACHMENTS') or [])
+
+    def _build_message(email):
+        context = dict(base_context)
+        context.update(email.get('context') or {})
+        msg = build_templated_email(
+            html_template,
+            text_template,
+            subject=email.get('subject', subject),
+            sender=sender,
+            reply_to=email.get('reply_to', reply_to),
+            to=email['to'],
+            cc=email.get('cc'),
+            bcc=email.get('bcc'),
+            context=context,
+            text_only=text_only,
+            headers=email.get('headers', headers)
+        )
+        attach_image_contents_to_message(msg, image_contents)
+        return msg
+
+    def _send_batches(connection):
+        num_sent = 0
+        batch = []
+        for email in emails:
+            batch.append(_build_message(email))
+            if len(batch) >= batch_size:
+                num_sent += connection.send_messages(batch) or 0
+                batch = []
+        if batch:
+            num_sent += connection.send_messages(batch) or 0
+        return num_sent
+
+    if connection is None:
+        # open our own connection once, and keep it open across batches
+        with get_connection(fail_silently=fail_silently) as connection:
+            num_sent = _send_batches(connection)
+    else:
+        # opening and closing a caller's connection is up to the caller
+        num_sent = _send_batches(connection)
+
+    return num_sent
+
+
 def send_markdown_email(
     subject='',
     sender=None,
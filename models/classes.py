@@ -7,6 +7,7 @@ import six.moves.urllib as urllib
 # Django Imports
 from django.contrib.contenttypes.models import ContentType
 from django.db import models
+from django.db.models import prefetch_related_objects
 from django.http import Http404
 from django.urls import reverse
 from django.utils.http import (
@@ -193,21 +194,89 @@ class AbstractAttributeHolderClassFactory(object):
     In the future, perhaps it might be worth exploring `functools.wraps`.
     """
 
-    def __init__(self, attribute_class, holder_resolver=None, defaults=None):
+    def __init__(
+        self, attribute_class, holder_resolver=None, defaults=None, holder_field=None
+    ):
+        """`holder_field` optional; the name of the relation from the inheriting model to the holder, when the holder is not the object itself, e.g. `'user'`
+
+        Used as the default `holder_resolver`, and lets `prefetch_attributes()` load the holders of a list of objects in a single query
+        """
         self.attribute_class = attribute_class
-        if holder_resolver is None:
-            self.holder_resolver = lambda self: self
-        else:
+        self.holder_field = holder_field
+        if holder_resolver is not None:
             self.holder_resolver = holder_resolver
+        elif holder_field is not None:
+            self.holder_resolver = lambda self: getattr(self, holder_field)
+        else:
+            self.holder_resolver = lambda self: self
         self.defaults = defaults or {}
 
     def get_class(self):
         factory = self
 
         class AbstractAttributeHolderClass(object):
-            def set_attribute(self, key, value, as_bool=False):
+            """Attributes of a holder are all loaded in a single query on first access, and kept on the holder instance
+
+            Use `prefetch_attributes()` to load attributes for a list of holders in a single query.
+            Use `refresh_attributes()` to discard the loaded attributes if they may have been changed elsewhere.
+            """
+
+            @classmethod
+            def prefetch_attributes(cls, objs):
+                """Loads the attributes for every object in `objs` with a single query
+
+                Holders that are reached through `holder_field` and were not already fetched, e.g. with `select_related()`, are loaded with one more query
+
+                Returns `objs`
+                """
+                if factory.holder_field is not None:
+                    prefetch_related_objects(objs, factory.holder_field)
+
+                holders_by_id = {}
+                for obj in objs:
+                    holder = factory.holder_resolver(obj)
+                    holders_by_id.setdefault(holder.pk, []).append(holder)
+
+                attributes_maps = {holder_id: {} for holder_id in holders_by_id}
+                attributes = factory.attribute_class.objects.filter(
+                    holder__in=list(holders_by_id.keys())
+                )
+                for attribute in attributes:
+                    attributes_maps[attribute.holder_id][attribute.key] = attribute
+
+                for holder_id, holders in holders_by_id.items():
+                    for holder in holders:
+                        holder._attributes_map = attributes_maps[holder_id]
+                return objs
+
+            def _get_attributes_map(self):
+                """Returns a dict of `{key: attribute}` for all of this holder's attributes, loading them on first access"""
+                holder = factory.holder_resolver(self)
+                attributes_map = getattr(holder, '_attributes_map', None)
+                if attributes_map is None:
+                    attributes_map = {
+                        attribute.key: attribute
+                        # `.all()` makes use of `prefetch_related('attributes')` if the holder was fetched that way
+                        for attribute in holder.attributes.all()
+                    }
+                    holder._attributes_map = attributes_map
+                return attributes_map
+
+            def refresh_attributes(self):
+                holder = factory.holder_resolver(self)
+                holder._attributes_map = None
+
+            def _normalize_attribute_value(self, value, as_bool=False):
                 if as_bool:
                     value = int(bool(value))
+                # same as the value read back from the database
+                value = factory.attribute_class._meta.get_field('value').to_python(
+                    value
+                )
+                return value
+
+            def set_attribute(self, key, value, as_bool=False):
+                value = self._normalize_attribute_value(value, as_bool=as_bool)
                 attribute = self._get_attribute_object(key)
                 if attribute is None:
                     holder = factory.holder_resolver(self)
@@ -216,20 +285,56 @@ class AbstractAttributeHolderClassFactory(object):
                         key=key,
                         value=value,
                     )
-                else:
+                    self._get_attributes_map()[key] = attribute
+                elif attribute.value != value:
                     attribute.set_value(value)
+                else:
+                    # unchanged
+                    pass
                 return attribute
 
+            def set_attributes(self, values, as_bool=False):
+                """Sets many attributes at once from the dict `values`
+
+                New attributes are created with a single `bulk_create()`, and changed ones saved with a single `bulk_update()`
+                """
+                holder = factory.holder_resolver(self)
+                attributes_map = self._get_attributes_map()
+                now = utcnow()
+
+                to_create = []
+                to_update = []
+                for key, value in values.items():
+                    value = self._normalize_attribute_value(value, as_bool=as_bool)
+                    attribute = attributes_map.get(key)
+                    if attribute is None:
+                        to_create.append(
+                            factory.attribute_class(
+                                holder=holder,
+                                key=key,
+                                value=value,
+                            )
+                        )
+                    elif attribute.value != value:
+                        attribute.value = value
+                        # `bulk_update()` does not apply `auto_now`
+                        attribute.updated_on = now
+                        to_update.append(attribute)
+
+                if to_create:
+                    factory.attribute_class.objects.bulk_create(to_create)
+                    # ids may not be set on every database backend, so reload rather than cache the unsaved objects
+                    self.refresh_attributes()
+                if to_update:
+                    factory.attribute_class.objects.bulk_update(
+                        to_update, ['value', 'updated_on']
+                    )
+
             def _get_attribute_object(self, key):
-                try:
-                    holder = factory.holder_resolver(self)
-                    attribute = holder.attributes.get(holder=holder, key=key)
-                except factory.attribute_class.DoesNotExist:
-                    attribute = None
+                attribute = self._get_attributes_map().get(key)
                 return attribute
 
-            def get_attribute(self, key, as_bool=False):
-                attribute = self._get_attribute_object(key)
+            def _format_attribute_value(self, attribute, key, as_bool=False):
                 value = (
                     attribute.value
                     if attribute
@@ -245,10 +350,32 @@ class AbstractAttributeHolderClassFactory(object):
                         value = False
                 return value
 
+            def get_attribute(self, key, as_bool=False):
+                attribute = self._get_attribute_object(key)
+                value = self._format_attribute_value(
+                    attribute, key, as_bool=as_bool
+                )
+                return value
+
+            def get_attributes(self, keys, as_bool=False):
+                """Returns a dict of `{key: value}` for `keys`
+
+                All of the attributes are loaded in a single query, or none if already loaded
+                """
+                attributes_map = self._get_attributes_map()
+                values = {
+                    key: self._format_attribute_value(
+                        attributes_map.get(key), key, as_bool=as_bool
+                    )
+                    for key in keys
+                }
+                return values
+
             def delete_attribute(self, key):
                 attribute = self._get_attribute_object(key)
                 if attribute:
                     attribute.delete()
+                    self._get_attributes_map().pop(key, None)
 
             @CachedAttribute
             def attribute_fields(self):
@@ -25,3 +25,17 @@ def normalize_model_field_value(model, field, value):
         normalized_value = value
 
     return normalized_value
+
+
+def get_update_fields_excluding(instance, excluded_field_names):
+    """Returns the names of the concrete fields that `instance.save()` should write, other than `excluded_field_names`
+
+    Used by models with denormalized columns that are only ever written with `QuerySet.update()` and F-expressions,
+    so that saving a stale in-memory copy does not overwrite them.
+    """
+    update_fields = [
+        field.name
+        for field in instance._meta.concrete_fields
+        if not field.primary_key and field.name not in excluded_field_names
+    ]
+    return update_fields
@@ -1,9 +1,32 @@
 # Python Standard Library Imports
 import inspect
+import logging
+import time
+from concurrent.futures import (
+    ThreadPoolExecutor,
+    as_completed,
+)
 
 # Third Party (PyPI) Imports
 import rollbar
 
+# Django Imports
+from django.db import connections
+from django.db.models.query import QuerySet
+
+# HTK Imports
+from htk.utils import htk_setting
+from htk.utils.queryset_iterators import chunked_iterator
+from htk.utils.timer import HtkTimer
+
+
+class BatchExecutionMode(object):
+    """How `BaseTask.execute_batch()` runs its chunks of users
+    """
+    SERIAL = 'serial'
+    THREADS = 'threads'
+    CELERY = 'celery'
+
 
 class BaseTask(object):
     """Base class for background tasks
@@ -44,6 +67,53 @@ class BaseTask(object):
         was_reset = c.reset_cooldown(force=force)
         return was_reset
 
+    def has_default_cooldown_hooks(self):
+        """Checks whether neither this task nor its `cooldown_class` overrides `has_cooldown()` or `reset_cooldown()`
+
+        Only then can cooldowns be read and stored directly in the cache, bypassing the hooks
+        """
+        from htk.cachekeys import TaskCooldown
+        task_class = type(self)
+        _has_default_cooldown_hooks = (
+            task_class.has_cooldown is BaseTask.has_cooldown
+            and task_class.reset_cooldown is BaseTask.reset_cooldown
+            and self.cooldown_class.has_cooldown is TaskCooldown.has_cooldown
+            and self.cooldown_class.reset_cooldown is TaskCooldown.reset_cooldown
+        )
+        return _has_default_cooldown_hooks
+
+    def get_users_with_cooldown(self, users):
+        """Returns the subset of `users` whose cooldown timer is still going
+
+        With the default cooldown hooks, in a single cache round-trip; otherwise by calling `has_cooldown()` for each user
+        """
+        if self.has_default_cooldown_hooks():
+            prekeys = {
+                user: self.cooldown_class.get_hashable_prekey(self.get_cooldown_class_prekey(user))
+                for user in users
+            }
+            cooldowns = self.cooldown_class.get_many(prekeys.values())
+            users_with_cooldown = [
+                user
+                for user, prekey in prekeys.items()
+                if cooldowns.get(prekey)
+            ]
+        else:
+            users_with_cooldown = [user for user in users if self.has_cooldown(user)]
+        return users_with_cooldown
+
+    def reset_executed_cooldown(self, user):
+        """Resets the cooldown timer for `user`, right after the task was executed for it
+
+        With the default cooldown hooks, stores the cooldown without reading it first, since `user` was just checked not to have one;
+        otherwise calls `reset_cooldown()`
+        """
+        if self.has_default_cooldown_hooks():
+            c = self.cooldown_class(self.get_cooldown_class_prekey(user))
+            c.cache_store()
+        else:
+            self.reset_cooldown(user)
+
     def get_users(self):
         """Returns a list or QuerySet of User objects
 
@@ -59,21 +129,26 @@ class BaseTask(object):
         """
         pass
 
-    def execute_batch(self):
-        """Batch execution
+    def execute_users(self, users):
+        """Executes the task for each of `users`, none of which has a cooldown
+
+        Can be overridden to process a chunk of users at once.
+        Overrides should call `reset_executed_cooldown()` for each user as soon as it is executed,
+        so that users already executed are not executed again if the chunk is interrupted.
+
+        Returns a tuple of `(executed_users, num_failed)`
         """
-        users = self.get_users()
+        executed_users = []
+        num_failed = 0
         for user in users:
             try:
-                if self.has_cooldown(user):
-                    # cooldown has not elapsed yet, don't execute too frequently
-                    pass
-                else:
-                    self.execute(user)
-                    # cache right after execution or exception, not before
-                    # since each execution costs a non-zero overhead
-                    self.reset_cooldown(user)
+                self.execute(user)
+                # cache right after execution, not before
+                # since each execution costs a non-zero overhead
+                self.reset_executed_cooldown(user)
+                executed_users.append(user)
             except Exception:
+                num_failed += 1
                 extra_data = {
                     'user' : {
                         'id' : user.id,
@@ -81,3 +156,168 @@ class BaseTask(object):
                     },
                 }
                 rollbar.report_exc_info(extra_data=extra_data)
+        return executed_users, num_failed
+
+    def execute_chunk(self, users):
+        """Executes the task for a chunk of `users`
+
+        Cooldowns are checked before execution, with one multi-get unless the cooldown hooks are overridden,
+        and reset for each user as soon as it is executed
+
+        Returns a dict of stats for the chunk
+        """
+        timer = HtkTimer()
+        timer.start()
+
+        users_with_cooldown = set(self.get_users_with_cooldown(users))
+        # cooldown has not elapsed yet for these, don't execute too frequently
+        users_to_execute = [user for user in users if user not in users_with_cooldown]
+
+        (executed_users, num_failed,) = self.execute_users(users_to_execute)
+
+        timer.stop()
+        stats = {
+            'users' : len(users),
+            'executed' : len(executed_users),
+            'skipped' : len(users_with_cooldown),
+            'failed' : num_failed,
+            'duration' : timer.duration(),
+        }
+        return stats
+
+    def execute_chunk_by_ids(self, user_ids):
+        """Executes the task for a chunk of users given by `user_ids`
+
+        Used by the Celery subtask, which only receives ids
+        """
+        from django.contrib.auth import get_user_model
+        users_by_id = get_user_model().objects.in_bulk(user_ids)
+        users = [users_by_id[user_id] for user_id in user_ids if user_id in users_by_id]
+        stats = self.execute_chunk(users)
+        return stats
+
+    def iter_user_chunks(self, chunk_size):
+        """Yields lists of up to `chunk_size` users
+
+        QuerySets are streamed with keyset pagination on pk, rather than loaded all at once
+        """
+        users = self.get_users()
+        if isinstance(users, QuerySet):
+            users = chunked_iterator(users, size=chunk_size)
+
+        chunk = []
+        for user in users:
+            chunk.append(user)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def report_progress(self, totals):
+        """Called after each chunk completes with the running `totals`
+
+        Can be overridden, e.g. to notify a Slack channel
+        """
+        logging.getLogger(__name__).info(
+            '%s: %s chunks, %s users (%s executed, %s skipped, %s failed, %s failed chunks), %.1f users/s',
+            self.__class__.__name__,
+            totals['chunks'],
+            totals['users'],
+            totals['executed'],
+            totals['skipped'],
+            totals['failed'],
+            totals['failed_chunks'],
+            totals['throughput'],
+        )
+
+    def execute_batch(self, mode=BatchExecutionMode.SERIAL, chunk_size=None, max_workers=None):
+        """Batch execution
+
+        `mode` one of `BatchExecutionMode`:
+        - SERIAL: run chunks one after another in this process
+        - THREADS: run chunks on a pool of `max_workers` threads; suited to I/O bound tasks like sending emails
+        - CELERY: dispatch one Celery subtask per chunk; requires a no-argument constructor, and `htk.apps.async_task` in `INSTALLED_APPS`
+
+        Returns a dict of totals. In CELERY mode, these only count users dispatched; each subtask reports its own stats.
+        """
+        if chunk_size is None:
+            chunk_size = htk_setting('HTK_BATCH_TASK_CHUNK_SIZE')
+        if max_workers is None:
+            max_workers = htk_setting('HTK_BATCH_TASK_MAX_WORKERS')
+
+        started_at = time.time()
+        totals = {
+            'chunks' : 0,
+            'users' : 0,
+            'executed' : 0,
+            'skipped' : 0,
+            'failed' : 0,
+            'failed_chunks' : 0,
+            'duration' : 0,
+            'throughput' : 0,
+        }
+
+        def _update_throughput():
+            totals['duration'] = time.time() - started_at
+            totals['throughput'] = totals['users'] / totals['duration'] if totals['duration'] else 0
+
+        def _add_chunk_stats(stats):
+            totals['chunks'] += 1
+            for key in ('users', 'executed', 'skipped', 'failed',):
+                totals[key] += stats[key]
+            _update_throughput()
+            self.report_progress(totals)
+
+        def _add_chunk_failure(users):
+            totals['failed_chunks'] += 1
+            extra_data = {
+                'task' : self.__class__.__name__,
+                'user_ids' : [user.id for user in users],
+            }
+            rollbar.report_exc_info(extra_data=extra_data)
+
+        if mode == BatchExecutionMode.SERIAL:
+            for users in self.iter_user_chunks(chunk_size):
+                try:
+                    _add_chunk_stats(self.execute_chunk(users))
+                except Exception:
+                    _add_chunk_failure(users)
+        elif mode == BatchExecutionMode.THREADS:
+            def _execute_chunk_in_thread(users):
+                try:
+                    stats = self.execute_chunk(users)
+                finally:
+                    # each thread has its own database connections
+                    connections.close_all()
+                return stats
+
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {}
+                for users in self.iter_user_chunks(chunk_size):
+                    futures[executor.submit(_execute_chunk_in_thread, users)] = users
+                    if len(futures) >= max_workers * 2:
+                        # bound the number of chunks held in memory
+                        done_future = next(as_completed(futures))
+                        chunk_users = futures.pop(done_future)
+                        try:
+                            _add_chunk_stats(done_future.result())
+                        except Exception:
+                            _add_chunk_failure(chunk_users)
+                for future in as_completed(futures):
+                    try:
+                        _add_chunk_stats(future.result())
+                    except Exception:
+                        _add_chunk_failure(futures[future])
+        elif mode == BatchExecutionMode.CELERY:
+            from htk.apps.async_task.tasks import execute_batch_task_chunk
+            task_class_path = '{}.{}'.format(self.__class__.__module__, self.__class__.__name__)
+            for users in self.iter_user_chunks(chunk_size):
+                execute_batch_task_chunk.delay(task_class_path, [user.id for user in users])
+                totals['chunks'] += 1
+                totals['users'] += len(users)
+        else:
+            raise Exception('Unknown batch execution mode: %s' % mode)
+
+        _update_throughput()
+        return totals
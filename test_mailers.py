@@ -0,0 +1,76 @@
+# Python Standard Library Imports
+from unittest import mock
+
+# Django Imports
+from django.core import mail
+from django.core.mail import get_connection
+from django.core.mail.backends import locmem
+from django.test import (
+    SimpleTestCase,
+    override_settings,
+)
+
+# HTK Imports
+from htk.mailers import (
+    send_email,
+    send_emails,
+)
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    ENV_DEV=False,
+    HTK_EMAIL_ATTACHMENTS=(),
+)
+class HtkMailersTestCase(SimpleTestCase):
+    NUM_EMAILS = 250
+
+    def _build_emails(self):
+        emails = [
+            {
+                'to': ['user%s@example.com' % i],
+                'context': {'name': 'User %s' % i},
+            }
+            for i in range(self.NUM_EMAILS)
+        ]
+        return emails
+
+    def test_send_emails_batches_over_one_connection(self):
+        with mock.patch.object(
+            locmem.EmailBackend,
+            'send_messages',
+            autospec=True,
+            side_effect=locmem.EmailBackend.send_messages,
+        ) as send_messages:
+            num_sent = send_emails(self._build_emails(), template='base', subject='Hello', batch_size=100)
+
+        self.assertEqual(self.NUM_EMAILS, num_sent)
+        self.assertEqual(self.NUM_EMAILS, len(mail.outbox))
+        self.assertEqual(3, send_messages.call_count)
+        self.assertEqual(['user0@example.com'], mail.outbox[0].to)
+        self.assertEqual('Hello', mail.outbox[0].subject)
+
+    def test_send_emails_leaves_caller_connection_open(self):
+        connection = get_connection()
+        with mock.patch.object(connection, 'close') as close:
+            send_emails(self._build_emails()[:5], template='base', connection=connection)
+        close.assert_not_called()
+        self.assertEqual(5, len(mail.outbox))
+
+    def test_send_emails_matches_send_email(self):
+        """Sending with `send_emails()` produces the same emails as calling `send_email()` for each
+        """
+        emails = self._build_emails()
+
+        for email in emails:
+            send_email(template='base', subject='Hello', to=email['to'], context=email['context'])
+        single_messages = mail.outbox
+
+        mail.outbox = []
+        send_emails(emails, template='base', subject='Hello')
+        batch_messages = mail.outbox
+
+        self.assertEqual(
+            [(message.to, message.subject, message.body, message.alternatives,) for message in single_messages],
+            [(message.to, message.subject, message.body, message.alternatives,) for message in batch_messages]
+        )
@@ -1,3 +1,17 @@
+# Python Standard Library Imports
+import json
+import time
+
+# Django Imports
+from django.db import connections
+from django.db.models import (
+    Count,
+    OuterRef,
+    Subquery,
+)
+from django.db.models.functions import Coalesce
+
+
 def get_objects_by_id(object_model, object_ids, strict=False, preserve_ordering=False):
     """Gets a list of Django objects by ids
     If `strict`, all object_ids must exist, or None is returned
@@ -9,7 +23,122 @@ def get_objects_by_id(object_model, object_ids, strict=False, preserve_ordering=
     else:
         objects = list(objects_qs)
     if objects and preserve_ordering:
-        objects = sorted(objects, key=lambda obj: object_ids.index(obj.id))
+        positions = {}
+        for i, object_id in enumerate(object_ids):
+            positions.setdefault(object_id, i)
+        objects = sorted(objects, key=lambda obj: positions[obj.id])
     else:
         pass
     return objects
+
+
+def get_estimated_count(queryset, exact_threshold=None):
+    """Gets the approximate number of rows in `queryset` from the query planner, without counting them
+
+    On PostgreSQL, reads the planner's row estimate from `EXPLAIN`; elsewhere, falls back to an exact `count()`
+    If `exact_threshold` is specified and the estimate is below it, counts exactly instead, since small counts are cheap and more noticeably wrong
+    """
+    count = None
+    if connections[queryset.db].vendor == 'postgresql':
+        plan = json.loads(queryset.order_by().explain(format='json'))
+        count = int(plan[0]['Plan']['Plan Rows'])
+
+    if count is None or (exact_threshold is not None and count < exact_threshold):
+        count = queryset.count()
+    return count
+
+
+def get_count_subquery(queryset, outer_field):
+    """Returns an expression counting the rows of `queryset` whose `outer_field` points at the outer row, or 0
+
+    e.g. `Thread.objects.annotate(n=get_count_subquery(Message.objects.all(), 'thread'))`
+
+    Unlike `Count()` over a join, several of these can be combined in one query without multiplying each other's rows
+    """
+    subquery = (
+        queryset.filter(**{outer_field: OuterRef('pk')})
+        .order_by()
+        .values(outer_field)
+        .annotate(count=Count('pk'))
+        .values('count')
+    )
+    expression = Coalesce(Subquery(subquery), 0)
+    return expression
+
+
+def get_latest_pk_subquery(queryset, outer_field, ordering):
+    """Returns an expression for the pk of the first row of `queryset` by `ordering` whose `outer_field` points at the outer row, or `None`"""
+    subquery = (
+        queryset.filter(**{outer_field: OuterRef('pk')})
+        .order_by(*ordering)
+        .values('pk')[:1]
+    )
+    expression = Subquery(subquery)
+    return expression
+
+
+def reconcile_denormalized_fields(queryset, expressions, batch_size=1000):
+    """Repairs denormalized fields that have drifted from their source of truth
+
+    `expressions` is a dict of `{field_name: expression}`, each computing the expected value of a concrete field of the rows of `queryset`, e.g. from `get_count_subquery()`.
+    For a `ForeignKey`, give the `attname`, e.g. `'last_message_id'`.
+
+    Rows are compared `batch_size` at a time in pk order, with one query per batch, and only mismatched rows are written back, with `bulk_update()`
+
+    Returns a dict of stats
+    """
+    start = time.time()
+    model = queryset.model
+    field_names = list(expressions.keys())
+    expected_names = {
+        field_name: '_expected_' + field_name for field_name in field_names
+    }
+    annotated_qs = queryset.annotate(
+        **{
+            expected_names[field_name]: expression
+            for field_name, expression in expressions.items()
+        }
+    ).order_by('pk')
+    num_fields = len(field_names)
+
+    total = 0
+    fixed = 0
+    last_pk = None
+    while True:
+        batch_qs = annotated_qs
+        if last_pk is not None:
+            batch_qs = batch_qs.filter(pk__gt=last_pk)
+        rows = list(
+            batch_qs.values_list(
+                'pk',
+                *field_names,
+                *(expected_names[field_name] for field_name in field_names),
+            )[:batch_size]
+        )
+        if not rows:
+            break
+
+        mismatched = []
+        for row in rows:
+            current_values = row[1 : 1 + num_fields]
+            expected_values = row[1 + num_fields :]
+            if current_values != expected_values:
+                instance = model(pk=row[0])
+                for field_name, expected in zip(field_names, expected_values):
+                    setattr(instance, field_name, expected)
+                mismatched.append(instance)
+
+        if mismatched:
+            model.objects.bulk_update(mismatched, field_names)
+
+        total += len(rows)
+        fixed += len(mismatched)
+        last_pk = rows[-1][0]
+
+    duration = time.time() - start
+    stats = {
+        'total': total,
+        'fixed': fixed,
+        'duration': duration,
+    }
+    return stats
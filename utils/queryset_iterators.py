@@ -2,9 +2,7 @@ DEFAULT_CHUNK_SIZE = 1000
 
 
 def chunked_iterator(qs, size=DEFAULT_CHUNK_SIZE):
-    qs = qs._clone()
-    qs.query.clear_ordering(force_empty=True)
-    qs.query.add_ordering('pk')
+    qs = qs.order_by('pk')
     last_pk = None
     empty = False
     while not empty:
@@ -1,76 +1,221 @@
-# Third Party (PyPI) Imports
-import numpy
+# Python Standard Library Imports
+import heapq
+from collections import deque
 
 
-def levenshtein_distance(w1, w2):
+def levenshtein_distance(w1, w2, max_distance=None):
     """The Levenshtein distance algorithm that compares two words
 
     https://en.wikipedia.org/wiki/Levenshtein_distance
 
     https://blog.paperspace.com/implementing-levenshtein-distance-word-autocomplete-autocorrect/
 
-    Returns an `int` representing the edit distance between two words
-    """
-    insertion_cost = 0
-    deletion_cost = 0
-    substitution_cost = 0
-    edit_distance = numpy.zeros((len(w1) + 1, len(w2) + 1))
-
-    for x in range(len(w1) + 1):
-        edit_distance[x][0] = x
-
-    for y in range(len(w2) + 1):
-        edit_distance[0][y] = y
+    Only two rows of the edit distance matrix are kept.
+    If `max_distance` is specified, only the diagonal band of width `2 * max_distance + 1` is computed,
+    and computation stops as soon as the distance is known to exceed `max_distance`.
 
-    for x in range(1, len(w1) + 1):
-        for y in range(1, len(w2) + 1):
-            if (w1[x - 1] == w2[y - 1]):
-                edit_distance[x][y] = edit_distance[x - 1][y - 1]
+    Returns an `int` representing the edit distance between two words,
+    or `max_distance + 1` if the distance is greater than `max_distance`
+    """
+    if len(w1) < len(w2):
+        # iterate over the longer word, keep rows the length of the shorter one
+        w1, w2 = w2, w1
+
+    len1 = len(w1)
+    len2 = len(w2)
+
+    if max_distance is not None and len1 - len2 > max_distance:
+        # needs at least one insertion per extra character
+        return max_distance + 1
+
+    if max_distance is None:
+        band = len1
+    else:
+        band = max_distance
+    too_far = len1 + 1 if max_distance is None else max_distance + 1
+
+    previous_row = list(range(len2 + 1))
+    for x in range(1, len1 + 1):
+        c1 = w1[x - 1]
+        y_min = max(1, x - band)
+        y_max = min(len2, x + band)
+
+        current_row = [too_far] * (len2 + 1)
+        if y_min == 1:
+            current_row[0] = x
+        row_min = current_row[0]
+
+        for y in range(y_min, y_max + 1):
+            if c1 == w2[y - 1]:
+                cost = previous_row[y - 1]
             else:
-                insertion_cost = edit_distance[x][y - 1] + 1
-                deletion_cost = edit_distance[x - 1][y] + 1
-                substitution_cost = edit_distance[x - 1][y - 1] + 1
-
-                edit_distance[x][y] = min(
-                    deletion_cost,
-                    insertion_cost,
-                    substitution_cost
+                cost = 1 + min(
+                    previous_row[y],  # deletion
+                    current_row[y - 1],  # insertion
+                    previous_row[y - 1],  # substitution
                 )
+            current_row[y] = cost
+            if cost < row_min:
+                row_min = cost
+
+        if max_distance is not None and row_min > max_distance:
+            # every path to the last cell passes through this row
+            return max_distance + 1
+
+        previous_row = current_row
 
-    result = edit_distance[len(w1)][len(w2)]
+    result = previous_row[len2]
+    if max_distance is not None and result > max_distance:
+        result = max_distance + 1
     return result
 
 
-def get_closest_dict_words(word, dict_words, num_results=20):
+class _TopK(object):
+    """Keeps the `k` smallest `(distance, index)` entries seen so far, in a bounded max-heap
+    """
+    def __init__(self, k):
+        self.k = k
+        # entries are (-distance, -index, word), so that the root is the worst entry
+        self.heap = []
+
+    def worst_distance(self):
+        """Returns the distance of the worst entry once `k` entries are kept, otherwise `None`
+        """
+        if self.k > 0 and len(self.heap) >= self.k:
+            distance = -self.heap[0][0]
+        else:
+            distance = None
+        return distance
+
+    def push(self, distance, index, word):
+        entry = (-distance, -index, word,)
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, entry)
+        elif entry > self.heap[0]:
+            heapq.heapreplace(self.heap, entry)
+
+    def get_words(self):
+        entries = sorted(self.heap, reverse=True)
+        words = [word for (_, _, word,) in entries]
+        return words
+
+
+def get_closest_dict_words(word, dict_words, num_results=20, max_distance=None):
     """Uses the Levenshtein distance for Word Autocompletion and Autocorrection
 
     https://blog.paperspace.com/implementing-levenshtein-distance-word-autocomplete-autocorrect/
+
+    `max_distance` optional; excludes words further away than this
     """
-    dict_word_distances = []
-    distances = []
-    greatest_distance_allowed = None
+    closest_words = _get_closest_words_by_scan(
+        word,
+        dict_words,
+        num_results=num_results,
+        max_distance=max_distance
+    )
+    return closest_words
 
-    for dict_word in dict_words:
-        word_distance = levenshtein_distance(word, dict_word)
 
-        if greatest_distance_allowed is not None and word_distance > greatest_distance_allowed:
+def _get_closest_words_by_scan(word, dict_words, num_results=20, max_distance=None):
+    """Compares `word` with each of `dict_words`, keeping the closest in a bounded heap
+
+    Once `num_results` words have been found, each further comparison is cut off at the distance of the worst of them
+    """
+    top = _TopK(num_results)
+    for index, dict_word in enumerate(dict_words):
+        worst = top.worst_distance()
+        if worst is None:
+            cutoff = max_distance
+        elif max_distance is None:
+            cutoff = worst
+        else:
+            cutoff = min(worst, max_distance)
+
+        word_distance = levenshtein_distance(word, dict_word, max_distance=cutoff)
+        if cutoff is not None and word_distance > cutoff:
             # skip this word, because it cannot be among the closest words
             pass
         else:
-            dict_word_distances.append((word_distance, dict_word, ))
+            top.push(word_distance, index, dict_word)
 
-            distances.append(word_distance)
-            distances.sort()
-            if len(distances) >= num_results:
-                distances = distances[:num_results]
-                greatest_distance_allowed = distances[-1]
+    closest_words = top.get_words()
+    return closest_words
 
-    dict_word_distances.sort(key=lambda x: x[0])
 
-    closest_words = [
-        dict_word
-        for distance, dict_word
-        in dict_word_distances[:num_results]
-    ]
+class AhoCorasick(object):
+    """Aho-Corasick automaton: finds occurrences of many patterns in a single pass over a text
 
-    return closest_words
+    Patterns and texts may be any sequences of hashable symbols, e.g. `str` or `bytes`, as long as they are of the same kind.
+    Matching takes time linear in the length of the text plus the number of matches, however many patterns there are.
+
+    https://en.wikipedia.org/wiki/Aho%E2%80%93Corasick_algorithm
+    """
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        # state 0 is the root; each state has goto transitions, a failure link, and the indexes of the patterns ending there
+        self.transitions = [{}]
+        self.failures = [0]
+        self.outputs = [[]]
+
+        for index, pattern in enumerate(self.patterns):
+            if len(pattern) > 0:
+                self._add(pattern, index)
+        self._build_failures()
+
+    def _add(self, pattern, index):
+        state = 0
+        for symbol in pattern:
+            next_state = self.transitions[state].get(symbol)
+            if next_state is None:
+                next_state = len(self.transitions)
+                self.transitions.append({})
+                self.failures.append(0)
+                self.outputs.append([])
+                self.transitions[state][symbol] = next_state
+            state = next_state
+        self.outputs[state].append(index)
+
+    def _build_failures(self):
+        """Links each state to the state of its longest proper suffix, breadth first"""
+        queue = deque(self.transitions[0].values())
+        while queue:
+            state = queue.popleft()
+            for symbol, next_state in self.transitions[state].items():
+                queue.append(next_state)
+                failure = self.failures[state]
+                while failure and symbol not in self.transitions[failure]:
+                    failure = self.failures[failure]
+                failure = self.transitions[failure].get(symbol, 0)
+                self.failures[next_state] = failure
+                # patterns ending at the suffix state also end here
+                self.outputs[next_state] = self.outputs[next_state] + self.outputs[failure]
+
+    def iter_matches(self, text):
+        """Generates `(end, index)` for every occurrence of `self.patterns[index]` in `text`, ending just before position `end`
+        """
+        transitions = self.transitions
+        failures = self.failures
+        outputs = self.outputs
+        state = 0
+        for position, symbol in enumerate(text):
+            while state and symbol not in transitions[state]:
+                state = failures[state]
+            state = transitions[state].get(symbol, 0)
+            for index in outputs[state]:
+                yield (position + 1, index,)
+
+    def find_indexes(self, text):
+        """Returns the set of indexes of the patterns that occur in `text`
+        """
+        transitions = self.transitions
+        failures = self.failures
+        outputs = self.outputs
+        indexes = set()
+        state = 0
+        for symbol in text:
+            while state and symbol not in transitions[state]:
+                state = failures[state]
+            state = transitions[state].get(symbol, 0)
+            if outputs[state]:
+                indexes.update(outputs[state])
+        return indexes
@@ -0,0 +1,165 @@
+# Python Standard Library Imports
+import random
+import string
+import unittest
+from unittest import mock
+
+# HTK Imports
+from htk.utils.text import algorithms
+from htk.utils.text.algorithms import (
+    AhoCorasick,
+    get_closest_dict_words,
+    levenshtein_distance,
+)
+
+
+def _reference_levenshtein_distance(w1, w2):
+    """Full-matrix edit distance, for checking the optimized implementation against
+    """
+    edit_distance = [[0] * (len(w2) + 1) for _ in range(len(w1) + 1)]
+    for x in range(len(w1) + 1):
+        edit_distance[x][0] = x
+    for y in range(len(w2) + 1):
+        edit_distance[0][y] = y
+    for x in range(1, len(w1) + 1):
+        for y in range(1, len(w2) + 1):
+            if w1[x - 1] == w2[y - 1]:
+                edit_distance[x][y] = edit_distance[x - 1][y - 1]
+            else:
+                edit_distance[x][y] = 1 + min(
+                    edit_distance[x][y - 1],
+                    edit_distance[x - 1][y],
+                    edit_distance[x - 1][y - 1]
+                )
+    return edit_distance[len(w1)][len(w2)]
+
+
+def _reference_get_closest_dict_words(word, dict_words, num_results=20):
+    """Exhaustive closest words: every distance computed, then sorted (stable, so ties keep dictionary order)
+    """
+    dict_word_distances = [
+        (_reference_levenshtein_distance(word, dict_word), dict_word,)
+        for dict_word in dict_words
+    ]
+    dict_word_distances.sort(key=lambda x: x[0])
+    closest_words = [dict_word for distance, dict_word in dict_word_distances[:num_results]]
+    return closest_words
+
+
+def _generate_typos(words, num_typos, seed=0):
+    """Misspells `num_typos` of `words` with one or two random edits, as autocorrect queries would be
+    """
+    rng = random.Random(seed)
+    typos = []
+    for word in rng.sample(words, num_typos):
+        chars = list(word)
+        for _ in range(rng.randint(1, 2)):
+            position = rng.randrange(len(chars))
+            edit = rng.choice(['insert', 'delete', 'substitute'])
+            if edit == 'insert':
+                chars.insert(position, rng.choice(string.ascii_lowercase[:8]))
+            elif edit == 'delete' and len(chars) > 1:
+                del chars[position]
+            else:
+                chars[position] = rng.choice(string.ascii_lowercase[:8])
+        typos.append(''.join(chars))
+    return typos
+
+
+def _generate_words(num_words, seed=0):
+    rng = random.Random(seed)
+    words = set()
+    while len(words) < num_words:
+        length = rng.randint(3, 10)
+        words.add(''.join(rng.choice(string.ascii_lowercase[:8]) for _ in range(length)))
+    return sorted(words)
+
+
+class LevenshteinDistanceTestCase(unittest.TestCase):
+    def test_known_distances(self):
+        self.assertEqual(3, levenshtein_distance('kitten', 'sitting'))
+        self.assertEqual(0, levenshtein_distance('same', 'same'))
+        self.assertEqual(4, levenshtein_distance('', 'four'))
+        self.assertEqual(4, levenshtein_distance('four', ''))
+
+    def test_matches_reference(self):
+        words = _generate_words(200, seed=1)
+        for w1, w2 in zip(words, reversed(words)):
+            self.assertEqual(_reference_levenshtein_distance(w1, w2), levenshtein_distance(w1, w2))
+
+    def test_max_distance(self):
+        words = _generate_words(200, seed=2)
+        for w1, w2 in zip(words, reversed(words)):
+            distance = _reference_levenshtein_distance(w1, w2)
+            for max_distance in range(0, 6):
+                expected = distance if distance <= max_distance else max_distance + 1
+                self.assertEqual(expected, levenshtein_distance(w1, w2, max_distance=max_distance))
+
+
+class ClosestDictWordsTestCase(unittest.TestCase):
+    NUM_DICT_WORDS = 3000
+    NUM_QUERIES = 20
+
+    def setUp(self):
+        self.dict_words = _generate_words(self.NUM_DICT_WORDS)
+        self.queries = _generate_typos(self.dict_words, self.NUM_QUERIES, seed=3)
+
+    def test_matches_reference(self):
+        for word in self.queries[:5]:
+            expected = _reference_get_closest_dict_words(word, self.dict_words, num_results=10)
+            self.assertEqual(expected, get_closest_dict_words(word, self.dict_words, num_results=10))
+
+    def test_max_distance(self):
+        for word in self.queries[:5]:
+            closest_words = get_closest_dict_words(word, self.dict_words, num_results=50, max_distance=1)
+            for dict_word in closest_words:
+                self.assertLessEqual(_reference_levenshtein_distance(word, dict_word), 1)
+
+    def test_benchmark(self):
+        """Compares the exhaustive implementation against the bounded scan, by the work done rather than by time
+
+        Both compare the query with every word, but the bounded scan cuts most comparisons off early,
+        at the distance of the worst of the closest words found so far
+        """
+        num_comparisons = 0
+        num_cut_off = 0
+
+        def counting_levenshtein_distance(w1, w2, max_distance=None):
+            nonlocal num_comparisons, num_cut_off
+            distance = levenshtein_distance(w1, w2, max_distance=max_distance)
+            num_comparisons += 1
+            if max_distance is not None and distance > max_distance:
+                num_cut_off += 1
+            return distance
+
+        with mock.patch.object(algorithms, 'levenshtein_distance', counting_levenshtein_distance):
+            for word in self.queries:
+                get_closest_dict_words(word, self.dict_words, num_results=5)
+
+        self.assertEqual(self.NUM_QUERIES * self.NUM_DICT_WORDS, num_comparisons)
+        self.assertGreater(num_cut_off, num_comparisons * 0.9)
+
+
+class AhoCorasickTestCase(unittest.TestCase):
+    def test_known_matches(self):
+        automaton = AhoCorasick(['he', 'she', 'his', 'hers'])
+        self.assertEqual(
+            [(4, 1,), (4, 0,), (6, 3,)],
+            list(automaton.iter_matches('ushers'))
+        )
+        self.assertEqual({0, 1, 3}, automaton.find_indexes('ushers'))
+        self.assertEqual(set(), automaton.find_indexes('xyz'))
+
+    def test_matches_substring_search(self):
+        words = _generate_words(300, seed=4)
+        patterns = words[::3]
+        automaton = AhoCorasick(patterns)
+        rng = random.Random(5)
+        for _ in range(20):
+            text = ' '.join(rng.sample(words, 30))
+            expected = {index for index, pattern in enumerate(patterns) if pattern in text}
+            self.assertEqual(expected, automaton.find_indexes(text))
+
+    def test_bytes(self):
+        automaton = AhoCorasick([pattern.encode() for pattern in ['a.b', 'b.c', 'x']])
+        self.assertEqual({0, 1}, automaton.find_indexes(b'{% localize "a.b.c" %}'))